@@ -1,141 +1,254 @@
 # vi:set shiftwidth=4 expandtab:
-# run "ChimeraX --nogui --exit --silent benchmark.py"
+# run "ChimeraX --nogui --exit --silent --script benchmark.py"
+# or with options:
+#   ChimeraX --nogui --exit --silent --script \
+#       "benchmark.py --json results.json --baseline last_week.json"
 #
 # This file is meant to be run weekly, and compared with
 # previous weeks, so changes in performance can daylighted.
 #
+# Only files in testdata/ and data computed from them are used, so
+# results do not depend on the network.  Each stage is timed COUNT
+# times and once more with tracemalloc to find its peak Python memory
+# use (which includes numpy arrays but not C++ allocations).  Results
+# are printed and optionally written as JSON.  If a baseline JSON file
+# is given, the benchmark fails when a stage median time or memory peak
+# exceeds the baseline by more than the threshold fraction.
+#
+import argparse
 import gc
+import json
 import os
+import platform
 import socket
-import subprocess
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
 from chimerax.core.commands import run
 from chimerax.core.logger import PlainTextLog
 from chimerax.core import buildinfo
 
 
-PDB_MMCIF_IDS = ["3fx2", "2hmg", "5xnl"]
-HUGE_MMCIF_ID = "3j3q"
 COUNT = 5
-current_memory_usage = None
 
 
-def get_memory_use():
-    gc.collect()
-    output = subprocess.check_output(['/usr/bin/pmap', str(os.getpid())])
-    usage = output.split()[-1].decode()
-    return usage
+def parse_arguments():
+    if sys.argv and sys.argv[0].endswith(".py"):
+        script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+        args = sys.argv[1:]
+    else:
+        script_dir = os.getcwd()
+        args = []
+    p = argparse.ArgumentParser(prog="benchmark.py")
+    p.add_argument("--testdata", default=os.path.join(script_dir, "testdata"),
+                   help="directory with benchmark input files")
+    p.add_argument("--count", type=int, default=COUNT,
+                   help="times to run each stage")
+    p.add_argument("--json", help="write results to this JSON file")
+    p.add_argument("--baseline", help="JSON results to compare against")
+    p.add_argument("--threshold", type=float, default=0.25,
+                   help="allowed fractional increase in median time")
+    p.add_argument("--memory-threshold", type=float, default=0.25,
+                   help="allowed fractional increase in peak memory")
+    p.add_argument("--min-time", type=float, default=0.01,
+                   help="stages faster than this many seconds are not"
+                   " checked for time regressions")
+    p.add_argument("--stages", help="comma-separated stage name prefixes to run")
+    return p.parse_args(args)
 
 
 class NoOutputLog(PlainTextLog):
 
+    excludes_other_logs = True
+
     def log(self, level, msg):
-        pass
+        return True
 
     def status(self, msg, color, secondary):
-        pass
+        return True
+
+
+class Stage:
+    """A named benchmark step with optional setup and cleanup commands
+    that are not timed."""
+
+    def __init__(self, name, commands, setup=(), cleanup=()):
+        self.name = name
+        self.commands = commands
+        self.setup = setup
+        self.cleanup = cleanup
+
+    def run_commands(self, commands):
+        for cmd in commands:
+            run(session, cmd, log=False)
+
+    def time_once(self, trace_memory=False):
+        self.run_commands(self.setup)
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+        t0 = perf_counter()
+        try:
+            self.run_commands(self.commands)
+            elapsed = perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            self.run_commands(self.cleanup)
+        return elapsed, peak
+
+    def measure(self, count):
+        times = [self.time_once()[0] for _ in range(count)]
+        peak = self.time_once(trace_memory=True)[1]
+        return stage_result(times, peak)
+
+
+def stage_result(times, peak):
+    from numpy import median, std
+    trimmed = sorted(times)[1:-1] if len(times) >= 3 else times
+    return {
+        "times": times,
+        "median": float(median(times)),
+        "mean": sum(trimmed) / len(trimmed),
+        "std": float(std(trimmed)),
+        "peak_bytes": peak,
+    }
+
+
+def benchmark_stages(testdata, tmpdir):
+    def data(name):
+        return os.path.join(testdata, name)
+
+    def tmp(name):
+        return os.path.join(tmpdir, name)
+
+    stages = []
+    for f in ("3fx2.pdb", "1a0m.pdb"):
+        stages.append(Stage("open pdb %s" % f,
+                            ["open %s format pdb logInfo false" % data(f)],
+                            cleanup=["close"]))
+    for f in ("1a0m.cif", "9rsa.cif", "1gcf.cif"):
+        stages.append(Stage("open mmcif %s" % f,
+                            ["open %s format mmcif logInfo false" % data(f)],
+                            cleanup=["close"]))
+    stages.append(Stage("close structure", ["close"],
+                        setup=["open %s logInfo false" % data("1gcf.cif")]))
+
+    # Synthetic map computed from a structure, saved once for open timings.
+    structure = "open %s logInfo false" % data("1a0m.cif")
+    mrc = tmp("synthetic.mrc")
+    run(session, structure)
+    run(session, "molmap #1 1.5 gridSpacing 0.5")
+    run(session, "save %s models #2" % mrc)
+    run(session, "close")
+    with_map = [structure, "open %s" % mrc]
+    stages.append(Stage("open mrc", ["open %s" % mrc], cleanup=["close"]))
+
+    session_file = tmp("benchmark.cxs")
+    stages.extend([
+        Stage("session save", ["save %s" % session_file],
+              setup=with_map, cleanup=["close"]),
+        Stage("session restore", ["open %s" % session_file],
+              setup=with_map + ["save %s" % session_file, "close"],
+              cleanup=["close"]),
+        Stage("surface", ["surface #1"], setup=[structure], cleanup=["close"]),
+        Stage("hbonds", ["hbonds #1 log false"], setup=[structure],
+              cleanup=["close"]),
+        Stage("clashes", ["clashes #1 log false"], setup=[structure],
+              cleanup=["close"]),
+        Stage("contacts", ["contacts #1 log false"], setup=[structure],
+              cleanup=["close"]),
+        Stage("atomspec", ["select /A:10-200@CA,CB",
+                           "select :ALA,GLY,LYS@N*",
+                           "select :start-50 | :100-end@C? & /A-D",
+                           "select clear"],
+              setup=["open %s logInfo false" % data("1gcf.cif")],
+              cleanup=["close"]),
+        Stage("fitmap", ["fitmap #1 inMap #2 moveWholeMolecules false"],
+              setup=with_map + ["move x 2 models #1"], cleanup=["close"]),
+        Stage("volume gaussian", ["volume gaussian #2 sdev 1.5"],
+              setup=with_map, cleanup=["close"]),
+        Stage("volume median", ["volume median #2 binSize 3"],
+              setup=with_map, cleanup=["close"]),
+        Stage("volume bin", ["volume bin #2 binSize 2"],
+              setup=with_map, cleanup=["close"]),
+        Stage("volume fourier", ["volume fourier #2"],
+              setup=with_map, cleanup=["close"]),
+    ])
+    return stages
+
+
+def compare_to_baseline(results, baseline, options):
+    """Return descriptions of stages that regressed."""
+    failures = []
+    base_stages = baseline.get("stages", {})
+    for name, r in results["stages"].items():
+        b = base_stages.get(name)
+        if b is None:
+            continue
+        bt, t = b["median"], r["median"]
+        if max(bt, t) >= options.min_time and t > bt * (1 + options.threshold):
+            failures.append("%s: median time %.4g s, baseline %.4g s (+%.0f%%)"
+                            % (name, t, bt, 100 * (t / bt - 1)))
+        bp, p = b.get("peak_bytes"), r.get("peak_bytes")
+        if bp and p and p > bp * (1 + options.memory_threshold):
+            failures.append("%s: peak memory %d bytes, baseline %d bytes (+%.0f%%)"
+                            % (name, p, bp, 100 * (p / bp - 1)))
+    return failures
+
+
+def print_results(name, r):
+    peak = r["peak_bytes"]
+    mem = "" if peak is None else ", peak %.1f MB" % (peak / 2**20)
+    print(f"{round(r['mean'], 4)} \N{Plus-Minus Sign} {round(r['std'], 3)}"
+          f" (median {round(r['median'], 4)}{mem}): {name}")
 
 
 session = session  # noqa -- shut up flake8
+options = parse_arguments()
 session.logger.add_log(NoOutputLog())
 
-
-def time_command(command):
-    from time import time
-    t0 = time()
-    try:
-        run(session, command)
-    except:
-        return 0
-    t1 = time()
-    return t1 - t0
-
-
-def time_commands(cmds):
-    for cmd, description in cmds:
-        times = []
-        run_command(cmd, times)
-        print_results(description, times)
-        print_increased_memory()
-
-
-def run_command(command, times):
-    t = time_command(command)
-    # session.main_view.check_for_drawing_change()
-    times.append(t)
-
-
-def time_open_close(open_cmd):
-    open_times = []
-    close_times = []
-    for _ in range(COUNT):
-        run_command(open_cmd, open_times)
-        run_command("close", close_times)
-    return open_times, close_times
-
-
-def print_results(command, times):
-    from numpy import std
-    if len(times) >= 3:
-        # throw out high and low
-        times = sorted(times)[1:-1]
-    mean = sum(times) / len(times)
-    var = std(times)
-    if len(times) == 1:
-        print(f"{round(mean, 4)}: {command}")
-    else:
-        print(f"{round(mean, 4)} \N{Plus-Minus Sign}"
-              f" {round(var,3)}: {command}")
-
-
-def print_delta_memory(tag, first, second):
-    delta = int(second[:-1]) - int(first[:-1])
-    print(f"{tag}: {delta}{first[-1]}")
-
-
-def print_increased_memory():
-    global current_memory_usage
-    if current_memory_usage is None:
-        current_memory_usage = start_usage
-    usage = get_memory_use()
-    print_delta_memory("Increased memory use", current_memory_usage, usage)
-    current_memory_usage = usage
-
-
 print(f"UCSF ChimeraX version: {buildinfo.version}"
       f" ({buildinfo.date.split()[0]})")
 print(f"Running benchmark on {socket.gethostname()}")
-
-start_usage = get_memory_use()
-print(f"Starting memory use:  {start_usage}")
-usage0 = start_usage
-
-print("Average time: command")
-
-huge_open_cmd = f"open {HUGE_MMCIF_ID} format mmcif loginfo false"
-open_times, close_times = time_open_close(huge_open_cmd)
-print_results(huge_open_cmd, open_times)
-print_results(f"({HUGE_MMCIF_ID} mmcif) close", close_times)
-print_increased_memory()
-
-for pdb_id in PDB_MMCIF_IDS:
-    open_cmd = f"open {pdb_id} format pdb loginfo false"
-    open_times, close_times = time_open_close(open_cmd)
-    print_results(open_cmd, open_times)
-    print_results(f"({pdb_id} pdb) close", close_times)
-    open_cmd = f"open {pdb_id} format mmcif loginfo false"
-    open_times, close_times = time_open_close(open_cmd)
-    print_results(open_cmd, open_times)
-    print_results(f"({pdb_id} mmcif) close", close_times)
-    print_increased_memory()
-
-run(session, huge_open_cmd)
-mol_cmds = [
-    ("style ball", f"style ball ({HUGE_MMCIF_ID})"),
-    ("cartoon", f"cartoon ({HUGE_MMCIF_ID})"),
-]
-time_commands(mol_cmds)
-
-
-end_usage = get_memory_use()
-print(f"Ending memory use:    {end_usage}")
-print_delta_memory("Total memory increase", start_usage, end_usage)
+print("Average time: stage")
+
+results = {
+    "version": buildinfo.version,
+    "date": buildinfo.date,
+    "host": socket.gethostname(),
+    "platform": platform.platform(),
+    "python": platform.python_version(),
+    "count": options.count,
+    "stages": {},
+}
+with tempfile.TemporaryDirectory() as tmpdir:
+    stages = benchmark_stages(options.testdata, tmpdir)
+    if options.stages:
+        prefixes = [s.strip() for s in options.stages.split(",")]
+        stages = [s for s in stages
+                  if any(s.name.startswith(p) for p in prefixes)]
+    for stage in stages:
+        r = stage.measure(options.count)
+        results["stages"][stage.name] = r
+        print_results(stage.name, r)
+
+if options.json:
+    with open(options.json, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {options.json}")
+
+if options.baseline:
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    failures = compare_to_baseline(results, baseline, options)
+    if failures:
+        print("Performance regressions compared to %s:" % options.baseline)
+        for msg in failures:
+            print("  " + msg)
+        sys.stdout.flush()
+        # Exit directly so the status is not lost by the ChimeraX --exit handling.
+        os._exit(1)
+    print("No regressions compared to %s" % options.baseline)
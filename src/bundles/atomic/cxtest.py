@@ -0,0 +1,34 @@
+# Residue ranges select the same residues with vectorized masks as with
+# the per-residue matcher, including insertion codes.
+from numpy import array, int32
+from chimerax.core.commands.atomspec import _Part
+seqs = array([4, 5, 5, 5, 6, 7, 7, 8, 9], int32)
+ics = array(['', '', 'A', 'B', '', '', 'A', '', ''], object)
+for start, end in [('5', None), ('5A', None), ('5', '7'), ('5A', '7'), ('5', '7A'),
+		('5B', '7A'), ('5A', 'end'), ('5', 'end'), ('start', '5A'), ('start', '7'),
+		('start', 'end')]:
+	part = _Part(start, end)
+	matcher = part.res_id_matcher()
+	expected = [matcher(s, ic) for s, ic in zip(seqs.tolist(), ics.tolist())]
+	mask = part.res_id_mask(seqs, ics)
+	if mask.tolist() != expected:
+		raise SystemExit("Residue range %s-%s mask %s differs from matcher %s"
+			% (start, end, mask.tolist(), expected))
+
+from chimerax.core.commands import run
+from chimerax.atomic import selected_atoms
+run(session, "open 3fx2")
+s = session.models[0]
+for spec, nums in [(":10-20", range(10, 21)), (":100-end", range(100, 10000))]:
+	run(session, "select %s" % spec)
+	residues = selected_atoms(session).unique_residues
+	expected = [r for r in s.residues if r.number in nums]
+	if len(residues) != len(expected):
+		raise SystemExit("Selecting %s gave %d residues instead of %d"
+			% (spec, len(residues), len(expected)))
+
+# Attribute test values are converted using the session, so they are not cached.
+from chimerax.core.commands import atomspec
+atomspec.AtomSpecArg.parse("@@color=red", session)
+if any("@@color=red" in cache for cache in atomspec._parse_caches.values()):
+	raise SystemExit("Atom specifier with an attribute test was cached")
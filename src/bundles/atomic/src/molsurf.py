@@ -101,6 +101,8 @@ class MolecularSurface(Surface):
         self._vertex_to_atom = None
         self._vertex_to_atom_count = None	# Used to check if atoms deleted
         self._max_radius = None
+        self._grid_origin = None	# Calculation grid alignment for incremental updates
+        self._surface_coords = None	# Atom coordinates used for current surface
         self.clip_cap = True
 
     def delete(self):
@@ -150,6 +152,7 @@ class MolecularSurface(Surface):
         self._vertex_to_atom = None
         self._max_radius = None
         self._joined_triangles = None
+        self._surface_coords = None
 
     def _get_auto_update(self):
         return self._auto_update_handler is not None
@@ -172,7 +175,7 @@ class MolecularSurface(Surface):
         if self.deleted:
             return 'delete handler'
         if self._coordinates_changed(changes):
-            self._recompute_shape()
+            self._update_shape()
 
     def _coordinates_changed(self, changes):
         if 'active_coordset changed' in changes.structure_reasons():
@@ -206,7 +209,96 @@ class MolecularSurface(Surface):
         else:
             self._clear_shape()
             self.calculate_surface_geometry()
-        
+
+    # Largest fraction of atoms that can move for the solvent excluded
+    # surface to be recalculated only near the moved atoms.
+    incremental_update_fraction = 0.1
+    # Largest volume of the recalculated box, as a fraction of the volume of
+    # the whole surface calculation box.  Moved atoms far apart give a large box.
+    incremental_update_box_fraction = 0.25
+
+    def _update_shape(self):
+        '''
+        Update the surface after atoms move.  If few atoms moved only the
+        part of a solvent excluded surface near the old and new atom
+        positions is recalculated, otherwise the whole surface is recalculated.
+        '''
+        old_xyz = self._surface_coords
+        if (self.resolution is not None or old_xyz is None or self.vertices is None
+            or len(self.atoms) != len(old_xyz) or len(self.atoms) < self._atom_count):
+            self._recompute_shape()
+            return
+        xyz = self.atom_coords()
+        moved = (xyz != old_xyz).any(axis = 1)
+        nmoved = moved.sum()
+        if nmoved == 0:
+            return
+        if nmoved > self.incremental_update_fraction * len(xyz):
+            self._recompute_shape()
+            return
+
+        from numpy import concatenate
+        changed_xyz = concatenate((xyz[moved], old_xyz[moved]))
+        r = self.atoms.radii
+        from chimerax import surface
+        box_min, box_max = surface.ses_surface_region_box(r, changed_xyz, self.probe_radius,
+                                                          self.grid_spacing, self._grid_origin)
+        pad = surface.ses_surface_padding(r, self.probe_radius, self.grid_spacing)
+        full_size = xyz.max(axis = 0) - xyz.min(axis = 0) + 2*pad
+        if (box_max - box_min).prod() > self.incremental_update_box_fraction * full_size.prod():
+            self._recompute_shape()
+            return
+
+        self._max_radius = r.max()
+        pva, pna, pta, (box_min, box_max) = \
+            surface.ses_surface_region(xyz, r, changed_xyz, self.probe_radius,
+                                       self.grid_spacing, self._grid_origin)
+        pv2a = self._nearest_atoms(pva, xyz)
+        if self.sharp_boundaries and len(pta) > 0:
+            pva, pna, pta, ptj, pv2a = \
+                surface.sharp_edge_patches(pva, pna, pta, pv2a, xyz, atom_radii = r,
+                                           refinement_steps = self._refinement_steps)
+
+        # Remove the old triangles in the recalculated box.
+        va, na, ta = self.vertices, self.normals, self.triangles
+        v2a = self.vertex_to_atom_map()
+        if v2a is None:
+            v2a = self._nearest_atoms(va, old_xyz)
+        from chimerax.surface.gridsurf import triangles_in_box
+        keept = (~triangles_in_box(va, ta, box_min, box_max)).nonzero()[0]
+        from numpy import unique, arange, int32
+        keepv = unique(ta[keept])
+        from chimerax.surface.split import reduce_geometry
+        va, na, ta = reduce_geometry(va, na, ta, keepv, keept)
+        v2a = v2a[keepv]
+
+        # Join patch vertices on the box faces to the matching old vertices.
+        nv = len(va)
+        pvi = arange(nv, nv + len(pva), dtype = int32)
+        if nv > 0 and len(pva) > 0:
+            from chimerax import geometry
+            i1, i2, near = geometry.find_closest_points(pva, va, 1e-3 * self.grid_spacing)
+            if self.sharp_boundaries:
+                # Sharp boundary triangles do not share vertices, so only match positions.
+                pva[i1] = va[near]
+            else:
+                pvi[i1] = near
+        ta = concatenate((ta, pvi[pta]))
+        va = concatenate((va, pva))
+        na = concatenate((na, pna))
+        v2a = concatenate((v2a, pv2a))
+
+        self.set_geometry(va, na, ta)
+        self._vertex_to_atom = v2a
+        self._vertex_to_atom_count = len(self.atoms)
+        self._joined_triangles = None	# Recomputed when needed
+        self._surface_coords = xyz.copy()
+        self.color = self._average_color()
+        self.vertex_colors = None
+        self.triangle_mask = self._calc_triangle_mask()
+        self._show_atom_patch_colors()
+        self.update_selection()
+
     @property
     def atom_count(self):
         '''Number of atoms for calculating the surface. Read only.'''
@@ -216,8 +308,13 @@ class MolecularSurface(Surface):
         atoms = self.atoms
         return atoms.coords if atoms.single_structure else atoms.scene_coords
     
-    def calculate_surface_geometry(self):
-        '''Recalculate the surface if parameters have been changed.'''
+    def calculate_surface_geometry(self, cache = None):
+        '''
+        Recalculate the surface if parameters have been changed.
+        If a surface cache (chimerax.surface.SurfaceCache) is given, geometry
+        previously calculated for the same atom coordinates and parameters
+        is used, and newly calculated geometry is added to the cache.
+        '''
         if not self.vertices is None:
             return              # Geometry already computed
 
@@ -226,10 +323,20 @@ class MolecularSurface(Surface):
         res = self.resolution
         from chimerax import surface
         if res is None:
-            # Compute solvent excluded surface
             r = atoms.radii
             self._max_radius = r.max()
-            va, na, ta = surface.ses_surface_geometry(xyz, r, self.probe_radius, self.grid_spacing)
+            pad = surface.ses_surface_padding(r, self.probe_radius, self.grid_spacing)
+            self._grid_origin = origin = xyz.min(axis = 0) - pad
+
+        if cache is not None:
+            key = self.cache_key(xyz)
+            if self._set_cached_geometry(cache.get(key)):
+                return
+
+        if res is None:
+            # Compute solvent excluded surface
+            va, na, ta = surface.ses_surface_geometry(xyz, r, self.probe_radius, self.grid_spacing,
+                                                      grid_origin = origin)
         else:
             # Compute Gaussian surface
             va, na, ta, level = surface.gaussian_surface(xyz, atoms.element_numbers, res,
@@ -247,10 +354,56 @@ class MolecularSurface(Surface):
             self._vertex_to_atom = v2a
 
         self.set_geometry(va, na, ta)
+        self._geometry_calculated(xyz)
+
+        if cache is not None:
+            cache.put(key, self._cache_geometry())
+
+    def _geometry_calculated(self, xyz):
         self.triangle_mask = self._calc_triangle_mask()
         self._show_atom_patch_colors()
         self.update_selection()
-        self._atom_count = len(atoms)
+        self._atom_count = len(self.atoms)
+        self._surface_coords = xyz.copy()
+
+    def cache_key(self, xyz = None):
+        '''
+        String identifying the atom coordinates, radii and calculation
+        parameters that determine the surface shape.
+        '''
+        if xyz is None:
+            xyz = self.atom_coords()
+        atoms = self.atoms
+        res = self.resolution
+        atom_values = [xyz, atoms.radii] if res is None else [xyz, atoms.element_numbers]
+        params = ((self.probe_radius if res is None else None), self.grid_spacing, res,
+                  (self.level if res is not None else None), self.sharp_boundaries,
+                  self._refinement_steps)
+        from chimerax.surface import surface_cache_key
+        return surface_cache_key(atom_values, params)
+
+    def _cache_geometry(self):
+        g = {'vertices': self.vertices, 'normals': self.normals, 'triangles': self.triangles}
+        if self.sharp_boundaries:
+            g['vertex_to_atom'] = self._vertex_to_atom
+            g['joined_triangles'] = self._joined_triangles
+        if self.resolution is not None:
+            from numpy import array, float64
+            g['gaussian_level'] = array(self.gaussian_level, float64)
+        return g
+
+    def _set_cached_geometry(self, g):
+        if g is None:
+            return False
+        if self.resolution is not None:
+            self.gaussian_level = float(g['gaussian_level'])
+        if self.sharp_boundaries:
+            self._vertex_to_atom = g['vertex_to_atom']
+            self._vertex_to_atom_count = len(self.atoms)
+            self._joined_triangles = g.get('joined_triangles')
+        self.set_geometry(g['vertices'], g['normals'], g['triangles'])
+        self._geometry_calculated(self.atom_coords())
+        return True
 
     def _calc_triangle_mask(self):
         tmask = self._patch_display_mask(self.show_atoms)
@@ -287,26 +440,28 @@ class MolecularSurface(Surface):
         new vertex to atom map.
         '''
         if vertices is not None:
-            xyz1 = self.vertices if vertices is None else vertices
-            xyz2 = self.atom_coords()
-            radii = {'scale2':self.atoms.radii} if self.resolution is None else {}
-            max_dist = self._maximum_atom_to_surface_distance()
-            from chimerax import geometry
-            i1, i2, nearest1 = geometry.find_closest_points(xyz1, xyz2, max_dist, **radii)
-            if len(i1) < len(xyz1):
-                # TODO: For Gaussian surface should increase max_dist and try again.
-                raise RuntimeError('Surface further from atoms than expected (%g) for %d of %d atoms'
-                                   % (max_dist, len(xyz1)-len(i1), len(xyz1)))
-            from numpy import empty, int32
-            v2a = empty((len(xyz1),), int32)
-            v2a[i1] = nearest1
-            self._vertex_to_atom = v2a
+            self._vertex_to_atom = self._nearest_atoms(vertices, self.atom_coords())
             self._vertex_to_atom_count = len(self.atoms)
         elif self._vertex_to_atom is not None and len(self.atoms) < self._vertex_to_atom_count:
             # Atoms deleted
             self._vertex_to_atom = None
         return self._vertex_to_atom
 
+    def _nearest_atoms(self, vertices, atom_xyz):
+        '''Index of the atom closest to each vertex.'''
+        radii = {'scale2':self.atoms.radii} if self.resolution is None else {}
+        max_dist = self._maximum_atom_to_surface_distance()
+        from chimerax import geometry
+        i1, i2, nearest1 = geometry.find_closest_points(vertices, atom_xyz, max_dist, **radii)
+        if len(i1) < len(vertices):
+            # TODO: For Gaussian surface should increase max_dist and try again.
+            raise RuntimeError('Surface further from atoms than expected (%g) for %d of %d atoms'
+                               % (max_dist, len(vertices)-len(i1), len(vertices)))
+        from numpy import empty, int32
+        v2a = empty((len(vertices),), int32)
+        v2a[i1] = nearest1
+        return v2a
+
     def _vertices_for_atoms(self, atoms):
         if atoms is None:
             nv = len(self.vertices)
@@ -56,9 +56,12 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         segment_divisions = lod.ribbon_divisions(nres)
 
     # Accumulate ribbon information for all polymer chains.
-    geometry = TriangleAccumulator()
+    # Geometry for each chain is cached and only recomputed if it changed.
+    settings_key = _ribbon_settings_key(structure, segment_divisions)
+    cache = ribbons_drawing._polymer_geometry
+    new_cache = {}
+    polymer_geometry = []
     polyres = []
-    roffset = 0
     tethered_atoms = []
     backbone_atoms = []
 
@@ -78,7 +81,8 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
 
         # Always update all atom visibility so that undisplaying ribbon
         # will bring back previously hidden backbone atoms
-        residues.atoms.update_ribbon_backbone_atom_visibility()
+        residue_atoms = residues.atoms
+        residue_atoms.update_ribbon_backbone_atom_visibility()
 
         if len(atoms) < 2:
             continue
@@ -87,17 +91,39 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         if displays.sum() == 0:
             continue
 
+        # Use cached geometry if nothing affecting the ribbon shape changed.
+        is_helix = residues.is_helix
+        is_strand = residues.is_strand
+        ssids = residues.secondary_structure_ids
+        polymer_types = residues.polymer_types
+        orients = structure.ribbon_orients(residues)
+        tethers = structure.ribbon_tether_scale > 0
+        key = _polymer_ribbon_key(settings_key, residues.pointers, residue_atoms.pointers,
+                                  coords, guides, displays, is_helix, is_strand, ssids,
+                                  polymer_types, orients, residues.ribbon_adjusts,
+                                  residue_atoms.coords if tethers else None)
+        pg = cache.get(key)
+        if pg is not None:
+            new_cache[key] = pg
+            polymer_geometry.append(pg)
+            polyres.append(residues)
+            if pg.tethered_atoms:
+                tethered_atoms.append(pg.tethered_atoms)
+            if pg.backbone_atoms:
+                backbone_atoms.append(pg.backbone_atoms)
+            continue
+
+        geometry = TriangleAccumulator()
+
         if timing:
             t0 = time()
-            
+
         # Assign a residue class to each residue and compute the
         # ranges of secondary structures
-        is_helix = residues.is_helix
-        ssids = residues.secondary_structure_ids
         arc_helix = (structure.ribbon_mode_helix == structure.RIBBON_MODE_ARC)
         res_class, helix_ranges, sheet_ranges, display_ranges = \
-            _ribbon_ranges(is_helix, residues.is_strand, ssids, displays,
-                           residues.polymer_types, arc_helix)
+            _ribbon_ranges(is_helix, is_strand, ssids, displays,
+                           polymer_types, arc_helix)
 
         if timing:
             rangestime += time()-t0
@@ -140,8 +166,7 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         # Create spline path
         if timing:
             t1 = time()
-        orients = structure.ribbon_orients(residues)
-        flip_normals = _ribbon_flip_normals(structure, is_helix)
+        flip_normals= _ribbon_flip_normals(structure, is_helix)
         ribbon = Ribbon(coords, guides, orients, flip_normals, smooth_twist, segment_divisions,
                         structure.spline_normals)
         if timing:
@@ -166,36 +191,40 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
             t0 = time()
 
         # Get list of tethered atoms and attachment position to ribbon.
-        if structure.ribbon_tether_scale > 0:
+        t_atoms = b_atoms = None
+        if tethers:
             min_tether_offset = structure.bond_radius
             t_atoms, b_atoms = _ribbon_tethers(ribbon, residues, min_tether_offset)
             if t_atoms:
                 tethered_atoms.append(t_atoms)
             if b_atoms:
                 backbone_atoms.append(b_atoms)
-                
+
         if timing:
             tethertime += time()-t0
-        
+
+        pg = _PolymerRibbonGeometry(geometry, t_atoms, b_atoms)
+        new_cache[key] = pg
+        polymer_geometry.append(pg)
         polyres.append(residues)
 
-        roffset += len(residues)
-        geometry.set_range_offset(roffset)
+    # Drop cached geometry for chains no longer shown or changed.
+    ribbons_drawing._polymer_geometry = new_cache
 
     if timing:
         t0 = time()
-        
+
     # Set ribbon drawing geometry, colors, residue triangle ranges, and tethers
-    if not geometry.empty():
+    va, na, ta, triangle_ranges = _concatenate_polymer_geometry(polymer_geometry, polyres)
+    if ta is not None:
         # Set drawing geometry
-        va, na, ta = geometry.vertex_normal_triangle_arrays()
         ribbons_drawing.set_geometry(va, na, ta)
         # ribbons_drawing.display_style = rp.Mesh
 
         # Remember triangle ranges for each residue.
         from . import concatenate, Residues
         residues = concatenate(polyres, Residues)
-        ribbons_drawing.set_triangle_ranges(residues, geometry.triangle_ranges)
+        ribbons_drawing.set_triangle_ranges(residues, triangle_ranges)
 
         # Set colors
         ribbons_drawing.update_ribbon_colors()
@@ -219,6 +248,66 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
                  geotime, drtime, tethertime))
 
 
+def _ribbon_settings_key(structure, segment_divisions):
+    '''Structure ribbon settings that affect the shape of all chains.'''
+    xs_mgr = structure.ribbon_xs_mgr
+    xs_settings = [getattr(xs_mgr, attr) for attr in xs_mgr._SessionAttrs]
+    settings = (segment_divisions, structure.ribbon_mode_helix, structure.ribbon_mode_strand,
+                structure.spline_normals, structure.ribbon_tether_scale, structure.bond_radius,
+                xs_settings)
+    return repr(settings).encode('utf-8')
+
+def _polymer_ribbon_key(settings_key, *arrays):
+    '''Hash of ribbon settings and chain arrays that determine the chain ribbon shape.'''
+    from hashlib import sha1
+    h = sha1(settings_key)
+    from numpy import ascontiguousarray
+    for a in arrays:
+        if a is None:
+            h.update(b'None')
+        else:
+            a = ascontiguousarray(a)
+            h.update(repr(a.shape).encode('utf-8'))
+            h.update(a.tobytes())
+    return h.digest()
+
+class _PolymerRibbonGeometry:
+    '''Ribbon triangles for one polymer chain.'''
+    def __init__(self, geometry, tethered_atoms, backbone_atoms):
+        if geometry.empty():
+            self.vertices = self.normals = self.triangles = None
+        else:
+            self.vertices, self.normals, self.triangles = geometry.vertex_normal_triangle_arrays()
+        self.triangle_ranges = geometry.triangle_ranges	# Residue indices start at 0 for chain.
+        self.tethered_atoms = tethered_atoms
+        self.backbone_atoms = backbone_atoms
+
+def _concatenate_polymer_geometry(polymer_geometry, polyres):
+    '''
+    Combine chain ribbon geometry offsetting triangle vertex indices,
+    and the residue, triangle and vertex indices of the residue triangle ranges.
+    '''
+    vlist, nlist, tlist, rlist = [], [], [], []
+    voffset = toffset = roffset = 0
+    for pg, residues in zip(polymer_geometry, polyres):
+        if pg.triangles is not None:
+            vlist.append(pg.vertices)
+            nlist.append(pg.normals)
+            tlist.append(pg.triangles + voffset)
+            r = pg.triangle_ranges.copy()
+            r[:,0] += roffset
+            r[:,1:3] += toffset
+            r[:,3:5] += voffset
+            rlist.append(r)
+            voffset += len(pg.vertices)
+            toffset += len(pg.triangles)
+        roffset += len(residues)
+    if len(tlist) == 0:
+        return None, None, None, None
+    if len(tlist) == 1:
+        return vlist[0], nlist[0], tlist[0], rlist[0]
+    return concatenate(vlist), concatenate(nlist), concatenate(tlist), concatenate(rlist)
+
 def _get_polymer_spline(residues):
     '''Return a tuple of spline center and guide coordinates for a
     polymer chain.  Residues in the chain that do not have a center
@@ -574,6 +663,7 @@ class RibbonsDrawing(Drawing):
         self._triangle_ranges = None
         self._triangle_ranges_sorted = None	# Sorted ranges for first_intercept() calc
         self._residues = None			# Residues used with _triangle_ranges
+        self._polymer_geometry = {}		# Cached ribbon geometry for each chain
         
     def clear(self):
         self.set_geometry(None, None, None)
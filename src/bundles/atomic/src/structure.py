@@ -806,15 +806,11 @@ class Structure(Model, StructureData):
     def _atomspec_filter_chain(self, atoms, num_atoms, parts, attrs):
         # print("Structure._atomspec_filter_chain", num_atoms, parts, attrs)
         import numpy
-        chain_ids = atoms.residues.chain_ids
         if not parts:
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
-            selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
-            for part in parts:
-                choose = part.string_matcher(self.lower_case_chains)
-                s = numpy.vectorize(choose)(chain_ids)
-                selected = numpy.logical_or(selected, s)
+            chain_ids = atoms.residues.chain_ids
+            selected = _atomspec_names_mask(chain_ids, parts, self.lower_case_chains)
         if attrs:
             chains = self.chains
             chain_selected = numpy.ones(len(chains), dtype=numpy.bool_)
@@ -847,23 +843,20 @@ class Structure(Model, StructureData):
             # No residue specifier, choose everything
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
-            res_names = numpy.array(atoms.residues.names)
-            res_numbers = atoms.residues.numbers
-            res_ics = atoms.residues.insertion_codes
+            residues = atoms.residues
+            res_numbers = residues.numbers
+            res_ics = residues.insertion_codes
             selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
+            name_parts = []
             for part in parts:
-                choose_id = part.res_id_matcher()
-                if choose_id:
-                    s = numpy.vectorize(choose_id)(res_numbers, res_ics)
-                    if s.any():
-                        selected = numpy.logical_or(selected, s)
-                    else:
-                        choose_id = None
-                        # Try using input as name instead of number
-                if not choose_id:
-                    choose_type = part.string_matcher(False)
-                    s = numpy.vectorize(choose_type)(res_names)
-                    selected = numpy.logical_or(selected, s)
+                s = part.res_id_mask(res_numbers, res_ics)
+                if s is not None and s.any():
+                    selected |= s
+                else:
+                    # Try using input as name instead of number
+                    name_parts.append(part)
+            if name_parts:
+                selected |= _atomspec_names_mask(residues.names, name_parts, False)
         if attrs:
             selected = self._atomspec_attr_filter(atoms.residues, selected, attrs)
         # print("AtomicStructure._atomspec_filter_residue", selected)
@@ -876,12 +869,7 @@ class Structure(Model, StructureData):
             # No name specifier, use everything
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
-            names = numpy.array(atoms.names)
-            selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
-            for part in parts:
-                choose = part.string_matcher(False)
-                s = numpy.vectorize(choose)(names)
-                selected = numpy.logical_or(selected, s)
+            selected = _atomspec_names_mask(atoms.names, parts, False)
         if attrs:
             selected = self._atomspec_attr_filter(atoms, selected, attrs)
         # print("AtomicStructure._atomspec_filter_atom", selected)
@@ -2111,6 +2099,21 @@ def _selected_bond_cylinders(bonds):
         sel = None
     return sel
 
+# -----------------------------------------------------------------------------
+#
+def _atomspec_names_mask(names, parts, case_sensitive):
+    # Atom spec name matching.  Names are mapped to integer codes in a table
+    # of unique names so each part is tested once per distinct name.
+    import numpy
+    table = {}
+    codes = numpy.fromiter((table.setdefault(name, len(table)) for name in names),
+                           dtype=numpy.int32, count=len(names))
+    unique_names = list(table.keys())
+    unique_selected = numpy.zeros(len(unique_names), dtype=numpy.bool_)
+    for part in parts:
+        unique_selected |= part.string_mask(unique_names, case_sensitive)
+    return unique_selected[codes]
+
 # -----------------------------------------------------------------------------
 #
 def _has_structure_descendant(model):
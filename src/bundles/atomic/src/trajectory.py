@@ -0,0 +1,359 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Coordinate sets of a structure read on demand from a trajectory file.
+#
+# Long trajectories do not fit in memory as coordinate sets, so the structure
+# keeps a single coordinate set and the coordinates of the frame being shown
+# are copied into it.  Frames are read by a function taking a 0-based frame
+# index and recently used frames are kept in a size limited cache.
+#
+# Code that changes or reads coordinate sets by id should use the functions
+# at the end of this module so that trajectory frames are handled the same
+# as ordinary coordinate sets.
+#
+# Frames have coordinates for the atoms present when the trajectory was
+# opened.  Atoms deleted later keep their coordinate index, which is used to
+# find each remaining atom's row in the frames.  The trajectory is closed
+# when the structure is deleted.
+#
+class TrajectoryCoordsets:
+    '''
+    Trajectory frames of a structure that are read when needed.
+
+    Parameters
+    ----------
+    structure : Structure
+      Structure whose coordinates are set from the trajectory.  Its existing
+      coordinate sets are replaced by a single coordinate set.
+    num_frames : int
+      Number of frames in the trajectory.
+    read_frame : function
+      Called with a 0-based frame index, returns an N by 3 array of atom coordinates.
+    base_id : int
+      Coordinate set id of the first frame.  Frame ids are consecutive.
+    cache_size : int
+      Maximum bytes of frame coordinates to cache.
+    float32 : bool
+      Whether to cache coordinates as 32-bit floats, halving memory use.
+    close : function
+      Called with no arguments to release the trajectory file when the
+      trajectory is closed.
+    '''
+    def __init__(self, structure, num_frames, read_frame, base_id = 1,
+                 cache_size = 2**28, float32 = True, close = None):
+
+        from weakref import ref
+        self._structure_ref = ref(structure)
+        self.num_frames = num_frames
+        self._read_frame = read_frame
+        self.base_id = base_id
+        self.cache_size = cache_size
+        self.float32 = float32
+        self._close = close
+        from collections import OrderedDict
+        self._cache = OrderedDict()	# Map frame id to coordinates, LRU first.
+        self._cache_bytes = 0
+        from threading import Lock
+        self._read_lock = Lock()	# Frames may be read by a prefetch thread.
+        self.frame_id = None
+
+        # Atoms deleted from the structure can leave unused coordinate indices.
+        ci = structure.atoms.coord_indices
+        from numpy import zeros, full, arange, float64, int64
+        size = ci.max()+1 if len(ci) else 0
+        self._coord_index_rows = rows = full((size,), -1, int64)  # Frame row for each coordinate index
+        rows[ci] = arange(len(ci))
+        xyz = zeros((size, 3), float64)
+        xyz[ci] = self._frame_rows(base_id)
+        structure.remove_coordsets()
+        structure.add_coordset(base_id, xyz)
+        structure.active_coordset_id = base_id
+        self.frame_id = base_id
+        structure._trajectory = self
+        self._delete_handler = structure.triggers.add_handler('deleted', self._structure_deleted)
+
+    @property
+    def structure(self):
+        '''The structure, or None if it has been deleted.'''
+        return self._structure_ref() if self._structure_ref else None
+
+    def _structure_deleted(self, trigger_name, structure):
+        self._delete_handler = None
+        self.close()
+        from chimerax.core.triggerset import DEREGISTER
+        return DEREGISTER
+
+    def close(self):
+        '''Release the trajectory file and cached frames.'''
+        s = self.structure
+        if s is not None:
+            if getattr(s, '_trajectory', None) is self:
+                s._trajectory = None
+            if self._delete_handler is not None:
+                s.triggers.remove_handler(self._delete_handler)
+                self._delete_handler = None
+        self._structure_ref = None
+        self._cache.clear()
+        self._cache_bytes = 0
+        if self._close:
+            self._close()
+            self._close = None
+
+    @property
+    def coordset_ids(self):
+        '''Numpy array of frame ids.'''
+        from numpy import arange, int32
+        return arange(self.base_id, self.base_id + self.num_frames, dtype = int32)
+
+    def has_frame(self, frame_id):
+        return self.base_id <= frame_id < self.base_id + self.num_frames
+
+    def is_cached(self, frame_id):
+        '''Whether frame coordinates are available without reading the trajectory.'''
+        return frame_id == self.frame_id or frame_id in self._cache
+
+    def frame_coords(self, frame_id):
+        '''Return float64 coordinates for a frame of the structure's current atoms.'''
+        atoms, xyz = self._atom_coords(self._frame_rows(frame_id))
+        return xyz
+
+    def _frame_rows(self, frame_id):
+        '''Frame coordinates for the atoms present when the trajectory was opened.'''
+        if not self.has_frame(frame_id):
+            raise IndexError('No trajectory frame %d, frames are %d-%d'
+                             % (frame_id, self.base_id, self.base_id + self.num_frames - 1))
+        c = self._cache
+        if frame_id in c:
+            c.move_to_end(frame_id)
+            xyz = c[frame_id]
+        else:
+            xyz = self.read_frame(frame_id)
+            self._cache_frame(frame_id, xyz)
+        return xyz
+
+    def _atom_coords(self, frame_xyz):
+        '''
+        Return the structure's atoms and their float64 coordinates from frame rows.
+        Atoms added after the trajectory was opened keep their current coordinates.
+        '''
+        atoms = self.structure.atoms
+        ci = atoms.coord_indices
+        rmap = self._coord_index_rows
+        from numpy import full, int64, float64
+        rows = full((len(ci),), -1, int64)
+        known = ci < len(rmap)
+        rows[known] = rmap[ci[known]]
+        have = (rows >= 0)
+        if have.all():
+            xyz = frame_xyz[rows].astype(float64)
+        else:
+            xyz = atoms.coords
+            xyz[have] = frame_xyz[rows[have]]
+        return atoms, xyz
+
+    def read_frame(self, frame_id):
+        '''
+        Read frame coordinates from the trajectory without using or
+        adding to the cache.  Can be called from any thread.
+        '''
+        with self._read_lock:
+            xyz = self._read_frame(frame_id - self.base_id)
+        from numpy import float32, float64, array
+        return array(xyz, float32 if self.float32 else float64, order = 'C')
+
+    def _cache_frame(self, frame_id, xyz):
+        c = self._cache
+        c[frame_id] = xyz
+        self._cache_bytes += xyz.nbytes
+        while self._cache_bytes > self.cache_size and len(c) > 1:
+            fid, fxyz = c.popitem(last = False)
+            self._cache_bytes -= fxyz.nbytes
+
+    def set_frame(self, frame_id, coords = None):
+        '''
+        Copy the coordinates of a frame into the structure.  Coordinates
+        already read by read_frame() can be given and are added to the cache.
+        '''
+        if frame_id == self.frame_id:
+            return
+        if coords is None:
+            coords = self._frame_rows(frame_id)
+        elif frame_id not in self._cache:
+            self._cache_frame(frame_id, coords)
+        atoms, xyz = self._atom_coords(coords)
+        atoms.coords = xyz
+        self.frame_id = frame_id
+
+# -----------------------------------------------------------------------------
+# Read trajectory frames ahead of playback in a background thread.
+#
+# The player lists the frames it will show next and frames are read in that
+# order into a buffer holding a limited number of frames.  Frames no longer
+# listed, because they were shown or skipped, are dropped from the buffer.
+#
+class TrajectoryPrefetcher:
+    '''
+    Prefetch upcoming frames of a TrajectoryCoordsets.
+
+    Parameters
+    ----------
+    trajectory : TrajectoryCoordsets
+    max_frames : int
+      Maximum number of frames read ahead and buffered.
+    '''
+    def __init__(self, trajectory, max_frames = 16):
+        self.trajectory = trajectory
+        self.max_frames = max_frames
+        from threading import Condition, Thread
+        self._lock = Condition()
+        self._wanted = []		# Frame ids to read, in playback order.
+        self._buffer = {}		# Map frame id to coordinates.
+        self._failed = set()		# Frame ids that could not be read.
+        self._stop = False
+        self.read_count = 0		# Number of frames read and total read time, seconds.
+        self.read_time = 0.0
+        self._thread = t = Thread(target = self._read_frames, daemon = True)
+        t.start()
+
+    def request(self, frame_ids):
+        '''Set the frame ids that will be shown next, in order.'''
+        t = self.trajectory
+        with self._lock:
+            wanted = [f for f in frame_ids[:self.max_frames]
+                      if t.has_frame(f) and f not in self._failed]
+            self._wanted = wanted
+            keep = set(wanted)
+            for f in tuple(self._buffer.keys()):
+                if f not in keep:
+                    del self._buffer[f]
+            self._lock.notify()
+
+    def frame_coords(self, frame_id):
+        '''Return the coordinates of a frame if it has been read, otherwise None.'''
+        with self._lock:
+            return self._buffer.get(frame_id)
+
+    def read_failed(self, frame_id):
+        '''
+        Whether reading a frame raised an error.  Failed frames are not read
+        again by the prefetcher, so the caller should read the frame itself
+        to get the error.
+        '''
+        with self._lock:
+            return frame_id in self._failed
+
+    def stop(self):
+        '''Stop the reading thread.  A frame being read is discarded.'''
+        with self._lock:
+            self._stop = True
+            self._buffer.clear()
+            self._lock.notify()
+
+    @property
+    def mean_read_time(self):
+        '''Average seconds to read a frame.'''
+        with self._lock:
+            return self.read_time / self.read_count if self.read_count else 0.0
+
+    def _next_frame(self):
+        for f in self._wanted:
+            if f not in self._buffer:
+                return f
+        return None
+
+    def _read_frames(self):
+        from time import perf_counter
+        while True:
+            with self._lock:
+                while not self._stop and self._next_frame() is None:
+                    self._lock.wait()
+                if self._stop:
+                    return
+                frame_id = self._next_frame()
+            t0 = perf_counter()
+            try:
+                xyz = self.trajectory.read_frame(frame_id)
+            except Exception:
+                # Record the failure so the player reads the frame itself and reports the error.
+                with self._lock:
+                    self._failed.add(frame_id)
+                    self._wanted = [f for f in self._wanted if f != frame_id]
+                continue
+            t1 = perf_counter()
+            with self._lock:
+                self.read_count += 1
+                self.read_time += t1 - t0
+                if frame_id in self._wanted and not self._stop:
+                    self._buffer[frame_id] = xyz
+
+# -----------------------------------------------------------------------------
+#
+def structure_trajectory(structure):
+    '''Return the TrajectoryCoordsets for a structure or None.'''
+    return getattr(structure, '_trajectory', None)
+
+# -----------------------------------------------------------------------------
+#
+def coordset_ids(structure):
+    '''Coordinate set ids including trajectory frames not in memory.'''
+    t = structure_trajectory(structure)
+    return structure.coordset_ids if t is None else t.coordset_ids
+
+# -----------------------------------------------------------------------------
+#
+def active_coordset_id(structure):
+    t = structure_trajectory(structure)
+    return structure.active_coordset_id if t is None else t.frame_id
+
+# -----------------------------------------------------------------------------
+#
+def set_active_coordset_id(structure, cs_id):
+    '''
+    Show the coordinate set or trajectory frame with the given id.
+    Raises IndexError if there is no such coordinate set.
+    '''
+    t = structure_trajectory(structure)
+    if t is None:
+        structure.active_coordset_id = cs_id
+    else:
+        t.set_frame(cs_id)
+
+# -----------------------------------------------------------------------------
+#
+def coordset_coords(structure, cs_id, atoms = None):
+    '''
+    Return coordinates of atoms for a coordinate set or trajectory frame
+    without changing the displayed coordinates.  If atoms is None coordinates
+    for all atoms of the structure are returned.
+    '''
+    t = structure_trajectory(structure)
+    if t is not None:
+        xyz = t.frame_coords(cs_id)
+        if atoms is not None:
+            xyz = xyz[structure.atoms.indices(atoms)]
+        return xyz
+    if atoms is None:
+        atoms = structure.atoms
+    cs = structure.active_coordset_id
+    if cs_id == cs:
+        return atoms.coords
+    structure.active_coordset_change_notify = False
+    try:
+        structure.active_coordset_id = cs_id
+        xyz = atoms.coords
+        structure.active_coordset_id = cs
+    finally:
+        structure.active_coordset_change_notify = True
+    return xyz
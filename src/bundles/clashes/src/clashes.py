@@ -103,92 +103,253 @@ def find_clashes(session, test_atoms,
     else:
         search_atoms = test_atoms
 
-    if res_separation is not None:
-        chain_pos = {}
-        for s in test_atoms.unique_structures:
-            for c in s.chains:
-                for i, r in enumerate(c.residues):
-                    if r:
-                        chain_pos[r] = i
-    from chimerax.atom_search import AtomSearchTree
-    tree = AtomSearchTree(search_atoms, scene_coords=inter_model)
     clashes = {}
-    from chimerax.geometry import distance
-    intra_mol_map = {}
-    for a in test_atoms:
-        if distance_only:
-            cutoff = distance_only
-        else:
-            cutoff = a.radius + assumed_max_vdw - clash_threshold
-        crd = a.scene_coord if use_scene_coords else a.coord
-        nearby = tree.search(crd, cutoff)
-        if not nearby:
+    if len(test_atoms) == 0 or len(search_atoms) == 0:
+        return clashes
+
+    # Atom pairs are found and filtered as index arrays into all atoms of the
+    # structures involved, so that the per-atom Python work is only building
+    # the returned dictionary.
+    from chimerax.atomic import structure_atoms, concatenate
+    universe = structure_atoms(concatenate([test_atoms, search_atoms]).unique_structures)
+    ti = universe.indices(test_atoms)
+    si = universe.indices(search_atoms)
+    xyz = universe.scene_coords if inter_model else universe.coords
+    from numpy import float64, full
+    radii = universe.radii.astype(float64)
+    if distance_only:
+        cutoffs = full((len(ti),), distance_only, float64)
+    else:
+        cutoffs = radii[ti] + (assumed_max_vdw - clash_threshold)
+    i, j, d = _close_pairs(xyz[ti], cutoffs, xyz[si])
+    i, j = ti[i], si[j]
+
+    from numpy import unique
+    keep = (i != j)
+    structures = universe.unique_structures
+    s_index = structures.indices(universe.structures)
+    if not intra_res:
+        res_ptrs = universe.residues.pointers
+        keep &= (res_ptrs[i] != res_ptrs[j])
+    if not inter_model:
+        keep &= (s_index[i] == s_index[j])
+    if not intra_model:
+        keep &= (s_index[i] != s_index[j])
+    if not inter_submodel:
+        keep &= ~_sibling_submodels(structures)[s_index[i], s_index[j]]
+    if res_separation is not None:
+        chain, pos = _chain_positions(universe, test_atoms.unique_structures)
+        same_chain = (chain[i] == chain[j]) & (chain[i] >= 0)
+        keep &= ~(same_chain & (abs(pos[i] - pos[j]) < res_separation))
+    i, j, d = i[keep], j[keep], d[keep]
+
+    if distance_only:
+        clash = distance_only - d
+    else:
+        clash = radii[i] + radii[j] - d
+    if hbond_allowance and not distance_only:
+        # Only pairs that clash without the allowance can be affected by it.
+        maybe = clash >= clash_threshold
+        i, j, clash = i[maybe], j[maybe], clash[maybe]
+        donor, acceptor = _donors_acceptors(universe, unique((i,j)))
+        clash[(donor[i] & acceptor[j]) | (donor[j] & acceptor[i])] -= hbond_allowance
+    if distance_only:
+        keep = (clash >= 0.0)
+    else:
+        keep = (clash >= clash_threshold)
+    i, j, clash = i[keep], j[keep], clash[keep]
+
+    if bond_separation > 0 or not intra_mol:
+        n = len(universe)
+        b1, b2 = universe.intra_bonds.atoms
+        bi, bj = universe.indices(b1), universe.indices(b2)
+        keys = i.astype('int64') * n + j
+        if bond_separation > 0 and len(keys) > 0:
+            keys_sep = _bond_separated_pairs(n, bi, bj, bond_separation, unique(i))
+            from numpy import isin
+            keep = ~isin(keys, keys_sep)
+            i, j, clash, keys = i[keep], j[keep], clash[keep], keys[keep]
+        if not intra_mol:
+            mol = _connected_components(n, bi, bj)
+            keep = (mol[i] != mol[j])
+            i, j, clash = i[keep], j[keep], clash[keep]
+
+    ua, ui = unique((i,j), return_inverse = True)
+    ui = ui.reshape(2,-1)
+    atoms = universe[ua].instances()
+    for a1, a2, c in zip(ui[0], ui[1], clash.tolist()):
+        a, nb = atoms[a1], atoms[a2]
+        if a in clashes and nb in clashes[a]:
             continue
-        need_expansion = [a]
-        exclusions = set(need_expansion)
-        for i in range(bond_separation):
-            next_need = []
-            for expand in need_expansion:
-                for n in expand.neighbors:
-                    if n in exclusions:
-                        continue
-                    exclusions.add(n)
-                    next_need.append(n)
-            need_expansion = next_need
-        if not intra_mol and a not in intra_mol_map:
-            connected = set([a])
-            to_do = list(a.neighbors)
-            while to_do:
-                conn = to_do.pop()
-                connected.add(conn)
-                for nb in conn.neighbors:
-                    if nb not in connected:
-                        to_do.append(nb)
-            for ca in connected:
-                intra_mol_map[ca] = connected
-        for nb in nearby:
-            if nb in exclusions:
-                continue
-            if not intra_res and a.residue == nb.residue:
-                continue
-            if not intra_mol and nb in intra_mol_map[a]:
-                continue
-            if not inter_model and a.structure != nb.structure:
-                continue
-            if not intra_model and a.structure == nb.structure:
-                continue
-            if a in clashes and nb in clashes[a]:
-                continue
-            if res_separation is not None:
-                if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
-                    if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
-                        continue
-            if not inter_submodel \
-            and a.structure.id and nb.structure.id \
-            and a.structure.id[0] == nb.structure.id[0] \
-            and a.structure.id[:-1] == nb.structure.id[:-1] \
-            and a.structure.id[1:] != nb.structure.id[1:]:
-                continue
-            if use_scene_coords:
-                a_crd, nb_crd = a.scene_coord, nb.scene_coord
-            else:
-                a_crd, nb_crd = a.coord, nb.coord
-            if distance_only:
-                clash = distance_only - distance(a_crd, nb_crd)
-            else:
-                clash = a.radius + nb.radius - distance(a_crd, nb_crd)
-            if hbond_allowance and not distance_only:
-                if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
-                    clash -= hbond_allowance
-            if distance_only:
-                if clash < 0.0:
-                    continue
-            elif clash < clash_threshold:
-                continue
-            clashes.setdefault(a, {})[nb] = clash
-            clashes.setdefault(nb, {})[a] = clash
+        clashes.setdefault(a, {})[nb] = c
+        clashes.setdefault(nb, {})[a] = c
     return clashes
 
+def _close_pairs(xyz1, cutoffs, xyz2, chunk_size = 8192):
+    """Find pairs of points from two sets that are within a distance of each other.
+       The distance is given per point of the first set.  Uses a grid of cells
+       the size of the largest distance, comparing points in neighboring cells.
+       Returns the first set indices, second set indices and the distances.
+    """
+    from numpy import empty, int64, float32, floor, concatenate, argsort, \
+        searchsorted, repeat, arange, cumsum, sqrt
+    if len(xyz1) == 0 or len(xyz2) == 0 or cutoffs.max() <= 0:
+        return empty((0,), int64), empty((0,), int64), empty((0,), float32)
+    size = float(cutoffs.max())
+    origin = concatenate((xyz1.min(axis=0), xyz2.min(axis=0))).reshape(2,3).min(axis=0)
+    # Cell indices offset by one so neighbor cell indices are never negative.
+    c1 = floor((xyz1 - origin) / size).astype(int64) + 1
+    c2 = floor((xyz2 - origin) / size).astype(int64) + 1
+    ny, nz = max(c1[:,1].max(), c2[:,1].max()) + 2, max(c1[:,2].max(), c2[:,2].max()) + 2
+    k1 = (c1[:,0]*ny + c1[:,1])*nz + c1[:,2]
+    k2 = (c2[:,0]*ny + c2[:,1])*nz + c2[:,2]
+    order = argsort(k2, kind = 'stable')
+    k2 = k2[order]
+    offsets = [(dx*ny + dy)*nz + dz for dx in (-1,0,1) for dy in (-1,0,1) for dz in (-1,0,1)]
+
+    il, jl, dl = [], [], []
+    for s in range(0, len(xyz1), chunk_size):
+        kc = k1[s:s+chunk_size]
+        for o in offsets:
+            start = searchsorted(k2, kc + o, 'left')
+            count = searchsorted(k2, kc + o, 'right') - start
+            total = count.sum()
+            if total == 0:
+                continue
+            i = repeat(arange(s, s + len(kc)), count)
+            first = cumsum(count) - count
+            j = order[repeat(start - first, count) + arange(total)]
+            d = sqrt(((xyz1[i] - xyz2[j])**2).sum(axis = 1))
+            close = (d <= cutoffs[i])
+            il.append(i[close])
+            jl.append(j[close])
+            dl.append(d[close])
+    if len(il) == 0:
+        return empty((0,), int64), empty((0,), int64), empty((0,), float32)
+    return concatenate(il), concatenate(jl), concatenate(dl)
+
+def _bond_separated_pairs(n, bi, bj, separation, starts):
+    """Return sorted keys i*n+j of atom index pairs at most 'separation' bonds apart
+       where i is one of the sorted 'starts' atom indices."""
+    from numpy import concatenate, argsort, unique, searchsorted, repeat, arange, cumsum, \
+        int64, isin
+    src = concatenate((bi, bj)).astype(int64)
+    dst = concatenate((bj, bi)).astype(int64)
+    order = argsort(src, kind = 'stable')
+    src, dst = src[order], dst[order]
+    first_bonds = isin(src, starts)
+    pairs = unique(src[first_bonds] * n + dst[first_bonds])
+    reached = pairs
+    for step in range(separation - 1):
+        # Extend each path by one bond from its end atom.
+        ends = reached % n
+        start = searchsorted(src, ends, 'left')
+        count = searchsorted(src, ends, 'right') - start
+        total = count.sum()
+        first = cumsum(count) - count
+        nbrs = dst[repeat(start - first, count) + arange(total)]
+        reached = unique(repeat(reached // n, count) * n + nbrs)
+        pairs = unique(concatenate((pairs, reached)))
+    return pairs
+
+def _connected_components(n, bi, bj):
+    """Label atoms by covalently connected fragment using bond index arrays."""
+    from numpy import arange, minimum, maximum
+    labels = arange(n)
+    while True:
+        li, lj = labels[bi], labels[bj]
+        differ = (li != lj)
+        if not differ.any():
+            return labels
+        li, lj = li[differ], lj[differ]
+        # Attach larger root labels to smaller ones, then compress paths.
+        minimum.at(labels, maximum(li, lj), minimum(li, lj))
+        while True:
+            jump = labels[labels]
+            if (jump == labels).all():
+                break
+            labels = jump
+
+def _sibling_submodels(structures):
+    """Boolean matrix for structure pairs that are different submodels of one model."""
+    from numpy import zeros
+    ns = len(structures)
+    sib = zeros((ns, ns), bool)
+    ids = [s.id for s in structures]
+    for k1, id1 in enumerate(ids):
+        for k2, id2 in enumerate(ids):
+            if id1 and id2 and id1[0] == id2[0] and id1[:-1] == id2[:-1] and id1[1:] != id2[1:]:
+                sib[k1,k2] = True
+    return sib
+
+def _chain_positions(atoms, structures):
+    """Return per-atom chain number (-1 if not in a chain) and position in chain."""
+    from numpy import full, array, int64, argsort, searchsorted, minimum
+    res_ptrs, res_chain, res_pos = [], [], []
+    chain_num = 0
+    for s in structures:
+        for c in s.chains:
+            for i, r in enumerate(c.residues):
+                if r:
+                    res_ptrs.append(r.cpp_pointer)
+                    res_chain.append(chain_num)
+                    res_pos.append(i)
+            chain_num += 1
+    chain = full((len(atoms),), -1, int64)
+    pos = full((len(atoms),), 0, int64)
+    if res_ptrs:
+        from chimerax.atomic.molc import cptr
+        res_ptrs = array(res_ptrs, cptr)
+        order = argsort(res_ptrs)
+        res_ptrs = res_ptrs[order]
+        aptrs = atoms.residues.pointers
+        k = minimum(searchsorted(res_ptrs, aptrs), len(res_ptrs) - 1)
+        found = (res_ptrs[k] == aptrs)
+        chain[found] = array(res_chain)[order][k[found]]
+        pos[found] = array(res_pos)[order][k[found]]
+    return chain, pos
+
+def _donors_acceptors(atoms, indices):
+    """Boolean arrays over all atoms marking hydrogen bond donors and acceptors
+       among the atoms with the given indices, using the same criteria as
+       _donor() and _acceptor().
+    """
+    from numpy import zeros, array, isin, unique
+    n = len(atoms)
+    donor, acceptor = zeros((n,), bool), zeros((n,), bool)
+    if len(indices) == 0:
+        return donor, acceptor
+    sub = atoms[indices]
+    types, tinv = unique(sub.idatm_types, return_inverse = True)
+    subst = array([type_info[t].substituents if t in type_info else -1 for t in types])[tinv]
+    geom = array([type_info[t].geometry if t in type_info else -1 for t in types])[tinv]
+    acceptor[indices] = (subst >= 0) & (subst < geom)
+
+    elements = atoms.element_numbers
+    is_neg = isin(elements, [e.number for e in negative])
+    is_hyd = (elements == hyd.number)
+    num_bonds = atoms.num_bonds
+    b1, b2 = atoms.intra_bonds.atoms
+    bi, bj = atoms.indices(b1), atoms.indices(b2)
+    # Negative atoms with a bonded hydrogen, hydrogens bonded to negative atoms.
+    neg_with_h = zeros((n,), bool)
+    neg_with_h[bi[is_hyd[bj]]] = True
+    neg_with_h[bj[is_hyd[bi]]] = True
+    h_on_neg = zeros((n,), bool)
+    h_on_neg[bi[is_neg[bj]]] = True
+    h_on_neg[bj[is_neg[bi]]] = True
+    d = zeros((len(indices),), bool)
+    sh = is_hyd[indices]
+    d[sh] = h_on_neg[indices[sh]]
+    sn = is_neg[indices]
+    implicit_h = (subst >= 0) & (num_bonds[indices] < subst)
+    d[sn] = implicit_h[sn] | neg_with_h[indices[sn]]
+    donor[indices] = d
+    # Hydrogens with several bonds are judged by their first neighbor.
+    for k in (indices[sh & (num_bonds[indices] > 1)]):
+        donor[k] = _donor(atoms[k])
+    return donor, acceptor
+
 from chimerax.atomic import Element
 hyd = Element.get_element(1)
 negative = set([Element.get_element(sym) for sym in ["N", "O", "S"]])
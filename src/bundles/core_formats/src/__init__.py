@@ -83,6 +83,7 @@ class _SessionAPI(BundleAPI):
                         from chimerax.core.commands import BoolArg, IntArg, EnumOf
                         return {
                             'include_maps': BoolArg,
+                            'map_references': EnumOf(('path', 'hash')),
                             'compress': EnumOf(('lz4', 'gzip', 'none')),
                             'version': IntArg,
                         }
@@ -16,9 +16,11 @@ from chimerax.add_charge import ChargeMethodArg
 
 def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4, spacing=1.0,
         padding=5.0, map=False, palette=None, range=None, dist_dep=True, dielectric=4.0,
-        charge_method=ChargeMethodArg.default_value):
-    if map:
-        session.logger.warning("Computing electrostatic volume map not yet supported")
+        charge_method=ChargeMethodArg.default_value, cutoff=None):
+    if cutoff is not None and cutoff <= 0:
+        raise UserError("Cutoff must be positive")
+    if map and not 0.1 <= spacing <= 10.0:
+        raise UserError("Map spacing must be between 0.1 and 10 Angstroms")
     session.logger.status("Computing Coulombic potential%s" % (" map" if map else ""))
     if palette is None:
         from chimerax.core.colors import BuiltinColormaps
@@ -119,15 +121,12 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
                 target_points = target_surface.vertices
             else:
                 target_points = target_surface.vertices + offset * target_surface.normals
-            import numpy, os
-            # Make sure _esp can runtime link shared library libarrays.
-            from chimerax import arrays ; arrays.load_libarrays()
-            from ._esp import potential_at_points
-            cpu_count = os.cpu_count()
+            import numpy
+            charges = numpy.array([a.charge for a in charged_atoms], dtype=numpy.float32)
+            from .potential import potential_at_points
             vertex_values = potential_at_points(
                 target_surface.scene_position.transform_points(target_points), charged_atoms.scene_coords,
-                numpy.array([a.charge for a in charged_atoms], dtype=numpy.double), dist_dep, dielectric,
-                1 if cpu_count is None else cpu_count)
+                charges, dist_dep, dielectric, cutoff = cutoff)
             rgba = cmap.interpolated_rgba(vertex_values)
             from numpy import uint8, amin, mean, amax
             rgba8 = (255*rgba).astype(uint8)
@@ -135,17 +134,40 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
             undo_new_vals.append(rgba8)
             session.logger.info("Coulombic values for %s: minimum, %.2f, mean %.2f, maximum %.2f"
                 % (target_surface, amin(vertex_values), mean(vertex_values), amax(vertex_values)))
+            if map:
+                session.logger.status("Computing electrostatics map", secondary=True)
+                coulombic_map(session, charged_atoms, charges, target_surface, offset, spacing,
+                    padding, dist_dep, dielectric, cutoff, "coulombic " + target_surface.name)
     undo_state.add(undo_owners, "vertex_colors", undo_old_vals, undo_new_vals, option="S")
     session.undo.register(undo_state)
 
     session.logger.status("", secondary=True)
     session.logger.status("Finished computing Coulombic potential%s" % (" map" if map else ""))
 
-"""
-def coulombic_map(session, charged_atoms, target_surface, offset, spacing, padding, vol_name):
-    data, bounds = calculate_map(target_surface, charged_atoms, spacing, offset + padding)
-    #TODO
-"""
+def coulombic_map(session, charged_atoms, charges, target_surface, offset, spacing, padding,
+        dist_dep, dielectric, cutoff, vol_name):
+    # Grid covers the surface, plus the offset and padding, in scene coordinates.
+    vertices = target_surface.vertices
+    if vertices is None or len(vertices) == 0:
+        xyz = charged_atoms.scene_coords
+    else:
+        xyz = target_surface.scene_position.transform_points(vertices)
+    pad = offset + padding
+    xyz_min, xyz_max = xyz.min(axis=0) - pad, xyz.max(axis=0) + pad
+    import numpy
+    size = [int(s) for s in numpy.ceil((xyz_max - xyz_min) / spacing) + 1]
+    origin = tuple(float(x) for x in xyz_min)
+    from .potential import potential_grid
+    data = potential_grid(charged_atoms.scene_coords, charges, origin, spacing, size,
+        dist_dep, dielectric, cutoff=cutoff)
+    from chimerax.map_data import ArrayGridData
+    g = ArrayGridData(data, origin, (spacing, spacing, spacing), name=vol_name)
+    g.polar_values = True
+    from chimerax.map import volume_from_grid_data
+    v = volume_from_grid_data(g, session)
+    v.update_drawings()  # Compute surface levels
+    v.set_parameters(surface_colors = [(1, 0, 0, 1), (0, 0, 1, 1)])
+    return v
 
 def register_command(logger):
     from chimerax.core.commands import CmdDesc, register, Or, EmptyArg, SurfacesArg, EnumOf, FloatArg
@@ -162,9 +184,10 @@ def register_command(logger):
             ('map', BoolArg),
             ('palette', ColormapArg),
             ('range', ColormapRangeArg),
-            ('disp_dep', BoolArg),
+            ('dist_dep', BoolArg),
             ('dielectric', FloatArg),
             ('charge_method', ChargeMethodArg),
+            ('cutoff', FloatArg),
         ],
         synopsis = 'Color surfaces by coulombic potential'
     )
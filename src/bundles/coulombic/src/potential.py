@@ -0,0 +1,233 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Coulomb's law constant giving potential in kcal/(mol*e) for distances in Angstroms.
+COULOMB_CONSTANT = 331.62
+
+# Maximum number of point-atom pairs computed at once by each thread,
+# which limits temporary memory use to about 50 Mbytes per thread.
+PAIRS_PER_BLOCK = 2**20
+
+def potential_at_points(points, atom_xyz, charges, dist_dep = True, dielectric = 4.0,
+                        cutoff = None, threads = None):
+    '''
+    Return float32 array of Coulombic potential at points.
+
+    Parameters
+    ----------
+    points : N by 3 float array
+      Positions where potential is computed, in the same coordinate system as atom_xyz.
+    atom_xyz : M by 3 float array
+    charges : length M float array
+    dist_dep : bool
+      Whether the dielectric is proportional to distance (dielectric * r).
+    dielectric : float
+    cutoff : float or None
+      If None all atom charges are summed exactly.  Otherwise only atoms
+      within about cutoff distance of a point are summed exactly, and more
+      distant atoms contribute through the net charge and dipole of the cubic
+      cell of size cutoff/2 they lie in.  This is much faster for large assemblies.
+    threads : int or None
+      Number of threads used.  Default is the number of cores.
+    '''
+    from numpy import asarray, ascontiguousarray, float32, zeros
+    points = ascontiguousarray(points, float32)
+    atom_xyz = ascontiguousarray(atom_xyz, float32)
+    charges = ascontiguousarray(charges, float32)
+    if len(atom_xyz) != len(charges):
+        raise ValueError('Number of atoms (%d) differs from number of charges (%d)'
+                         % (len(atom_xyz), len(charges)))
+    if threads is None:
+        from os import cpu_count
+        threads = cpu_count() or 1
+
+    if len(points) == 0 or len(atom_xyz) == 0:
+        return zeros((len(points),), float32)
+
+    if cutoff is None:
+        try:
+            # Make sure _esp can runtime link shared library libarrays.
+            from chimerax import arrays ; arrays.load_libarrays()
+            from ._esp import potential_at_points as esp_sum
+        except ImportError:
+            esp_sum = _esp_sum
+        values = esp_sum(points, atom_xyz, charges, dist_dep, dielectric, threads)
+    else:
+        values = _cutoff_potential(points, atom_xyz, charges, dist_dep, dielectric,
+                                   cutoff, threads)
+    return asarray(values, float32)
+
+def _esp_sum(points, atom_xyz, charges, dist_dep, dielectric, threads):
+    '''
+    Python version of C++ potential_at_points() in _esp.  Points are
+    split into chunks computed on separate threads.
+    '''
+    from numpy import zeros, float32
+    values = zeros((len(points),), float32)
+    chunk = max(1, -(-len(points) // (4*threads)))
+    args = [(points[i:i+chunk], atom_xyz, charges, dist_dep, values[i:i+chunk])
+            for i in range(0, len(points), chunk)]
+    from chimerax.core.threadq import apply_to_list
+    apply_to_list(_charge_sum, args, threads)
+    values *= COULOMB_CONSTANT / dielectric
+    return values
+
+def _charge_sum(points, atom_xyz, charges, dist_dep, values):
+    '''
+    Add sum of charge / distance (or distance squared if dist_dep) to values,
+    computing blocks of atoms at a time so memory use is limited.  Squared
+    distances are computed as |p|^2 + |a|^2 - 2 p.a using matrix multiplication,
+    with coordinates relative to the center of the points to limit round-off.
+    '''
+    from numpy import sqrt, divide, maximum
+    center = points.mean(axis = 0)
+    p = points - center
+    a = atom_xyz - center
+    pp = (p*p).sum(axis = 1)[:,None]
+    aa = (a*a).sum(axis = 1)
+    block = max(1, PAIRS_PER_BLOCK // len(points))
+    for a0 in range(0, len(a), block):
+        r = p @ (-2 * a[a0:a0+block].T)
+        r += pp
+        r += aa[a0:a0+block]
+        maximum(r, 1e-6, out = r)	# Round-off can make r slightly negative when point is at an atom.
+        if not dist_dep:
+            sqrt(r, out = r)
+        divide(1, r, out = r)
+        values += r @ charges[a0:a0+block]
+
+# -----------------------------------------------------------------------------
+# Potential summing nearby atoms exactly and approximating far atoms using
+# cubic cells of size cutoff/2.  Atoms in the 5 by 5 by 5 block of cells
+# around the cell containing a point are summed exactly.  The potential from
+# the net charge and dipole of each other cell is computed at the center of
+# each cell containing points, along with its gradient, and interpolated
+# linearly to the points in that cell.
+#
+_NEAR_CELLS = 2
+
+def _cutoff_potential(points, atom_xyz, charges, dist_dep, dielectric, cutoff, threads):
+    from numpy import floor, int32, minimum, zeros, float32, concatenate
+    size = 0.5*cutoff
+    origin = minimum(points.min(axis = 0), atom_xyz.min(axis = 0))
+    acells, ainverse, agroups = _cell_groups(floor((atom_xyz - origin) / size).astype(int32))
+    pcells, pinverse, pgroups = _cell_groups(floor((points - origin) / size).astype(int32))
+    acenters, net_charge, dipole = _cell_multipoles(atom_xyz, charges, ainverse, len(acells))
+    pcenters = (origin + (pcells + 0.5) * size).astype(float32)
+
+    # Far field at centers of cells containing points.
+    k = 2 if dist_dep else 1
+    phi = zeros((len(pcells),), float32)
+    grad = zeros((len(pcells),3), float32)
+    chunk = max(1, PAIRS_PER_BLOCK // len(acells))
+    args = [(pcells[i:i+chunk], pcenters[i:i+chunk], acells, acenters, net_charge, dipole, k,
+             phi[i:i+chunk], grad[i:i+chunk]) for i in range(0, len(pcells), chunk)]
+    from chimerax.core.threadq import apply_to_list
+    apply_to_list(_far_field, args, threads)
+    offsets = points - pcenters[pinverse]
+    values = phi[pinverse] + (offsets * grad[pinverse]).sum(axis = 1)
+
+    # Near atoms summed exactly.  Each cell of points updates different values.
+    atom_groups = {tuple(c):g for c,g in zip(acells.tolist(), agroups)}
+    n = _NEAR_CELLS
+    offsets = [(i,j,k) for i in range(-n,n+1) for j in range(-n,n+1) for k in range(-n,n+1)]
+    args = []
+    for (i,j,k), pi in zip(pcells.tolist(), pgroups):
+        near = [atom_groups[c] for c in ((i+di,j+dj,k+dk) for di,dj,dk in offsets)
+                if c in atom_groups]
+        if near:
+            args.append((points, atom_xyz, charges, dist_dep, values, pi, concatenate(near)))
+    apply_to_list(_near_sum, args, threads)
+
+    values *= COULOMB_CONSTANT / dielectric
+    return values
+
+def _near_sum(points, atom_xyz, charges, dist_dep, values, point_indices, atom_indices):
+    from numpy import zeros, float32
+    v = zeros((len(point_indices),), float32)
+    _charge_sum(points[point_indices], atom_xyz[atom_indices], charges[atom_indices], dist_dep, v)
+    values[point_indices] += v
+
+def _cell_groups(cell_indices):
+    '''Return unique cells, index of cell for each point, and list of point indices in each cell.'''
+    from numpy import unique, argsort, cumsum, bincount, split
+    cells, inverse = unique(cell_indices, axis = 0, return_inverse = True)
+    inverse = inverse.ravel()
+    order = argsort(inverse, kind = 'stable')
+    groups = split(order, cumsum(bincount(inverse))[:-1])
+    return cells, inverse, groups
+
+def _cell_multipoles(atom_xyz, charges, cell_index, ncells):
+    '''Return center of atoms, net charge, and dipole about center for each cell.'''
+    from numpy import bincount, empty, float32
+    count = bincount(cell_index, minlength = ncells)
+    centers = empty((ncells,3), float32)
+    for a in (0,1,2):
+        centers[:,a] = bincount(cell_index, atom_xyz[:,a], minlength = ncells) / count
+    net_charge = bincount(cell_index, charges, minlength = ncells).astype(float32)
+    d = charges[:,None] * (atom_xyz - centers[cell_index])
+    dipole = empty((ncells,3), float32)
+    for a in (0,1,2):
+        dipole[:,a] = bincount(cell_index, d[:,a], minlength = ncells)
+    return centers, net_charge, dipole
+
+def _far_field(pcells, pcenters, acells, acenters, net_charge, dipole, k, phi, grad):
+    '''
+    Potential and gradient at pcenters from cells further than _NEAR_CELLS
+    away using the expansion q/|r-d|^k ~ q/r^k + k*q*(r.d)/r^(k+2).
+    Sums over cells use matrix multiplication with r = pcenter - acenter
+    expanded, for example r.d = pcenter.d - acenter.d.
+    '''
+    from numpy import absolute, sqrt
+    near = None
+    for a in (0,1,2):
+        na = (absolute(pcells[:,a,None] - acells[None,:,a]) <= _NEAR_CELLS)
+        near = na if near is None else (near & na)
+    center = pcenters.mean(axis = 0)
+    pc, ac = pcenters - center, acenters - center
+    inv2 = pc @ (-2 * ac.T)
+    inv2 += (pc*pc).sum(axis = 1)[:,None]
+    inv2 += (ac*ac).sum(axis = 1)
+    inv2[near] = 1
+    inv2 = 1 / inv2
+    inv2[near] = 0
+    invk = inv2 if k == 2 else sqrt(inv2)
+    invk2 = invk * inv2
+    rp = pc @ dipole.T
+    rp -= (ac*dipole).sum(axis = 1)
+    phi[:] = invk @ net_charge + k * (rp * invk2).sum(axis = 1)
+    g = -k * (net_charge * invk2 + (k+2) * rp * invk2 * inv2)
+    grad[:] = pc * g.sum(axis = 1)[:,None] - g @ ac + k * (invk2 @ dipole)
+
+# -----------------------------------------------------------------------------
+#
+def potential_grid(atom_xyz, charges, origin, step, size, dist_dep = True, dielectric = 4.0,
+                   cutoff = None, threads = None):
+    '''
+    Return 3-d float32 array of potential with z,y,x index order on a grid with
+    given origin, step (a single spacing) and size (x,y,z grid point counts).
+    Computed a few z planes at a time to limit memory use.
+    '''
+    from numpy import empty, float32, indices
+    xs, ys, zs = size
+    values = empty((zs, ys, xs), float32)
+    planes = max(1, 2**20 // (xs*ys))
+    for k0 in range(0, zs, planes):
+        k1 = min(zs, k0 + planes)
+        kji = indices((k1-k0, ys, xs), dtype = float32).reshape((3,-1)).T
+        points = origin + step * kji[:,::-1]
+        points[:,2] += k0 * step
+        v = potential_at_points(points, atom_xyz, charges, dist_dep, dielectric,
+                                cutoff = cutoff, threads = threads)
+        values[k0:k1] = v.reshape((k1-k0, ys, xs))
+    return values
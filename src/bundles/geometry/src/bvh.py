@@ -0,0 +1,230 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Bounding volume hierarchy of triangles to speed up picking large surfaces.
+#
+# Triangles are sorted along a Morton (z-order) curve through their centers
+# and consecutive runs of leaf_size triangles form the leaves of a complete
+# binary tree of axis aligned bounding boxes.  The tree is stored as one
+# array of box corners per level so building and searching it only use
+# numpy operations on whole levels.
+#
+class TriangleBVH:
+    '''
+    Bounding box hierarchy for a subset of the triangles of a surface.
+
+    Parameters
+    ----------
+    vertices : N by 3 float array
+    triangles : M by 3 int array
+    triangle_subset : 1d int array or None
+      Indices of the triangles to include, for example the displayed
+      triangles.  If None all triangles are included.
+    leaf_size : int
+      Number of triangles per leaf box.
+    '''
+    def __init__(self, vertices, triangles, triangle_subset = None, leaf_size = 64):
+
+        from numpy import arange, int32, float32, minimum, maximum, empty, inf
+        if triangle_subset is None:
+            triangle_subset = arange(len(triangles), dtype = int32)
+        self.leaf_size = leaf_size
+        n = len(triangle_subset)
+        self.triangle_count = n
+
+        t = triangles[triangle_subset]
+        v0, v1, v2 = (vertices[t[:,a]].astype(float32, copy = False) for a in (0,1,2))
+        tmin = minimum(minimum(v0, v1), v2)
+        tmax = maximum(maximum(v0, v1), v2)
+        del t, v0, v1, v2
+
+        # Sort triangles along a space filling curve so nearby triangles are in the same leaf.
+        order = _morton_order(0.5*(tmin + tmax)).astype(int32)
+        self._order = order				# Index into triangle subset
+        self._triangles = triangle_subset[order]	# Index into all triangles
+        tmin, tmax = tmin[order], tmax[order]
+
+        # Leaf boxes, padded with empty boxes to a power of 2 leaves.
+        nleaf = max(1, (n + leaf_size - 1) // leaf_size)
+        depth = max(1, (nleaf-1).bit_length() + 1)
+        nleaf_padded = 2**(depth-1)
+        bmin = empty((nleaf_padded, 3), float32)
+        bmax = empty((nleaf_padded, 3), float32)
+        bmin[:] = inf
+        bmax[:] = -inf
+        if n > 0:
+            starts = arange(0, n, leaf_size)
+            bmin[:nleaf] = minimum.reduceat(tmin, starts, axis = 0)
+            bmax[:nleaf] = maximum.reduceat(tmax, starts, axis = 0)
+
+        # Parent boxes enclose pairs of children.
+        levels = [(bmin, bmax)]
+        while len(bmin) > 1:
+            bmin = minimum(bmin[0::2], bmin[1::2])
+            bmax = maximum(bmax[0::2], bmax[1::2])
+            levels.append((bmin, bmax))
+        levels.reverse()
+        self._levels = levels	# Root level first.
+
+    def _leaf_range(self, level, nodes):
+        '''Range of sorted triangle positions below nodes at a level.'''
+        leaves_per_node = 2**(len(self._levels) - 1 - level)
+        ls = self.leaf_size * leaves_per_node
+        start = nodes * ls
+        from numpy import minimum
+        end = minimum(start + ls, self.triangle_count)
+        return start, end
+
+    def segment_intercept(self, vertices, triangles, xyz1, xyz2):
+        '''
+        Find the first triangle intercepted by a line segment.  The vertices
+        and triangles arrays must be the ones used to build the hierarchy.
+        Returns the fraction (0-1) along the segment and the index of the
+        triangle in the triangle subset, or None, None if there is no intercept.
+        '''
+        from numpy import array, float64, int64, concatenate, arange
+        p1, p2 = array(xyz1, float64), array(xyz2, float64)
+        nodes = array([0], int64)
+        nlev = len(self._levels)
+        for level, (bmin, bmax) in enumerate(self._levels):
+            hit, tnear = _segment_hits_boxes(bmin[nodes], bmax[nodes], p1, p2)
+            nodes, tnear = nodes[hit], tnear[hit]
+            if len(nodes) == 0:
+                return None, None
+            if level < nlev-1:
+                nodes = (2*nodes[:,None] + array((0,1))).ravel()
+
+        # Check leaves in order of distance along segment, stopping
+        # when the remaining leaves are further than the closest intercept.
+        leaf_order = tnear.argsort()
+        nodes, tnear = nodes[leaf_order], tnear[leaf_order]
+        starts, ends = self._leaf_range(nlev-1, nodes)
+        from chimerax.geometry import closest_triangle_intercept
+        fmin = tmin = None
+        batch = 8
+        for b in range(0, len(nodes), batch):
+            if fmin is not None and tnear[b] > fmin:
+                break
+            pos = concatenate([arange(s, e, dtype = int64)
+                               for s,e in zip(starts[b:b+batch], ends[b:b+batch])])
+            f, t = closest_triangle_intercept(vertices, triangles[self._triangles[pos]], p1, p2)
+            if f is not None and (fmin is None or f < fmin):
+                fmin, tmin = f, int(self._order[pos[t]])
+        return fmin, tmin
+
+    def triangles_within_planes(self, vertices, triangles, planes):
+        '''
+        Return indices into the full triangles array of the triangles in the
+        hierarchy having at least one vertex on the positive side of all of the
+        planes.  Each plane is a 4-vector v with v0*x + v1*y + v2*z + v3 >= 0.
+        '''
+        from numpy import array, int64, concatenate, zeros, unique, searchsorted
+        planes = array(planes).reshape((-1,4))
+        nodes = array([0], int64)
+        inside = []
+        nlev = len(self._levels)
+        for level, (bmin, bmax) in enumerate(self._levels):
+            out, all_in = _boxes_and_planes(bmin[nodes], bmax[nodes], planes)
+            if all_in.any():
+                inside.append(self._leaf_range(level, nodes[all_in]))
+            nodes = nodes[~(out | all_in)]
+            if len(nodes) == 0:
+                break
+            if level < nlev-1:
+                nodes = (2*nodes[:,None] + array((0,1))).ravel()
+
+        tlist = [self._triangles[s:e] for starts, ends in inside
+                 for s, e in zip(starts, ends)]
+        if len(nodes) > 0:
+            # Test vertices of triangles in leaves that cross a plane.
+            starts, ends = self._leaf_range(nlev-1, nodes)
+            t = concatenate([self._triangles[s:e] for s, e in zip(starts, ends)])
+            ta = triangles[t]
+            vi = unique(ta)
+            from chimerax.geometry import points_within_planes
+            vmask = points_within_planes(vertices[vi], planes)
+            tmask = vmask[searchsorted(vi, ta)].any(axis = 1)
+            tlist.append(t[tmask])
+        if len(tlist) == 0:
+            from numpy import int32
+            return zeros((0,), int32)
+        return concatenate(tlist)
+
+# -----------------------------------------------------------------------------
+# Return mask of boxes hit by a line segment and the fraction along the
+# segment where the segment enters each box.
+#
+def _segment_hits_boxes(bmin, bmax, p1, p2):
+    from numpy import errstate, minimum, maximum, inf, where
+    d = p2 - p1
+    with errstate(divide = 'ignore', invalid = 'ignore'):
+        t0 = (bmin - p1) / d
+        t1 = (bmax - p1) / d
+        lo, hi = minimum(t0, t1), maximum(t0, t1)
+    # Segment parallel to an axis does not limit the fraction along that axis
+    # if it is between the box faces, otherwise misses the box.
+    for a in (0,1,2):
+        if d[a] == 0:
+            between = (bmin[:,a] <= p1[a]) & (p1[a] <= bmax[:,a])
+            lo[:,a] = where(between, -inf, inf)
+            hi[:,a] = where(between, inf, -inf)
+    tnear = lo.max(axis = 1)
+    tfar = hi.min(axis = 1)
+    eps = 1e-5
+    hit = (tnear <= tfar + eps) & (tfar >= -eps) & (tnear <= 1 + eps)
+    return hit, maximum(tnear, 0)
+
+# -----------------------------------------------------------------------------
+# Return masks of boxes entirely outside some plane and entirely inside all planes.
+#
+def _boxes_and_planes(bmin, bmax, planes):
+    from numpy import ones, isfinite, errstate
+    with errstate(invalid = 'ignore'):
+        center = 0.5*(bmin + bmax)
+        half = 0.5*(bmax - bmin)
+        out = ~isfinite(center).all(axis = 1)	# Empty padding boxes
+        all_in = ones((len(bmin),), bool)
+        for p in planes:
+            c = center @ p[:3] + p[3]
+            r = half @ abs(p[:3])
+            out |= (c + r < 0)
+            all_in &= (c - r >= 0)
+    all_in &= ~out
+    return out, all_in
+
+# -----------------------------------------------------------------------------
+# Order points along a Morton z-order curve through their bounding box.
+#
+def _morton_order(xyz):
+    from numpy import uint32, zeros
+    if len(xyz) == 0:
+        return zeros((0,), uint32)
+    xyz_min = xyz.min(axis = 0)
+    size = (xyz.max(axis = 0) - xyz_min).max()
+    scale = 1023.0 / size if size > 0 else 0
+    q = ((xyz - xyz_min) * scale).astype(uint32)
+    code = zeros((len(xyz),), uint32)
+    for a in (0,1,2):
+        code |= _spread_bits(q[:,a]) << uint32(a)
+    return code.argsort()
+
+def _spread_bits(x):
+    '''Insert two zero bits between each of the low 10 bits.'''
+    from numpy import uint32
+    x = x & uint32(0x3ff)
+    x = (x | (x << uint32(16))) & uint32(0x30000ff)
+    x = (x | (x << uint32(8))) & uint32(0x300f00f)
+    x = (x | (x << uint32(4))) & uint32(0x30c30c3)
+    x = (x | (x << uint32(2))) & uint32(0x9249249)
+    return x
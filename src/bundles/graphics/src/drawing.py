@@ -82,6 +82,7 @@ class Drawing:
 
         self._cached_geometry_bounds = None	# Triangles, positions not included. Local coords.
         self._cached_position_bounds = None	# Triangles including positions, children not included. Scene coords.
+        self._triangle_bvh = None		# Bounding box tree of displayed triangles for picking. Local coords.
 
         # Geometry and colors
         self._vertices = None		# N x 3 float32 numpy array
@@ -246,6 +247,7 @@ class Drawing:
             if sc:
                 self._cached_geometry_bounds = None
                 self._cached_position_bounds = None
+                self._triangle_bvh = None
             else:
                 sc = key in ('_displayed_positions', '_positions')
                 if sc:
@@ -1059,25 +1061,62 @@ class Drawing:
         if self.empty_drawing():
             return None
         va = self.vertices
-        ta = self.masked_triangles
-        if ta.shape[1] != 3:
+        if self.triangles.shape[1] != 3:
             # TODO: Intercept only for triangles, not lines or points.
             return None
+        bvh = self._picking_bvh()
+        if bvh is None:
+            ta = self.masked_triangles
+            from chimerax.geometry import closest_triangle_intercept
+            def intercept(xyz1, xyz2):
+                return closest_triangle_intercept(va, ta, xyz1, xyz2)
+        else:
+            ta = self.triangles
+            def intercept(xyz1, xyz2):
+                return bvh.segment_intercept(va, ta, xyz1, xyz2)
         p = None
-        from chimerax.geometry import closest_triangle_intercept
         if self.positions.is_identity():
-            fmin, tmin = closest_triangle_intercept(va, ta, mxyz1, mxyz2)
+            fmin, tmin = intercept(mxyz1, mxyz2)
             if fmin is not None:
                 p = PickedTriangle(fmin, tmin, 0, self)
         else:
             pos_nums = self.bounds_intercept_copies(self.geometry_bounds(), mxyz1, mxyz2)
             for i in pos_nums:
                 cxyz1, cxyz2 = self.positions[i].inverse() * (mxyz1, mxyz2)
-                fmin, tmin = closest_triangle_intercept(va, ta, cxyz1, cxyz2)
+                fmin, tmin = intercept(cxyz1, cxyz2)
                 if fmin is not None and (p is None or fmin < p.distance):
                     p = PickedTriangle(fmin, tmin, i, self)
         return p
 
+    pick_bvh_minimum_triangles = 100000
+    '''
+    Drawings with at least this many triangles use a bounding box
+    hierarchy to speed up picking.  Smaller drawings check every triangle.
+    '''
+
+    def _picking_bvh(self):
+        '''
+        Return the bounding box hierarchy of displayed triangles used for picking,
+        or None if all triangles should be checked.  The hierarchy is made on the
+        second pick after geometry or triangle mask changes so surfaces that change
+        shape every frame, for instance during trajectory playback, are not
+        slowed down by making a hierarchy that is used only once.
+        '''
+        bvh = self._triangle_bvh
+        if bvh:
+            return bvh
+        ta = self.triangles
+        if ta is None or ta.shape[1] != 3 or len(ta) < self.pick_bvh_minimum_triangles:
+            return None
+        if bvh is None:
+            self._triangle_bvh = False	# Picked once since last change.
+            return None
+        tm = self._triangle_mask
+        subset = None if tm is None else tm.nonzero()[0]
+        from chimerax.geometry import TriangleBVH
+        self._triangle_bvh = bvh = TriangleBVH(self.vertices, ta, subset)
+        return bvh
+
     def bounds_intercept_copies(self, bounds, mxyz1, mxyz2):
         '''
         Return indices of positions where line segment intercepts displayed bounds.
@@ -1147,17 +1186,26 @@ class Drawing:
                 # For non-instances pick using all vertices.
                 from chimerax.geometry import transform_planes
                 pplanes = transform_planes(self.position, planes)
-                vmask = points_within_planes(self.vertices, pplanes)
-                if vmask.sum() > 0:
-                    t = self.triangles
-                    from numpy import logical_or, logical_and
-                    tmask = logical_or(vmask[t[:,0]], vmask[t[:,1]])
-                    logical_or(tmask, vmask[t[:,2]], tmask)
-                    tm = self._triangle_mask
-                    if tm is not None:
-                        logical_and(tmask, tm, tmask)
-                    if tmask.sum() > 0:
+                bvh = self._picking_bvh()
+                if bvh is not None:
+                    tnums = bvh.triangles_within_planes(self.vertices, self.triangles, pplanes)
+                    if len(tnums) > 0:
+                        from numpy import zeros
+                        tmask = zeros((len(self.triangles),), bool)
+                        tmask[tnums] = True
                         picks.append(PickedTriangles(tmask, self))
+                else:
+                    vmask = points_within_planes(self.vertices, pplanes)
+                    if vmask.sum() > 0:
+                        t = self.triangles
+                        from numpy import logical_or, logical_and
+                        tmask = logical_or(vmask[t[:,0]], vmask[t[:,1]])
+                        logical_or(tmask, vmask[t[:,2]], tmask)
+                        tm = self._triangle_mask
+                        if tm is not None:
+                            logical_and(tmask, tm, tmask)
+                        if tmask.sum() > 0:
+                            picks.append(PickedTriangles(tmask, self))
 
         # Pick child drawings
         from chimerax.geometry import transform_planes
@@ -5,3 +5,24 @@ hbonds = find_hbonds(session, session.models[:1],
 	dist_slop=rec_dist_slop, angle_slop=rec_angle_slop)
 if len(hbonds) != 792:
 	raise SystemExit("Expected to find 792 hbonds in 2gbp; actually found %d" % len(hbonds))
+
+# Hydrogen bonds found for each coordinate set match those found one coordinate set at a time.
+from chimerax.hbonds import find_coordset_hbonds
+from chimerax.hbonds import hbond
+from numpy import array
+from numpy.random import default_rng
+s = session.models[0]
+xyz = s.atoms.coords
+jitter = default_rng(1).normal(scale=0.2, size=xyz.shape)
+s.add_coordsets(array([xyz, xyz + jitter, xyz - jitter]))
+kw = dict(dist_slop=rec_dist_slop, angle_slop=rec_angle_slop, inter_model=False,
+	inter_submodel=True, cache_da=True)
+cs_hbonds = find_coordset_hbonds(session, s, **kw)
+if hbond._d_cache is None or s not in hbond._d_cache:
+	raise SystemExit("find_coordset_hbonds() did not cache donors with cache_da=True")
+for cs_id, hbonds in zip(s.coordset_ids, cs_hbonds):
+	s.active_coordset_id = cs_id
+	expected = find_hbonds(session, [s], **kw)
+	if set(hbonds) != set(expected):
+		raise SystemExit("Coordset %d of 2gbp: find_coordset_hbonds() found %d hbonds,"
+			" find_hbonds() found %d" % (cs_id, len(hbonds), len(expected)))
@@ -12,6 +12,7 @@
 # === UCSF ChimeraX Copyright ===
 
 from .hbond import find_hbonds, rec_dist_slop, rec_angle_slop, find_coordset_hbonds, flush_cache
+from .hbond import find_trajectory_hbonds, HBondOccupancy
 
 from chimerax.core.toolshed import BundleAPI
 
@@ -72,7 +72,9 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
         'cache_da': cache_DA
     }
 
-    doing_coordsets = coordsets and len(structures) == 1 and structures[0].num_coordsets > 1
+    from chimerax.atomic.trajectory import coordset_ids
+    doing_coordsets = (coordsets and len(structures) == 1
+        and len(coordset_ids(structures[0])) > 1)
     if doing_coordsets:
         hb_func = find_coordset_hbonds
         struct_info = structures[0]
@@ -107,7 +109,8 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
 
 
     if doing_coordsets:
-        cs_ids = structures[0].coordset_ids
+        from chimerax.atomic.trajectory import coordset_ids
+        cs_ids = coordset_ids(structures[0])
         output_info = (inter_model, intra_model, relax, dist_slop, angle_slop,
                                 structures, hb_lists, cs_ids)
     else:
@@ -132,8 +135,10 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
     if select:
         if doing_coordsets:
             structure = structures[0]
-            for i, cs_id in enumerate(structure.coordset_ids):
-                if structure.active_coordset_id == cs_id:
+            from chimerax.atomic.trajectory import coordset_ids, active_coordset_id
+            active_id = active_coordset_id(structure)
+            for i, cs_id in enumerate(coordset_ids(structure)):
+                if active_id == cs_id:
                     break
             hb_list = hb_lists[i]
         else:
@@ -281,6 +281,52 @@ def flush_cache():
     _prev_limited = _d_cache = _a_cache = None
 flush_cache()
 
+def _start_da_cache(cache_da, limited_donors, limited_acceptors):
+    """Flush cached donors/acceptors unless caching them for the same limiting atoms"""
+    global _d_cache, _a_cache, _prev_limited
+    if cache_da:
+        if limited_donors:
+            dIDs = [id(d) for d in limited_donors]
+            dIDs.sort()
+        else:
+            dIDs = None
+        if limited_acceptors:
+            aIDs = [id(a) for a in limited_acceptors]
+            aIDs.sort()
+        else:
+            aIDs = None
+        key = (dIDs, aIDs)
+        if _prev_limited and _prev_limited != key:
+            flush_cache()
+        _prev_limited = key
+        from weakref import WeakKeyDictionary
+        if _d_cache is None:
+            _d_cache = WeakKeyDictionary()
+            _a_cache = WeakKeyDictionary()
+    else:
+        flush_cache()
+
+def _cached_da(da_cache, find_func, structure, dist_slop, angle_slop, cache_da, *args):
+    """Find donors or acceptors of a structure, using and adding to da_cache if cache_da"""
+    if cache_da and structure in da_cache and (dist_slop, angle_slop) in da_cache[structure]:
+        da_atoms = []
+        da_data = []
+        for da_atom, data in da_cache[structure][(dist_slop, angle_slop)].items():
+            if not da_atom.deleted:
+                da_atoms.append(da_atom)
+                da_data.append(data)
+    else:
+        da_atoms, da_data = find_func(structure, *args)
+        if cache_da:
+            from weakref import WeakKeyDictionary
+            cache = WeakKeyDictionary()
+            for i in range(len(da_atoms)):
+                cache[da_atoms[i]] = da_data[i]
+            if structure not in da_cache:
+                da_cache[structure] = {}
+            da_cache[structure][(dist_slop, angle_slop)] = cache
+    return da_atoms, da_data
+
 _problem = None
 _ring_funcs = [_ring5_asym_N, _ring6_asym_N, _ring5_O,
                 _ring5_sym_N, _ring6_sym_N, _ring5_NH, _ring6_aro_NH]
@@ -289,20 +335,217 @@ def find_coordset_hbonds(session, structure, **kw):
     """Like find_hbonds, but takes a single structure and cycles through its coordsets
        and finds the hydrogen bonds for each.  Returns a list of lists of hydrogen
        bonds, one list per coordset.
+
+       Uses find_trajectory_hbonds(), which takes the same keywords as find_hbonds.
+    """
+    return find_trajectory_hbonds(session, structure, **kw).hbond_lists()
+
+def find_trajectory_hbonds(session, structure, *, coordset_ids=None, inter_model=True,
+        intra_model=True, donors=None, acceptors=None, dist_slop=0.0, angle_slop=0.0,
+        inter_submodel=False, cache_da=False, status=True):
+    """Find the hydrogen bonds within a structure for each of its coordinate sets (e.g. the
+       frames of a trajectory), using the same criteria as find_hbonds.
+
+       Donors and acceptors are typed once for the whole trajectory.  For each coordinate
+       set, donor/acceptor pairs within the donor's test distance are found together
+       using a cell list of acceptor positions, and only those pairs undergo the angle
+       tests.
+
+       'coordset_ids' limits the coordinate sets examined (default: all of them).
+
+       The other keywords are as for find_hbonds.  With 'intra_model' false no hydrogen
+       bonds are found.  'inter_model' and 'inter_submodel' have no effect since there is
+       only one structure.  With 'cache_da' the donors and acceptors are cached for later
+       calls as find_hbonds does.
+
+       Returns an :py:class:`HBondOccupancy` table.
     """
-    hbonds = []
-    cs_ids = structure.coordset_ids
+    from chimerax.atomic import Atoms, Atom
+    from chimerax.atomic.trajectory import coordset_ids as structure_coordset_ids, \
+        active_coordset_id, set_active_coordset_id
+    cs_ids = structure_coordset_ids(structure) if coordset_ids is None else list(coordset_ids)
+    if donors and not isinstance(donors, Atoms):
+        limited_donors = Atoms(donors)
+    else:
+        limited_donors = donors
+    if acceptors and not isinstance(acceptors, Atoms):
+        limited_acceptors = Atoms(acceptors)
+    else:
+        limited_acceptors = acceptors
+
+    _start_da_cache(cache_da, limited_donors, limited_acceptors)
+    global _compute_cache, _problem, _truncated
+    _compute_cache = {}
+    _problem = None
+    _truncated = set()
+    bad_connectivities = 0
+
+    Atom._hb_coord = Atom.coord
     structure.active_coordset_change_notify = False
-    cur_cs_id = structure.active_coordset_id
+    cur_cs_id = active_coordset_id(structure)
     try:
-        for cs_id in cs_ids:
-            structure.active_coordset_id = cs_id
-            kw['cache_da'] = cs_id != cs_ids[-1]
-            hbonds.append(find_hbonds(session, [structure], **kw))
+        params = _HBondParams(dist_slop, angle_slop)
+        if status:
+            session.logger.status("Finding donors and acceptors in model '%s'" % structure.name,
+                blank_after=0)
+        metal_coord = _metal_coordination([structure])
+        acc_atoms, acc_data = _cached_da(_a_cache, _find_acceptors, structure, dist_slop,
+            angle_slop, cache_da, params.a_params, limited_acceptors, params.generic_acc_info)
+        don_atoms, don_data = _cached_da(_d_cache, _find_donors, structure, dist_slop,
+            angle_slop, cache_da, params.d_params, limited_donors, params.generic_don_info)
+        if not intra_model:
+            don_atoms, don_data = [], []
+
+        from numpy import array, float64
+        test_dist = array([dd[3] for dd in don_data], float64)
+        sulfur = Element.get_element('S')
+        if [a for a in acc_atoms if a.element == sulfur]:
+            from .common_geom import SULFUR_COMP
+            test_dist += SULFUR_COMP
+        atoms = structure.atoms
+        don_indices = atoms.indices(Atoms(don_atoms))
+        acc_indices = atoms.indices(Atoms(acc_atoms))
+
+        pair_numbers = {}
+        frame_pairs = []
+        for frame, cs_id in enumerate(cs_ids):
+            if status:
+                session.logger.status("Finding hydrogen bonds in coordinate set %d (%d of %d)"
+                    % (cs_id, frame+1, len(cs_ids)), blank_after=0)
+            set_active_coordset_id(structure, cs_id)
+            xyz = atoms.coords
+            dis, ais = _close_pairs(xyz[don_indices], xyz[acc_indices], test_dist)
+            found = []
+            donor_hyds = {}
+            for di, ai in zip(dis.tolist(), ais.tolist()):
+                donor_atom = don_atoms[di]
+                if di not in donor_hyds:
+                    donor_hyds[di] = hyd_positions(donor_atom)
+                acc_atom, geom_func, args = acc_data[ai]
+                is_hbond = _is_hbond(session, donor_atom, donor_hyds[di], don_data[di],
+                    acc_atom, geom_func, args, params, metal_coord)
+                if is_hbond is None:
+                    bad_connectivities += 1
+                elif is_hbond:
+                    found.append(pair_numbers.setdefault((di, ai), len(pair_numbers)))
+            frame_pairs.append(found)
+        if status:
+            session.logger.status("")
+        if bad_connectivities:
+            session.logger.warning("Skipped %d atom(s) with bad connectivities; see log for details"
+                % bad_connectivities);
+        _report_truncated(session)
     finally:
-        structure.active_coordset_od = cur_cs_id
+        set_active_coordset_id(structure, cur_cs_id)
         structure.active_coordset_change_notify = True
-    return hbonds
+        delattr(Atom, "_hb_coord")
+
+    pairs = list(pair_numbers.keys())
+    return HBondOccupancy(Atoms([don_atoms[di] for di, ai in pairs]),
+        Atoms([acc_atoms[ai] for di, ai in pairs]), cs_ids, frame_pairs)
+
+def _close_pairs(xyz1, xyz2, max_dist):
+    """Return index arrays (i, j) of the pairs with xyz1[i] within max_dist[i] of xyz2[j],
+       sorted by i and then j.  Candidate pairs come from a cell list of the xyz2
+       positions with cell size equal to the largest distance.
+    """
+    from numpy import floor, int64, argsort, searchsorted, repeat, arange, cumsum, \
+        concatenate, minimum, maximum, lexsort, zeros
+    if len(xyz1) == 0 or len(xyz2) == 0:
+        return zeros((0,), int64), zeros((0,), int64)
+    size = max_dist.max()
+    # Offset so neighbor cells of every point have non-negative indices.
+    origin = minimum(xyz1.min(axis=0), xyz2.min(axis=0)) - size
+    c1 = floor((xyz1 - origin) / size).astype(int64)
+    c2 = floor((xyz2 - origin) / size).astype(int64)
+    n = maximum(c1.max(axis=0), c2.max(axis=0)) + 2
+    def cell_key(c):
+        return (c[:,0] * n[1] + c[:,1]) * n[2] + c[:,2]
+    k2 = cell_key(c2)
+    order = argsort(k2, kind='stable')
+    k2 = k2[order]
+    ilist, jlist = [], []
+    for offset in [(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1)]:
+        k1 = cell_key(c1 + offset)
+        lo = searchsorted(k2, k1, 'left')
+        count = searchsorted(k2, k1, 'right') - lo
+        total = count.sum()
+        if total == 0:
+            continue
+        ilist.append(repeat(arange(len(xyz1)), count))
+        starts = repeat(lo - (cumsum(count) - count), count)
+        jlist.append(order[arange(total) + starts])
+    if not ilist:
+        return zeros((0,), int64), zeros((0,), int64)
+    i, j = concatenate(ilist), concatenate(jlist)
+    d = xyz1[i] - xyz2[j]
+    close = (d*d).sum(axis=1) <= max_dist[i] * max_dist[i]
+    i, j = i[close], j[close]
+    pair_order = lexsort((j, i))
+    return i[pair_order], j[pair_order]
+
+class HBondOccupancy:
+    """Hydrogen bonds found in a series of coordinate sets, stored as a table with
+       one bit per donor/acceptor pair per coordinate set.
+
+       'donors' and 'acceptors' are :py:class:`~chimerax.atomic.Atoms` giving the atoms
+       of each pair that forms a hydrogen bond in at least one coordinate set, and
+       'coordset_ids' lists the coordinate sets (frames) in table order.
+    """
+    def __init__(self, donors, acceptors, coordset_ids, frame_pairs):
+        self.donors = donors
+        self.acceptors = acceptors
+        self.coordset_ids = list(coordset_ids)
+        from numpy import zeros, uint8, int64, array, repeat, arange, concatenate, bitwise_or
+        num_frames = len(self.coordset_ids)
+        # Same bit layout as numpy.packbits(axis=1).
+        self.bits = zeros((len(donors), (num_frames + 7) // 8), uint8)
+        counts = [len(fp) for fp in frame_pairs]
+        if sum(counts) > 0:
+            rows = concatenate([array(fp, int64) for fp in frame_pairs])
+            frames = repeat(arange(num_frames), counts)
+            bitwise_or.at(self.bits, (rows, frames >> 3), (128 >> (frames & 7)).astype(uint8))
+
+    @property
+    def num_pairs(self):
+        return len(self.donors)
+
+    @property
+    def num_frames(self):
+        return len(self.coordset_ids)
+
+    def frame_mask(self, pair):
+        """Boolean array, one value per frame, of whether the pair is H-bonded"""
+        from numpy import unpackbits
+        return unpackbits(self.bits[pair])[:self.num_frames].astype(bool)
+
+    def pair_mask(self, frame):
+        """Boolean array, one value per pair, of whether the pair is H-bonded in the frame"""
+        return ((self.bits[:, frame >> 3] >> (7 - (frame & 7))) & 1).astype(bool)
+
+    def hbonds(self, frame):
+        """List of (donor, acceptor) hydrogen bonds in the frame"""
+        pairs = self.pair_mask(frame).nonzero()[0]
+        return list(zip(self.donors[pairs], self.acceptors[pairs]))
+
+    def hbond_lists(self):
+        """List of hydrogen bond lists, one per frame, as returned by find_coordset_hbonds"""
+        return [self.hbonds(frame) for frame in range(self.num_frames)]
+
+    def counts(self):
+        """Number of frames in which each pair is H-bonded"""
+        return _bit_counts[self.bits].sum(axis=1, dtype=int)
+
+    def occupancy(self):
+        """Fraction of frames in which each pair is H-bonded"""
+        if self.num_frames == 0:
+            from numpy import zeros
+            return zeros((self.num_pairs,), float)
+        return self.counts() / self.num_frames
+
+import numpy
+_bit_counts = numpy.array([bin(i).count('1') for i in range(256)], numpy.uint8)
+del numpy
 
 def find_hbonds(session, structures, *, inter_model=True, intra_model=True, donors=None, acceptors=None,
         dist_slop=0.0, angle_slop=0.0, inter_submodel=False, cache_da=False, status=True):
@@ -347,30 +590,8 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             limited_acceptors = Atoms(acceptors)
         else:
             limited_acceptors = acceptors
-        global _d_cache, _a_cache, _prev_limited
-        if cache_da:
-            if limited_donors:
-                dIDs = [id(d) for d in limited_donors]
-                dIDs.sort()
-            else:
-                dIDs = None
-            if limited_acceptors:
-                aIDs = [id(a) for a in limited_acceptors]
-                aIDs.sort()
-            else:
-                aIDs = None
-            key = (dIDs, aIDs)
-            if _prev_limited and _prev_limited != key:
-                flush_cache()
-            _prev_limited = key
-            from weakref import WeakKeyDictionary
-            if _d_cache is None:
-                _d_cache = WeakKeyDictionary()
-                _a_cache = WeakKeyDictionary()
-        else:
-            flush_cache()
+        _start_da_cache(cache_da, limited_donors, limited_acceptors)
         global donor_params, acceptor_params
-        global processed_donor_params, processed_acceptor_params
         global _compute_cache
         global verbose
         global _problem
@@ -383,6 +604,149 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         # Used (as necessary) to cache expensive calculations (by other functions also)
         _compute_cache = {}
 
+        params = _HBondParams(dist_slop, angle_slop)
+        a_params, generic_acc_info = params.a_params, params.generic_acc_info
+        d_params, generic_don_info = params.d_params, params.generic_don_info
+
+        from chimerax.atom_search import AtomSearchTree
+        metal_coord = {}
+        acc_trees = {}
+        hbonds = []
+        has_sulfur = {}
+        for structure in structures:
+            if status:
+                session.logger.status("Finding acceptors in model '%s'" % structure.name, blank_after=0)
+            metal_coord.update(_metal_coordination([structure]))
+            acc_atoms, acc_data = _cached_da(_a_cache, _find_acceptors, structure, dist_slop,
+                angle_slop, cache_da, a_params, limited_acceptors, generic_acc_info)
+            #xyz = []
+            has_sulfur[structure] = False
+            for acc_atom in acc_atoms:
+                #c = acc_atom._hb_coord
+                #xyz.append([c[0], c[1], c[2]])
+                if acc_atom.element == Element.get_element('S'):
+                    has_sulfur[structure] = True
+            if status:
+                session.logger.status("Building search tree of acceptor atoms", blank_after=0)
+            acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
+                scene_coords=(Atom._hb_coord == Atom.scene_coord))
+
+        for dmi in range(len(structures)):
+            structure = structures[dmi]
+            if status:
+                session.logger.status("Finding donors in model '%s'" % structure.name, blank_after=0)
+            don_atoms, don_data = _cached_da(_d_cache, _find_donors, structure, dist_slop,
+                angle_slop, cache_da, d_params, limited_donors, generic_don_info)
+
+            if status:
+                session.logger.status("Matching donors in model '%s' to acceptors" % structure.name,
+                    blank_after=0)
+            for i in range(len(don_atoms)):
+                donor_atom = don_atoms[i]
+                geom_type, tau_sym, arg_list, test_dist = don_data[i]
+                donor_hyds = hyd_positions(donor_atom)
+                coord = donor_atom._hb_coord
+                for acc_structure in structures:
+                    if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                        continue
+                    if not inter_submodel \
+                    and acc_structure.id and structure.id \
+                    and acc_structure.id[0] == structure.id[0] \
+                    and acc_structure.id[:-1] == structure.id[:-1] \
+                    and acc_structure.id[1:] != structure.id[1:]:
+                        continue
+                    if has_sulfur[acc_structure]:
+                        from .common_geom import SULFUR_COMP
+                        td = test_dist + SULFUR_COMP
+                    else:
+                        td = test_dist
+                    accs = acc_trees[acc_structure].search(coord, td)
+                    if verbose:
+                        session.logger.info("Found %d possible acceptors for donor %s:"
+                            % (len(accs), donor_atom))
+                        for acc_data in accs:
+                            session.logger.info("\t%s\n" % acc_data[0])
+                    for acc_atom, geom_func, args in accs:
+                        is_hbond = _is_hbond(session, donor_atom, donor_hyds, don_data[i],
+                            acc_atom, geom_func, args, params, metal_coord)
+                        if is_hbond is None:
+                            bad_connectivities += 1
+                        elif is_hbond:
+                            hbonds.append((donor_atom, acc_atom))
+            if status:
+                session.logger.status("")
+        if bad_connectivities:
+            session.logger.warning("Skipped %d atom(s) with bad connectivities; see log for details"
+                % bad_connectivities);
+        if _problem:
+            if session.ui.is_gui:
+                # report a bug when atom matches multiple donor/acceptor descriptions
+                da, atom, grp1, grp2 = _problem
+                res_atoms = atom.residue.atoms
+                def res_atom_rep(a):
+                    try:
+                        i = res_atoms.index(a)
+                    except ValueError:
+                        return "other %s" % a.element.name
+                    return "%2d" % (i+1)
+                descript = "geometry class 1: %s\n\ngeometry class 2: %s" % (repr(grp1), repr(grp2))
+                from chimerax.core.logger import report_exception
+                report_exception(error_description=
+    """At least one atom was classified into more than one acceptor or donor
+    geometry class.  This indicates a problem in the
+    donr/acceptor classification mechanism and we would appreciate it if you
+    would use the bug-report button below to send us the information that
+    will allow us to improve the classification code.
+
+    residue name: %s
+
+    problem %s atom: %d
+
+    residue atoms:
+        %s
+
+    residue bonds:
+        %s
+
+    %s
+    """ % (atom.residue.name, da, res_atoms.index(atom)+1,
+    "\n\t".join(["%2d %-4s %-s (%s)" % (en[0]+1, en[1].name, en[1].idatm_type, str(en[1].coord)) for en in enumerate(res_atoms)]),
+    "\n\t".join(["%s <-> %-s" % (res_atom_rep(b.atoms[0]), res_atom_rep(b.atoms[1])) for b in atom.residue.atoms.bonds]),
+    descript)
+    )
+            _problem = None
+        _report_truncated(session)
+    finally:
+        delattr(Atom, "_hb_coord")
+    return hbonds
+
+def _metal_coordination(structures):
+    """Map atoms to the metal atoms they coordinate"""
+    metal_coord = {}
+    for structure in structures:
+        if structure.PBG_METAL_COORDINATION in structure.pbg_map:
+            for pb in structure.pbg_map[structure.PBG_METAL_COORDINATION].pseudobonds:
+                a1, a2 = pb.atoms
+                if a1.element.is_metal:
+                    metal_coord.setdefault(a2, []).append(a1)
+                if a2.element.is_metal:
+                    metal_coord.setdefault(a1, []).append(a2)
+    return metal_coord
+
+def _report_truncated(session):
+    global _truncated
+    if _truncated:
+        if len(_truncated) > 20:
+            session.logger.warning("%d atoms were skipped as donors/acceptors due to missing"
+                " heavy-atom bond partners" % len(_truncated))
+        else:
+            session.logger.warning("The following atoms were skipped as donors/acceptors due to missing"
+                " heavy-atom bond partners: %s" % "; ".join([str(a) for a in _truncated]))
+        _truncated = None
+
+class _HBondParams:
+    """Donor and acceptor criteria with distance and angle slop applied."""
+    def __init__(self, dist_slop, angle_slop):
         process_key = (dist_slop, angle_slop)
         if process_key not in processed_acceptor_params:
             # copy.deepcopy() refuses to copy functions (even as
@@ -467,51 +831,6 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             'S': gen_don_S_params
         }
 
-        from chimerax.atom_search import AtomSearchTree
-        metal_coord = {}
-        acc_trees = {}
-        hbonds = []
-        has_sulfur = {}
-        for structure in structures:
-            if status:
-                session.logger.status("Finding acceptors in model '%s'" % structure.name, blank_after=0)
-            if structure.PBG_METAL_COORDINATION in structure.pbg_map:
-                for pb in structure.pbg_map[structure.PBG_METAL_COORDINATION].pseudobonds:
-                    a1, a2 = pb.atoms
-                    if a1.element.is_metal:
-                        metal_coord.setdefault(a2, []).append(a1)
-                    if a2.element.is_metal:
-                        metal_coord.setdefault(a1, []).append(a2)
-            if cache_da and structure in _a_cache and (dist_slop,
-                    angle_slop) in _a_cache[structure]:
-                acc_atoms = []
-                acc_data = []
-                for acc_atom, data in _a_cache[structure][(dist_slop, angle_slop)].items():
-                    if not acc_atom.deleted:
-                        acc_atoms.append(acc_atom)
-                        acc_data.append(data)
-            else:
-                acc_atoms, acc_data = _find_acceptors(structure, a_params,
-                        limited_acceptors, generic_acc_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(acc_atoms)):
-                        cache[acc_atoms[i]] = acc_data[i]
-                    if structure not in _a_cache:
-                        _a_cache[structure] = {}
-                    _a_cache[structure][(dist_slop, angle_slop)] = cache
-            #xyz = []
-            has_sulfur[structure] = False
-            for acc_atom in acc_atoms:
-                #c = acc_atom._hb_coord
-                #xyz.append([c[0], c[1], c[2]])
-                if acc_atom.element == Element.get_element('S'):
-                    has_sulfur[structure] = True
-            if status:
-                session.logger.status("Building search tree of acceptor atoms", blank_after=0)
-            acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
-                scene_coords=(Atom._hb_coord == Atom.scene_coord))
-
         if process_key not in processed_donor_params:
             # find max donor distances before they get squared..
 
@@ -547,186 +866,99 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         generic_theta_tau_params = _process_arg_tuple([2.48, 132], dist_slop, angle_slop)
         generic_upsilon_tau_params = _process_arg_tuple([3.42, 90, -161, 125], dist_slop, angle_slop)
         generic_generic_params = _process_arg_tuple([2.48, 3.42, 130, 90], dist_slop, angle_slop)
-        for dmi in range(len(structures)):
-            structure = structures[dmi]
-            if status:
-                session.logger.status("Finding donors in model '%s'" % structure.name, blank_after=0)
-            if cache_da and structure in _d_cache and (dist_slop, angle_slop) in _d_cache[structure]:
-                don_atoms = []
-                don_data = []
-                for don_atom, data in _d_cache[structure][(dist_slop, angle_slop)].items():
-                    if not don_atom.deleted:
-                        don_atoms.append(don_atom)
-                        don_data.append(data)
-            else:
-                don_atoms, don_data = _find_donors(structure, d_params, limited_donors, generic_don_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(don_atoms)):
-                        cache[don_atoms[i]] = don_data[i]
-                    if structure not in _d_cache:
-                        _d_cache[structure] = {}
-                    _d_cache[structure][(dist_slop, angle_slop)] = cache
-
-            if status:
-                session.logger.status("Matching donors in model '%s' to acceptors" % structure.name,
-                    blank_after=0)
-            for i in range(len(don_atoms)):
-                donor_atom = don_atoms[i]
-                geom_type, tau_sym, arg_list, test_dist = don_data[i]
-                donor_hyds = hyd_positions(donor_atom)
-                coord = donor_atom._hb_coord
-                for acc_structure in structures:
-                    if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
-                        continue
-                    if not inter_submodel \
-                    and acc_structure.id and structure.id \
-                    and acc_structure.id[0] == structure.id[0] \
-                    and acc_structure.id[:-1] == structure.id[:-1] \
-                    and acc_structure.id[1:] != structure.id[1:]:
-                        continue
-                    if has_sulfur[acc_structure]:
-                        from .common_geom import SULFUR_COMP
-                        td = test_dist + SULFUR_COMP
-                    else:
-                        td = test_dist
-                    accs = acc_trees[acc_structure].search(coord, td)
-                    if verbose:
-                        session.logger.info("Found %d possible acceptors for donor %s:"
-                            % (len(accs), donor_atom))
-                        for acc_data in accs:
-                            session.logger.info("\t%s\n" % acc_data[0])
-                    for acc_atom, geom_func, args in accs:
-                        if acc_atom == donor_atom:
-                            # e.g. hydroxyl
-                            if verbose:
-                                print("skipping: donor == acceptor")
-                            continue
-                        try:
-                            if not geom_func(donor_atom, donor_hyds, *args):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
-                                % (acc_atom, e))
-                            bad_connectivities += 1
-                            continue
-                        except Exception:
-                            print("donor:", donor_atom, " acceptor:", acc_atom)
-                            raise
-                        if verbose:
-                            session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
-                        if geom_type == upsilon_tau:
-                            donor_func = don_upsilon_tau
-                            add_args = generic_upsilon_tau_params + [tau_sym]
-                        elif geom_type == theta_tau:
-                            donor_func = don_theta_tau
-                            add_args = generic_theta_tau_params
-                        elif geom_type == water:
-                            donor_func = don_water
-                            add_args = generic_water_params
-                        else:
-                            if donor_atom.idatm_type in ["Npl", "N2+"]:
-                                heavys = 0
-                                for bonded in donor_atom.neighbors:
-                                    if bonded.element.number > 1:
-                                        heavys += 1
-                                if heavys > 1:
-                                    info = gen_don_Npl_1h_params
-                                else:
-                                    info = gen_don_Npl_2h_params
-                            else:
-                                info = generic_don_info[donor_atom.element.name]
-                            donor_func, arg_list = info
-                            add_args = generic_generic_params
-                            if donor_func == don_upsilon_tau:
-                                # tack on generic
-                                # tau symmetry
-                                add_args = generic_upsilon_tau_params + [4]
-                            elif donor_func == don_theta_tau:
-                                add_args = generic_theta_tau_params
-                        try:
-                            if not donor_func(donor_atom, donor_hyds, acc_atom,
-                                    *tuple(arg_list + add_args)):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
-                                % (donor_atom, e))
-                            bad_connectivities += 1
-                            continue
-                        except AtomTypeError as e:
-                            session.logger.warning(str(e))
-                            #_problem = ("atom type", donor_atom, str(e), None)
-                            continue
-                        if verbose:
-                            session.logger.info("\t%s satisfies donor criteria" % donor_atom)
-                        # ensure hbond isn't precluded by metal-coordination...
-                        if acc_atom in metal_coord:
-                            from chimerax.geometry import angle
-                            conflict = False
-                            for metal in metal_coord[acc_atom]:
-                                if angle(donor_atom._hb_coord, acc_atom._hb_coord,
-                                        metal._hb_coord) < 90.0:
-                                    if verbose:
-                                        session.logger.info("\tH-bond conflicts with"
-                                            " metal coordination to %s" % metal)
-                                    conflict = True
-                                    break
-                            if conflict:
-                                continue
-                        hbonds.append((donor_atom, acc_atom))
-            if status:
-                session.logger.status("")
-        if bad_connectivities:
-            session.logger.warning("Skipped %d atom(s) with bad connectivities; see log for details"
-                % bad_connectivities);
-        if _problem:
-            if session.ui.is_gui:
-                # report a bug when atom matches multiple donor/acceptor descriptions
-                da, atom, grp1, grp2 = _problem
-                res_atoms = atom.residue.atoms
-                def res_atom_rep(a):
-                    try:
-                        i = res_atoms.index(a)
-                    except ValueError:
-                        return "other %s" % a.element.name
-                    return "%2d" % (i+1)
-                descript = "geometry class 1: %s\n\ngeometry class 2: %s" % (repr(grp1), repr(grp2))
-                from chimerax.core.logger import report_exception
-                report_exception(error_description=
-    """At least one atom was classified into more than one acceptor or donor
-    geometry class.  This indicates a problem in the
-    donr/acceptor classification mechanism and we would appreciate it if you
-    would use the bug-report button below to send us the information that
-    will allow us to improve the classification code.
 
-    residue name: %s
-
-    problem %s atom: %d
-
-    residue atoms:
-        %s
+        self.a_params = a_params
+        self.d_params = d_params
+        self.generic_acc_info = generic_acc_info
+        self.generic_don_info = generic_don_info
+        self.gen_don_Npl_1h_params = gen_don_Npl_1h_params
+        self.gen_don_Npl_2h_params = gen_don_Npl_2h_params
+        self.generic_water_params = generic_water_params
+        self.generic_theta_tau_params = generic_theta_tau_params
+        self.generic_upsilon_tau_params = generic_upsilon_tau_params
+        self.generic_generic_params = generic_generic_params
 
-    residue bonds:
-        %s
-
-    %s
-    """ % (atom.residue.name, da, res_atoms.index(atom)+1,
-    "\n\t".join(["%2d %-4s %-s (%s)" % (en[0]+1, en[1].name, en[1].idatm_type, str(en[1].coord)) for en in enumerate(res_atoms)]),
-    "\n\t".join(["%s <-> %-s" % (res_atom_rep(b.atoms[0]), res_atom_rep(b.atoms[1])) for b in atom.residue.atoms.bonds]),
-    descript)
-    )
-            _problem = None
-        if _truncated:
-            if len(_truncated) > 20:
-                session.logger.warning("%d atoms were skipped as donors/acceptors due to missing"
-                    " heavy-atom bond partners" % len(_truncated))
+def _is_hbond(session, donor_atom, donor_hyds, don_info, acc_atom, geom_func, args, params,
+        metal_coord):
+    """Return whether donor and acceptor atoms satisfy the H-bond geometry criteria,
+       or None if either has bad connectivity.
+    """
+    geom_type, tau_sym, arg_list, test_dist = don_info
+    if acc_atom == donor_atom:
+        # e.g. hydroxyl
+        if verbose:
+            print("skipping: donor == acceptor")
+        return False
+    try:
+        if not geom_func(donor_atom, donor_hyds, *args):
+            return False
+    except ConnectivityError as e:
+        session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
+            % (acc_atom, e))
+        return None
+    except Exception:
+        print("donor:", donor_atom, " acceptor:", acc_atom)
+        raise
+    if verbose:
+        session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
+    if geom_type == upsilon_tau:
+        donor_func = don_upsilon_tau
+        add_args = params.generic_upsilon_tau_params + [tau_sym]
+    elif geom_type == theta_tau:
+        donor_func = don_theta_tau
+        add_args = params.generic_theta_tau_params
+    elif geom_type == water:
+        donor_func = don_water
+        add_args = params.generic_water_params
+    else:
+        if donor_atom.idatm_type in ["Npl", "N2+"]:
+            heavys = 0
+            for bonded in donor_atom.neighbors:
+                if bonded.element.number > 1:
+                    heavys += 1
+            if heavys > 1:
+                info = params.gen_don_Npl_1h_params
             else:
-                session.logger.warning("The following atoms were skipped as donors/acceptors due to missing"
-                    " heavy-atom bond partners: %s" % "; ".join([str(a) for a in _truncated]))
-            _truncated = None
-    finally:
-        delattr(Atom, "_hb_coord")
-    return hbonds
+                info = params.gen_don_Npl_2h_params
+        else:
+            info = params.generic_don_info[donor_atom.element.name]
+        donor_func, arg_list = info
+        add_args = params.generic_generic_params
+        if donor_func == don_upsilon_tau:
+            # tack on generic
+            # tau symmetry
+            add_args = params.generic_upsilon_tau_params + [4]
+        elif donor_func == don_theta_tau:
+            add_args = params.generic_theta_tau_params
+    try:
+        if not donor_func(donor_atom, donor_hyds, acc_atom,
+                *tuple(arg_list + add_args)):
+            return False
+    except ConnectivityError as e:
+        session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
+            % (donor_atom, e))
+        return None
+    except AtomTypeError as e:
+        session.logger.warning(str(e))
+        #_problem = ("atom type", donor_atom, str(e), None)
+        return False
+    if verbose:
+        session.logger.info("\t%s satisfies donor criteria" % donor_atom)
+    # ensure hbond isn't precluded by metal-coordination...
+    if acc_atom in metal_coord:
+        from chimerax.geometry import angle
+        conflict = False
+        for metal in metal_coord[acc_atom]:
+            if angle(donor_atom._hb_coord, acc_atom._hb_coord,
+                    metal._hb_coord) < 90.0:
+                if verbose:
+                    session.logger.info("\tH-bond conflicts with"
+                        " metal coordination to %s" % metal)
+                conflict = True
+                break
+        if conflict:
+            return False
+    return True
 
 def _process_arg_tuple(arg_tuple, dist_slop, angle_slop):
     new_args = []
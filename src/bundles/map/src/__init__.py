@@ -99,6 +99,9 @@ class _MapBundle(BundleAPI):
     @staticmethod
     def initialize(session, bundle_info):
         """Register file formats, commands, and database fetch."""
+        from . import settings
+        settings.settings = settings._MapSettings(session, "map")
+
         if session.ui.is_gui:
             from . import mouselevel, moveplanes, windowing, tiltedslab
             mouselevel.register_mousemode(session)
@@ -153,6 +156,7 @@ class _MapBundle(BundleAPI):
                         return {
                             'array_name': StringArg,
                             'channel': IntArg,
+                            'memory_map': BoolArg,
                             'verbose': BoolArg,
                             'vseries': BoolArg,
                         }
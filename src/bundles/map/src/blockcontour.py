@@ -0,0 +1,251 @@
+# vim: set expandtab shiftwidth=2 softtabstop=2:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Contour surfaces of large maps computed in blocks on several threads.
+#
+# The grid cells of the map are split into blocks of block_size cells along
+# each axis.  The minimum and maximum value of each block are computed once
+# per matrix so blocks that cannot contain the threshold are skipped.  Each
+# remaining block is contoured separately, padded by grid planes on each side
+# so normals match those of the whole map contour, keeping only triangles
+# whose center lies in the block.  Vertices duplicated on the faces shared by
+# blocks are then merged.
+#
+# Block surfaces are kept, so recontouring at a new threshold only computes
+# blocks whose value range contains the new threshold or the old one.
+# Changing smoothing or subdivision options with an unchanged threshold
+# reuses all blocks.  The matrix is not kept so that the map data cache can
+# release it, and must be the same for each call.  Calls from different
+# threads are serialized.
+#
+class BlockContour:
+  '''
+  Contour surface calculation for one map matrix split into blocks.
+
+  Parameters
+  ----------
+  shape : 3 integers
+    Size of the map matrix, z,y,x index order.  All axes must have size at least 2.
+  block_size : int
+    Number of grid cells along each axis of a block.
+  '''
+  def __init__(self, shape, block_size = 64):
+    self.shape = ks, js, is_ = tuple(shape)
+    self.block_size = block_size
+    # Grid index ranges (start, end), inclusive, of blocks along x, y and z.
+    self._axis_ranges = [_axis_blocks(n, block_size) for n in (is_, js, ks)]
+    self._value_ranges = None	# Block min and max values, axes z,y,x,(min,max)
+    self._block_surfaces = {}	# Map block (i,j,k) to vertices, normals, triangles
+    self._level = None		# Threshold of block surfaces
+    self._cap_faces = None
+    from threading import RLock
+    self._lock = RLock()	# Surface calculation thread and main thread can both contour.
+
+  # ---------------------------------------------------------------------------
+  #
+  def value_ranges(self, matrix, threads = None):
+    '''Return array of minimum and maximum value of each block, shape (nz,ny,nx,2).'''
+    with self._lock:
+      return self._matrix_value_ranges(matrix, threads)
+
+  def _matrix_value_ranges(self, matrix, threads):
+    if self._value_ranges is None:
+      xr, yr, zr = self._axis_ranges
+      from numpy import empty
+      vr = empty((len(zr), len(yr), len(xr), 2), matrix.dtype)
+      m = matrix
+      args = [(m[k0:k1+1], xr, yr, vr[k]) for k, (k0,k1) in enumerate(zr)]
+      from chimerax.core.threadq import apply_to_list
+      apply_to_list(_plane_block_ranges, args, threads)
+      self._value_ranges = vr
+    return self._value_ranges
+
+  # ---------------------------------------------------------------------------
+  #
+  def contour_surface(self, matrix, level, cap_faces = True, threads = None):
+    '''
+    Return vertices, triangles and normals of the contour surface,
+    with vertices in grid index units, like _map.contour_surface().
+    The returned arrays can be modified by the caller.
+    '''
+    if tuple(matrix.shape) != self.shape:
+      raise ValueError('Matrix shape %s does not match block contour shape %s'
+                       % (tuple(matrix.shape), self.shape))
+    with self._lock:
+      return self._contour_surface(matrix, level, cap_faces, threads)
+
+  def _contour_surface(self, matrix, level, cap_faces, threads):
+    vr = self._matrix_value_ranges(matrix, threads)
+    vmin, vmax = vr[...,0], vr[...,1]
+    # Grid values below level are outside the surface.
+    crossing = (vmin < level) & (vmax >= level)
+    if cap_faces:
+      # Blocks inside the surface on the map boundary have cap faces.
+      inside = (vmin >= level) & self._boundary_blocks()
+    else:
+      from numpy import zeros
+      inside = zeros(crossing.shape, bool)
+
+    # Keep block surfaces that do not depend on threshold.
+    old_surfaces = self._block_surfaces
+    if cap_faces != self._cap_faces:
+      old_surfaces = {}
+    elif level != self._level:
+      old_level = self._level
+      old_inside = (vmin >= old_level) & inside
+      old_surfaces = {b:s for b,s in old_surfaces.items() if old_inside[b[2],b[1],b[0]]}
+    surfaces = {}
+    args = []
+    from numpy import argwhere
+    for k,j,i in argwhere(crossing | inside).tolist():
+      b = (i,j,k)
+      s = old_surfaces.get(b)
+      if s is None:
+        args.append((b,))
+      else:
+        surfaces[b] = s
+
+    if args:
+      def contour_block(b):
+        return b, self._contour_block(matrix, b, level, cap_faces)
+      from chimerax.core.threadq import apply_to_list
+      for b, s in apply_to_list(contour_block, args, threads):
+        surfaces[b] = s
+
+    self._block_surfaces = surfaces
+    self._level = level
+    self._cap_faces = cap_faces
+
+    blocks = sorted(surfaces.keys(), key = lambda b: (b[2],b[1],b[0]))
+    return self._merge_blocks([surfaces[b] for b in blocks])
+
+  # ---------------------------------------------------------------------------
+  #
+  def _boundary_blocks(self):
+    from numpy import zeros
+    xr, yr, zr = self._axis_ranges
+    b = zeros((len(zr), len(yr), len(xr)), bool)
+    b[0,:,:] = b[-1,:,:] = True
+    b[:,0,:] = b[:,-1,:] = True
+    b[:,:,0] = b[:,:,-1] = True
+    return b
+
+  # ---------------------------------------------------------------------------
+  #
+  def _contour_block(self, m, block, level, cap_faces):
+    '''
+    Contour one block, returning vertices in grid index units of the whole
+    matrix, normals and triangles.  The block is padded by one grid plane
+    below and two above so normal gradients are the same as for the whole
+    matrix.  Triangles of padding cells have a vertex outside the block
+    and are dropped.
+    '''
+    size = (m.shape[2], m.shape[1], m.shape[0])
+    ranges = [self._axis_ranges[a][block[a]] for a in (0,1,2)]
+    lo = [max(s-1, 0) for s,e in ranges]
+    hi = [min(e+2, size[a]-1) for a,(s,e) in enumerate(ranges)]
+    sub = m[lo[2]:hi[2]+1, lo[1]:hi[1]+1, lo[0]:hi[0]+1]
+    from ._map import contour_surface
+    va, ta, na = contour_surface(sub, level, cap_faces = cap_faces, calculate_normals = True)
+    if len(ta) == 0:
+      return va, na, ta
+    from numpy import array, float32, zeros
+    va += array(lo, float32)
+
+    outside = zeros((len(va),), bool)
+    for a, (s,e) in enumerate(ranges):
+      if lo[a] < s:
+        outside |= (va[:,a] < s)
+      if hi[a] > e:
+        outside |= (va[:,a] > e)
+    keep = ~outside[ta].any(axis = 1)
+    return va, na, ta[keep]	# Unused vertices are removed when blocks are merged.
+
+  # ---------------------------------------------------------------------------
+  #
+  def _merge_blocks(self, block_surfaces):
+    '''
+    Combine block surfaces merging vertices on faces shared by blocks.
+    These vertices are computed by both blocks with slightly different
+    rounding, so they are identified by the grid edge they lie on.
+    '''
+    from numpy import concatenate, zeros, float32, int32, array
+    block_surfaces = [s for s in block_surfaces if len(s[2]) > 0]
+    if len(block_surfaces) == 0:
+      return zeros((0,3), float32), zeros((0,3), int32), zeros((0,3), float32)
+    if len(block_surfaces) == 1:
+      va, na, ta = _used_vertices(*block_surfaces[0])
+      return va.copy(), ta.copy(), na.copy()
+
+    voffset = 0
+    tlist = []
+    for va, na, ta in block_surfaces:
+      tlist.append(ta + voffset)
+      voffset += len(va)
+    va = concatenate([s[0] for s in block_surfaces])
+    na = concatenate([s[1] for s in block_surfaces])
+    ta = concatenate(tlist)
+
+    from numpy import isin, floor, int64, unique, arange, nonzero
+    # Vertices used only by dropped padding triangles may have boundary normals.
+    shared = zeros((len(va),), bool)
+    shared[ta.ravel()] = True
+    on_face = zeros((len(va),), bool)
+    for a in (0,1,2):
+      planes = array([s for s,e in self._axis_ranges[a][1:]], float32)
+      on_face |= isin(va[:,a], planes)
+    shared &= on_face
+    si = nonzero(shared)[0]
+    if len(si) > 0:
+      # Key is grid point at start of edge and bits for the edge axis.
+      sv = va[si].astype('float64')
+      fv = floor(sv)
+      ki = fv.astype(int64)
+      ks, js, is_ = self.shape
+      edge_keys = (((ki[:,2]*js + ki[:,1])*is_ + ki[:,0]) * 8
+                   + (sv[:,0] != fv[:,0]) + 2*(sv[:,1] != fv[:,1]) + 4*(sv[:,2] != fv[:,2]))
+      keys, first, inverse = unique(edge_keys, return_index = True, return_inverse = True)
+      vmap = arange(len(va))
+      vmap[si] = si[first[inverse]]
+      ta = vmap[ta].astype(int32)
+    va, na, ta = _used_vertices(va, na, ta)
+    return va, ta, na
+
+# -----------------------------------------------------------------------------
+#
+def _axis_blocks(n, block_size):
+  return [(s, min(s + block_size, n-1)) for s in range(0, n-1, block_size)]
+
+# -----------------------------------------------------------------------------
+#
+def _plane_block_ranges(planes, xranges, yranges, ranges):
+  for j, (j0,j1) in enumerate(yranges):
+    rows = planes[:,j0:j1+1,:]
+    rmin = rows.min(axis = (0,1))
+    rmax = rows.max(axis = (0,1))
+    for i, (i0,i1) in enumerate(xranges):
+      ranges[j,i,0] = rmin[i0:i1+1].min()
+      ranges[j,i,1] = rmax[i0:i1+1].max()
+
+# -----------------------------------------------------------------------------
+#
+def _used_vertices(va, na, ta):
+  '''Remove vertices not used by triangles and renumber triangles.'''
+  from numpy import zeros, int32, cumsum
+  used = zeros((len(va),), bool)
+  used[ta.ravel()] = True
+  if used.all():
+    return va, na, ta
+  vnum = (cumsum(used) - 1).astype(int32)
+  return va[used], na[used], vnum[ta]
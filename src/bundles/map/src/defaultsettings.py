@@ -60,6 +60,7 @@ class VolumeDefaultSettings:
                            (.6,.75,.9,1),
                            (.8,.8,.6,1)),
 	'data_cache_size': 512.0,                # Mbytes
+        'data_cache_map_fraction': None,         # Limit per map or map series
         'selectable_subregions': False,
         'subregion_button': 'middle',
         'box_padding': 0.0,
@@ -311,7 +312,7 @@ class VolumeDefaultSettings:
                    'immediate_update', 'show_on_open', 'voxel_limit_for_open',
                    'show_plane', 'voxel_limit_for_plane',
                    'voxel_limit_for_plane', 'limit_voxel_count', 'voxel_limit',
-                   'data_cache_size', 'data_cache_size',
+                   'data_cache_size', 'data_cache_size', 'data_cache_map_fraction',
                    'auto_show_subregion', 'adjust_camera'])
     if panel_settings:
       keys.extend(['shown_panels'])
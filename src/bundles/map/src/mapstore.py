@@ -0,0 +1,243 @@
+# vim: set expandtab shiftwidth=2 softtabstop=2:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Map files and arrays referenced from sessions by content hash.
+#
+# Sessions saved with map references by hash record the SHA-256 checksum and
+# size of each map file along with its path.  When the path no longer exists
+# at session restore the file is found by content in the map search path
+# directories or in the map store.  The map store is a directory of files
+# named by their checksum, so a map used by many sessions is stored once.
+# Map arrays that would otherwise be embedded in the session are also put
+# in the store and the session records only their checksum and size.
+#
+class MapStore:
+  '''
+  Directory of map files and arrays named by SHA-256 checksum.
+
+  Parameters
+  ----------
+  directory : string
+    Store directory.  Files are kept in subdirectories named by the first
+    two characters of the checksum.
+  '''
+  def __init__(self, directory):
+    self.directory = directory
+
+  # ---------------------------------------------------------------------------
+  #
+  def _path(self, checksum, suffix = ''):
+    from os.path import join
+    return join(self.directory, checksum[:2], checksum + suffix)
+
+  # ---------------------------------------------------------------------------
+  #
+  def find(self, checksum, size, suffix = ''):
+    '''
+    Return the path of a stored file with this checksum and size, or None.
+    The checksum of the stored file is verified.  A stored file whose
+    contents no longer match its name is removed.
+    '''
+    from os.path import getsize
+    p = self._path(checksum, suffix)
+    try:
+      if getsize(p) != size:
+        return None
+      if file_checksum(p) == checksum:
+        return p
+      import os
+      os.remove(p)
+    except OSError:
+      pass
+    return None
+
+  # ---------------------------------------------------------------------------
+  #
+  def add_file(self, path, checksum, suffix = ''):
+    '''
+    Add a copy of a file.  Returns the stored path or None if the file
+    could not be stored.  A copy is made rather than a link, so later
+    changes to the original file do not change the stored file.
+    '''
+    from os.path import getsize
+    size = getsize(path)
+    p = self.find(checksum, size, suffix)
+    if p is not None:
+      return p
+    def copy(f):
+      from hashlib import sha256
+      h = sha256()
+      with open(path, 'rb') as src:
+        while True:
+          data = src.read(2**20)
+          if not data:
+            break
+          h.update(data)
+          f.write(data)
+      if h.hexdigest() != checksum:
+        raise OSError('Map file %s changed while adding it to the map store' % path)
+    return self._write(checksum, suffix, copy)
+
+  # ---------------------------------------------------------------------------
+  #
+  def add_bytes(self, data, checksum = None):
+    '''
+    Store bytes, for instance a map array, returning the checksum.
+    Returns None if the bytes could not be stored.
+    '''
+    if checksum is None:
+      checksum = bytes_checksum(data)
+    if self.find(checksum, len(data)) is None:
+      if self._write(checksum, '', lambda f: f.write(data)) is None:
+        return None
+    return checksum
+
+  # ---------------------------------------------------------------------------
+  #
+  def read_bytes(self, checksum, size):
+    '''Return stored bytes with this checksum and size, or None if not stored.'''
+    from os.path import getsize
+    p = self._path(checksum)
+    try:
+      if getsize(p) != size:
+        return None
+      with open(p, 'rb') as f:
+        data = f.read()
+    except OSError:
+      return None
+    return data if bytes_checksum(data) == checksum else None
+
+  # ---------------------------------------------------------------------------
+  #
+  def _write(self, checksum, suffix, write):
+    import os
+    p = self._path(checksum, suffix)
+    d = os.path.dirname(p)
+    tmp_path = None
+    try:
+      os.makedirs(d, exist_ok = True)
+      # Write to a temporary file so other sessions never see a partial file.
+      from tempfile import NamedTemporaryFile
+      with NamedTemporaryFile(dir = d, suffix = '.tmp', delete = False) as f:
+        tmp_path = f.name
+        write(f)
+      os.replace(tmp_path, p)
+    except OSError:
+      if tmp_path is not None and os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      return None
+    return p
+
+# -----------------------------------------------------------------------------
+#
+def map_store(session):
+  '''Return the MapStore set by the "volume store" command, or None.'''
+  from .settings import settings
+  d = settings.map_store
+  if not d:
+    return None
+  from os.path import expanduser
+  return MapStore(expanduser(d))
+
+# -----------------------------------------------------------------------------
+#
+def map_search_path(session):
+  '''Directories searched for map files by content.'''
+  from .settings import settings
+  from os.path import expanduser
+  return [expanduser(d) for d in settings.map_search_path]
+
+# -----------------------------------------------------------------------------
+# Checksums of files already computed, keyed by path, size and modification
+# time, so saving a session again does not read unchanged map files.
+#
+_file_checksums = {}
+
+def file_checksum(path):
+  '''Return SHA-256 hex digest of a file's contents.'''
+  import os
+  st = os.stat(path)
+  key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+  c = _file_checksums.get(key)
+  if c is None:
+    from chimerax.core.fetchcache import file_checksum as checksum
+    _file_checksums[key] = c = checksum(path)
+  return c
+
+# -----------------------------------------------------------------------------
+#
+def bytes_checksum(data):
+  from hashlib import sha256
+  return sha256(data).hexdigest()
+
+# -----------------------------------------------------------------------------
+# Session state for a map file path or tuple of paths, a list of
+# [file name, size, checksum] for each file.  Files are added to the map
+# store if there is one.
+#
+def file_references(path, session):
+  paths = path if isinstance(path, (tuple, list)) else (path,)
+  store = map_store(session)
+  from os.path import basename, getsize
+  refs = []
+  for p in paths:
+    try:
+      c = file_checksum(p)
+      size = getsize(p)
+    except OSError:
+      return None
+    if store is not None:
+      store.add_file(p, c, _suffix(p))
+    refs.append([basename(p), size, c])
+  return refs
+
+# -----------------------------------------------------------------------------
+#
+def _suffix(filename):
+  from os.path import splitext
+  return splitext(filename)[1]
+
+# -----------------------------------------------------------------------------
+# Find a file with given name, size and checksum in the search path or map
+# store.  The search path directories are checked for the file name and for
+# the trailing directories of the original path, so a moved directory tree
+# is found.
+#
+def find_file_by_reference(path, ref, session):
+  name, size, checksum = ref
+  from os.path import join, getsize, isfile, normpath
+  parts = normpath(path).replace('\\', '/').split('/')
+  tails = [join(*parts[i:]) for i in range(len(parts)-1, 0, -1)] if len(parts) > 1 else [name]
+  for d in map_search_path(session):
+    for tail in tails:
+      p = join(d, tail)
+      try:
+        if isfile(p) and getsize(p) == size and file_checksum(p) == checksum:
+          return p
+      except OSError:
+        continue
+  store = map_store(session)
+  if store is not None:
+    return store.find(checksum, size, _suffix(name))
+  return None
+
+# -----------------------------------------------------------------------------
+#
+def file_matches_reference(path, ref):
+  '''Whether the file at path has the referenced size and checksum.'''
+  from os.path import getsize
+  try:
+    return getsize(path) == ref[1] and file_checksum(path) == ref[2]
+  except OSError:
+    return False
@@ -122,18 +122,18 @@ def find_volumes_by_session_id(ids, session):
 # -----------------------------------------------------------------------------
 # Path can be a tuple of paths.
 #
-def absolute_path(path, file_paths, ask = False, base_path = None):
+def absolute_path(path, file_paths, ask = False, base_path = None, refs = None):
 
   from os.path import abspath
   if isinstance(path, (tuple, list)):
     fpath = [full_path(p, base_path) for p in path]
-    apath = file_paths.find_multiple(fpath,ask)
+    apath = file_paths.find_multiple(fpath, ask, refs = refs)
     apath = tuple(abspath(p) for p in apath if p)
   elif path == '':
     return path
   else:
     fpath = full_path(path, base_path)
-    apath = file_paths.find(fpath,ask)
+    apath = file_paths.find(fpath, ask, ref = refs[0] if refs else None)
     if not apath is None:
       apath = abspath(apath)
   return apath
@@ -171,7 +171,7 @@ def relative_path(path, base_path):
 # ---------------------------------------------------------------------------
 # Get ChimeraX unique GridDataState object for a grid.
 #
-def grid_data_state(grid_data, session, include_maps = False):
+def grid_data_state(grid_data, session, include_maps = False, hash_maps = False):
   gs = getattr(session, '_volume_grid_data_session_states', None)
   if gs is None:
     session._volume_grid_data_session_states = gs = {}
@@ -182,7 +182,8 @@ def grid_data_state(grid_data, session, include_maps = False):
 
   gds = gs.get(grid_data, None)
   if gds is None:
-    gs[grid_data] = gds = GridDataState(grid_data, include_maps = include_maps)
+    gs[grid_data] = gds = GridDataState(grid_data, include_maps = include_maps,
+                                        hash_maps = hash_maps)
   return gds
 
 # ---------------------------------------------------------------------------
@@ -191,14 +192,16 @@ def grid_data_state(grid_data, session, include_maps = False):
 from chimerax.core.state import State
 class GridDataState(State):
 
-  def __init__(self, grid_data, include_maps = False):
+  def __init__(self, grid_data, include_maps = False, hash_maps = False):
     self.grid_data = grid_data
     self._include_maps = include_maps
+    self._hash_maps = hash_maps
 
   # State save/restore in ChimeraX
   def take_snapshot(self, session, flags):
     data = state_from_grid_data(self.grid_data, session_path = session.session_file_path,
-                                include_maps = self._include_maps)
+                                include_maps = self._include_maps,
+                                hash_maps = self._hash_maps, session = session)
     return data
 
   @staticmethod
@@ -215,7 +218,7 @@ class GridDataState(State):
     gdcache = session._grid_restore_cache        # (path, grid_id) -> GridData object
     rfp = getattr(session, '_map_replacement_file_paths', None)
     if rfp is None:
-      session._map_replacement_file_paths = rfp = ReplacementFilePaths(session.ui)
+      session._map_replacement_file_paths = rfp = ReplacementFilePaths(session.ui, session)
     grids = grid_data_from_state(data, gdcache, session, rfp)
 
     return GridDataState(grids[0] if grids else None)
@@ -223,13 +226,22 @@ class GridDataState(State):
 # ---------------------------------------------------------------------------
 #
 class ReplacementFilePaths:
-  def __init__(self, ui):
+  def __init__(self, ui, session = None):
     self._ui = ui
+    self._session = session
     self._replaced_paths = {}
     self._replace_dirs = {}
-  def find(self, path, ask = False, replace_dir = True):
+  def find(self, path, ask = False, replace_dir = True, ref = None):
     replacements = self._replaced_paths
     from os.path import isfile
+    if ref is not None and self._session is not None:
+      # Session recorded the file checksum.  Find the file by content if moved.
+      from .mapstore import file_matches_reference, find_file_by_reference
+      if isfile(path) and file_matches_reference(path, ref):
+        return path
+      p = find_file_by_reference(path, ref, self._session)
+      if p is not None:
+        return p
     if isfile(path):
       return path
     elif path in replacements:
@@ -264,12 +276,13 @@ class ReplacementFilePaths:
       return p
     else:
       return path
-  def find_multiple(self, paths, ask = False, replace_dir = True):
+  def find_multiple(self, paths, ask = False, replace_dir = True, refs = None):
     # If user does not replace a path then don't ask about more paths.
     # This is to handle image stacks where a map uses hundreds of 2d files.
     npaths = []
-    for p in paths:
-      np = self.find(p, ask=ask, replace_dir=replace_dir)
+    for i, p in enumerate(paths):
+      ref = refs[i] if refs and i < len(refs) else None
+      np = self.find(p, ask=ask, replace_dir=replace_dir, ref=ref)
       if np is None:
         return ()
       npaths.append(np)
@@ -293,7 +306,8 @@ def existing_directory(path):
 
 # ---------------------------------------------------------------------------
 #
-def state_from_grid_data(data, session_path = None, include_maps = False):
+def state_from_grid_data(data, session_path = None, include_maps = False,
+                         hash_maps = False, session = None):
     
   dt = data
   relpath = relative_path(dt.path, session_path)
@@ -303,20 +317,36 @@ def state_from_grid_data(data, session_path = None, include_maps = False):
        'version': 1,
      }
 
+  if hash_maps and session is not None:
+    from .mapstore import map_store, file_references
+    store = map_store(session)
+  else:
+    store = None
+
   if not dt.path or include_maps:
     s['size'] = dt.size
     s['value_type'] = str(dt.value_type)
+    array_bytes = dt.matrix().tobytes()
+    checksum = None if store is None else store.add_bytes(array_bytes)
     compress_maps = False  # No advantage.  Ticket #4002
-    if compress_maps:
+    if checksum is not None:
+      # Array is in the map store, shared by all sessions that use it.
+      s['array_compression'] = 'none'
+      s['array_reference'] = [checksum, len(array_bytes)]
+    elif compress_maps:
       from gzip import compress
       s['array_compression'] = 'gzip'
-      s['array'] = compress(dt.matrix().tobytes())
+      s['array'] = compress(array_bytes)
     else:
       s['array_compression'] = 'none'
-      s['array'] = dt.matrix().tobytes()
+      s['array'] = array_bytes
     save_position = True
   else:
     save_position = False
+    if hash_maps and session is not None:
+      refs = file_references(dt.path, session)
+      if refs is not None:
+        s['file_references'] = refs
 
   if hasattr(dt, 'database_fetch'):
     s['database_fetch'] = dt.database_fetch
@@ -344,7 +374,8 @@ def state_from_grid_data(data, session_path = None, include_maps = False):
     s['available_subsamplings'] = ass = {}
     for csize, ssdata in dt.available_subsamplings.items():
       if ssdata.path != dt.path:
-        ass[csize] = state_from_grid_data(ssdata, session_path)
+        ass[csize] = state_from_grid_data(ssdata, session_path, hash_maps = hash_maps,
+                                          session = session)
 
   return s
 
@@ -352,9 +383,18 @@ def state_from_grid_data(data, session_path = None, include_maps = False):
 #
 def grid_data_from_state(s, gdcache, session, file_paths):
 
-  if 'array' in s:
+  if 'array' in s or 'array_reference' in s:
     compression = s.get('array_compression')
-    if compression == 'none':
+    if 'array_reference' in s:
+      checksum, size = s['array_reference']
+      from .mapstore import map_store
+      store = map_store(session)
+      bytes = None if store is None else store.read_bytes(checksum, size)
+      if bytes is None:
+        session.logger.warning('Map %s array %s was not found in the map store'
+                               % (s['name'], checksum))
+        return None
+    elif compression == 'none':
       bytes = s['array']
     else:
       from gzip import decompress
@@ -377,7 +417,8 @@ def grid_data_from_state(s, gdcache, session, file_paths):
     if s.get('series_index',0) >= 1 or s.get('time',0) >= 1:
       ask = False
     path = absolute_path(s['path'], file_paths, ask = ask,
-                         base_path = session.session_file_path)
+                         base_path = session.session_file_path,
+                         refs = s.get('file_references'))
     empty_path = (path is None or path == '' or path == () or path == [])
     if empty_path and dbfetch is None:
       return None
@@ -431,7 +472,8 @@ def grid_data_from_state(s, gdcache, session, file_paths):
       dslist.append(data)
     dlist = dslist
     for cell_size, dstate in s['available_subsamplings'].items():
-      dpath = absolute_path(dstate['path'], file_paths, base_path = session.session_file_path)
+      dpath = absolute_path(dstate['path'], file_paths, base_path = session.session_file_path,
+                            refs = dstate.get('file_references'))
       if dpath != path:
         ssdata = grid_data_from_state(dstate, gdcache, session, file_paths)
         if len(ssdata) == 1:
@@ -0,0 +1,22 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+from chimerax.core.settings import Settings
+
+class _MapSettings(Settings):
+    AUTO_SAVE = {
+        'map_store': '',		# Directory of map files named by checksum
+        'map_search_path': [],	# Directories searched for moved map files
+    }
+
+# 'settings' module attribute will be set by the initialization of the bundle API
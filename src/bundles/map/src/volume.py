@@ -63,6 +63,9 @@ class Volume(Model):
     
     self.matrix_stats = None
     self._matrix_id = 1          # Incremented when shape or values change.
+    self._precomputed_contours = {}	# Map (level, cap_faces) to matrix, vertices, triangles, normals
+    from threading import Lock
+    self._precomputed_lock = Lock()
 
     rlist = Region_List()
     ijk_min, ijk_max = self.region[:2]
@@ -544,6 +547,40 @@ class Volume(Model):
     self.matrix_stats = None
     self._matrix_id += 1
     self._drawings_need_update()
+
+  # ---------------------------------------------------------------------------
+  # Contour surfaces can be computed in advance, for instance in a thread
+  # reading ahead while playing a map series.  A precomputed surface is used
+  # once, when contouring the same matrix array at the same level.  Contouring
+  # discards precomputed surfaces for other matrices or for levels no longer
+  # shown, so they do not keep matrices from being released.
+  #
+  def add_precomputed_contour(self, matrix, level, cap_faces, vertices, triangles, normals):
+    '''
+    Record a contour surface of matrix, as returned by matrix(), in grid
+    index coordinates as computed by _map.contour_surface().  Can be called
+    from any thread.
+    '''
+    with self._precomputed_lock:
+      self._precomputed_contours[(level, cap_faces)] = (matrix, vertices, triangles, normals)
+
+  def clear_precomputed_contours(self):
+    with self._precomputed_lock:
+      self._precomputed_contours.clear()
+
+  def _take_precomputed_contour(self, matrix, level, cap_faces):
+    levels = set(s.level for s in self.surfaces)
+    with self._precomputed_lock:
+      pcs = self._precomputed_contours
+      if not pcs:
+        return None
+      pc = pcs.pop((level, cap_faces), None)
+      for key, (m, va, ta, na) in tuple(pcs.items()):
+        if m is not matrix or key[0] not in levels:
+          del pcs[key]
+    if pc is None or pc[0] is not matrix:
+      return None
+    return pc[1:]
       
   # ---------------------------------------------------------------------------
   # Handle ijk_min, ijk_max, ijk_step as lists or tuples.
@@ -1821,10 +1858,12 @@ class Volume(Model):
     from .session import state_from_map, grid_data_state
     from chimerax.core.state import State
     include_maps = bool(flags & State.INCLUDE_MAPS)
+    hash_maps = bool(flags & State.MAP_HASHES)
     data = {
       'model state': Model.take_snapshot(self, session, flags),
       'volume state': state_from_map(self),
-      'grid data state': grid_data_state(self.data, session, include_maps=include_maps),
+      'grid data state': grid_data_state(self.data, session, include_maps=include_maps,
+                                         hash_maps=hash_maps),
       'version': 1,
     }
     return data
@@ -1985,6 +2024,8 @@ class VolumeSurface(Surface):
     Surface.set_color(self, color)	# Don't set self.rgba since that calls color changed volume callback
     self._contour_settings = {}	         	# Settings for current surface geometry
     self._min_status_message_voxels = 2**24	# Show status messages only on big surface calculations
+    self._min_block_contour_voxels = 2**25	# Contour big maps in blocks on multiple threads
+    self._block_contour = None			# BlockContour and matrix id for last surface
     self._use_thread = False			# Whether to compute next surface in thread
     self._surf_calc_thread = None
     self.clip_cap = True			# Cap surface when clipped
@@ -2079,6 +2120,7 @@ class VolumeSurface(Surface):
     
     v = self.volume
     matrix = v.matrix()
+    matrix_id = v._matrix_id
     level = self.level
     
     show_status = (matrix.size >= self._min_status_message_voxels)
@@ -2087,14 +2129,15 @@ class VolumeSurface(Surface):
 
     if self._use_thread:
       self._use_thread = False
-      self._calc_surface_in_thread(matrix, level, rendering_options)
+      self._calc_surface_in_thread(matrix, level, rendering_options, matrix_id)
       return
     else:
       # Don't use thread calculation started earlier since new non-threaded calculation has begun.
       self._surf_calc_thread = None
       
     try:
-      va, na, ta, hidden_edges = self._calculate_contour_surface(matrix, level, rendering_options)
+      va, na, ta, hidden_edges = self._calculate_contour_surface(matrix, level, rendering_options,
+                                                                 matrix_id)
     except MemoryError:
       ses = v.session
       ses.warning('Ran out of memory contouring at level %.3g.\n' % level +
@@ -2110,7 +2153,7 @@ class VolumeSurface(Surface):
 
   # ---------------------------------------------------------------------------
   #
-  def _calc_surface_in_thread(self, matrix, level, rendering_options):
+  def _calc_surface_in_thread(self, matrix, level, rendering_options, matrix_id = None):
     sct = self._surf_calc_thread
     new_thread = (sct is None or not sct.is_alive())
     if new_thread:
@@ -2128,7 +2171,7 @@ class VolumeSurface(Surface):
     except queue.Empty:
       pass
     
-    sct.in_queue.put((matrix, level, rendering_options))
+    sct.in_queue.put((matrix, level, rendering_options, matrix_id))
 
     if new_thread:
       sct.start()	# Start surface calculation in separate thread
@@ -2164,13 +2207,14 @@ class VolumeSurface(Surface):
     
   # ---------------------------------------------------------------------------
   #
-  def _calculate_contour_surface_threaded(self, matrix, level, rendering_options):
-    va, na, ta, hidden_edges = self._calculate_contour_surface(matrix,level, rendering_options)
+  def _calculate_contour_surface_threaded(self, matrix, level, rendering_options, matrix_id = None):
+    va, na, ta, hidden_edges = self._calculate_contour_surface(matrix,level, rendering_options,
+                                                               matrix_id)
     return va, na, ta, hidden_edges, matrix, level, rendering_options
   
   # ---------------------------------------------------------------------------
   #
-  def _calculate_contour_surface(self, matrix, level, rendering_options):
+  def _calculate_contour_surface(self, matrix, level, rendering_options, matrix_id = None):
 
     # _map contour code does not handle single data planes.
     # Handle these by stacking two planes on top of each other.
@@ -2179,10 +2223,19 @@ class VolumeSurface(Surface):
       for a in plane_axis:
         matrix = matrix.repeat(2, axis = a)
 
-    from ._map import contour_surface
-    varray, tarray, narray = contour_surface(matrix, level,
-                                             cap_faces = rendering_options.cap_faces,
-                                             calculate_normals = True)
+    pc = self.volume._take_precomputed_contour(matrix, level, rendering_options.cap_faces)
+    bc = None if pc else self._matrix_block_contour(matrix, matrix_id)
+    if pc:
+      varray, tarray, narray = pc
+    elif bc:
+      varray, tarray, narray = bc.contour_surface(matrix, level,
+                                                  cap_faces = rendering_options.cap_faces,
+                                                  threads = self._block_contour_threads())
+    else:
+      from ._map import contour_surface
+      varray, tarray, narray = contour_surface(matrix, level,
+                                               cap_faces = rendering_options.cap_faces,
+                                               calculate_normals = True)
 
     if plane_axis:
       for a in plane_axis:
@@ -2193,6 +2246,25 @@ class VolumeSurface(Surface):
 
     return va, na, ta, hidden_edges
       
+  # ---------------------------------------------------------------------------
+  # Big maps are contoured in blocks on several threads, reusing the block
+  # surfaces that do not change when the threshold changes.
+  #
+  def _matrix_block_contour(self, matrix, matrix_id):
+    if (matrix_id is None or matrix.size < self._min_block_contour_voxels
+        or min(matrix.shape) < 2 or self._block_contour_threads() < 2):
+      self._block_contour = None
+      return None
+    bcid = self._block_contour
+    if bcid is None or bcid[1] != matrix_id or bcid[0].shape != tuple(matrix.shape):
+      from .blockcontour import BlockContour
+      self._block_contour = bcid = (BlockContour(matrix.shape), matrix_id)
+    return bcid[0]
+
+  def _block_contour_threads(self):
+    from os import cpu_count
+    return cpu_count() or 1
+
   # ---------------------------------------------------------------------------
   #
   def _adjust_surface_geometry(self, varray, narray, tarray, rendering_options, level):
@@ -3349,6 +3421,8 @@ def data_cache(session):
     size = ds['data_cache_size'] * (2**20)
     from chimerax.map_data import datacache
     session._volume_data_cache = dc = datacache.Data_Cache(size = size)
+    # Optionally keep one map or map series from filling the cache.
+    dc.set_default_group_limit(ds['data_cache_map_fraction'])
   return dc
 
 # -----------------------------------------------------------------------------
@@ -63,6 +63,7 @@ def register_volume_command(logger):
                ('coordinate_system', CoordSysArg),
 # Global options.
                ('data_cache_size', FloatArg),
+               ('data_cache_map_fraction', FloatArg),
                ('show_on_open', BoolArg),
                ('voxel_limit_for_open', FloatArg),
                ('show_plane', BoolArg),
@@ -119,6 +120,11 @@ def register_volume_command(logger):
                              synopsis = 'report volume display settings')
     register('volume settings', vsettings_desc, volume_settings, logger=logger)
 
+    vstore_desc = CmdDesc(keyword = [('directory', StringArg),
+                                     ('search_path', StringArg)],
+                          synopsis = 'set where maps referenced by checksum in sessions are found')
+    register('volume store', vstore_desc, volume_store, logger=logger)
+
     # Register volume subcommands for filtering operations.
     from chimerax import map_filter
     map_filter.register_volume_filtering_subcommands(logger)
@@ -162,6 +168,7 @@ def volume(session,
            coordinate_system = None,
 # Global options.
            data_cache_size = None,
+           data_cache_map_fraction = None,
            show_on_open = None,
            voxel_limit_for_open = None,
            show_plane = None,
@@ -260,6 +267,8 @@ def volume(session,
 
     data_cache_size : float
       In Mbytes
+    data_cache_map_fraction : float
+      Largest fraction of the data cache one map or map series can use, 0 for no limit
     show_on_open : bool
     voxel_limit_for_open : float
     show_plane : bool
@@ -360,7 +369,7 @@ def volume(session,
             loc[opt] = value
 
     # Adjust global settings.
-    gopt = ('data_cache_size', 'show_on_open', 'voxel_limit_for_open',
+    gopt = ('data_cache_size', 'data_cache_map_fraction', 'show_on_open', 'voxel_limit_for_open',
             'show_plane', 'voxel_limit_for_plane')
     if volumes is None:
         gopt += ('pickable',)
@@ -420,6 +429,14 @@ def apply_global_settings(session, gsettings):
     from .volume import default_settings
     default_settings(session).update(gsettings)
 
+    if 'data_cache_map_fraction' in gsettings:
+        f = gsettings['data_cache_map_fraction']
+        if f <= 0:
+            f = None     # No limit
+            default_settings(session).set('data_cache_map_fraction', f)
+        from .volume import data_cache
+        data_cache(session).set_default_group_limit(f)
+
     if 'data_cache_size' in gsettings:
         from .volume import data_cache
         dc = data_cache(session)
@@ -715,8 +732,40 @@ def volume_settings(session, volumes = None):
         from . import Volume
         volumes = session.models.list(type = Volume)
     msg = '\n\n'.join(volume_settings_text(v) for v in volumes)
+    from .volume import data_cache
+    msg += '\n\nData cache: %s' % data_cache(session).statistics_text()
     session.logger.info(msg)
     
+# -----------------------------------------------------------------------------
+#
+def volume_store(session, directory = None, search_path = None):
+    '''
+    Set where map files are found when restoring sessions saved with
+    map references by checksum.  Settings are remembered in later sessions.
+
+    Parameters
+    ----------
+    directory : string
+      Map store directory where sessions saved with map references by checksum
+      put copies of map files and arrays, named by checksum, so that maps
+      used by many sessions are stored once.  An empty string turns off the store.
+    search_path : string
+      Directories, separated by the operating system path separator (":" on
+      Linux and Mac, ";" on Windows), searched for map files that have moved
+      since a session was saved.  An empty string clears the search path.
+    '''
+    from .settings import settings
+    if directory is not None:
+        settings.map_store = directory
+    if search_path is not None:
+        from os import pathsep
+        settings.map_search_path = [d for d in search_path.split(pathsep) if d]
+
+    if directory is None and search_path is None:
+        store = settings.map_store or 'none'
+        spath = ', '.join(settings.map_search_path) or 'none'
+        session.logger.info('Map store %s, search path %s' % (store, spath))
+
 # -----------------------------------------------------------------------------
 #
 def volume_settings_text(v):
@@ -12,7 +12,7 @@
 # -----------------------------------------------------------------------------
 # CCP4 density map file reader.
 #
-def open(path):
+def open(path, memory_map = False):
 
   from .ccp4_grid import CCP4Grid
-  return [CCP4Grid(path)]
+  return [CCP4Grid(path, memory_map = memory_map)]
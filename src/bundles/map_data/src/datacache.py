@@ -15,6 +15,18 @@
 # Maintain a cache of data objects using a limited amount of memory.
 # The least recently accessed data is released first.
 #
+# Entries are kept in access order so looking up data and releasing the
+# oldest data take constant time.  Data still referenced outside the cache
+# is not released since that would not free any memory, and is moved to the
+# recently used end when found while releasing.  If not enough data can be
+# released, lookups do not try again until data is added, removed or the
+# cache is resized.  Groups of data, for example the arrays of one map or of
+# one map series, can be limited to a fraction of the cache size, either each
+# group separately or all groups with a default limit.  There is no default
+# limit unless one is set.  Byte
+# totals for each group are kept as data is added and removed.  A lock allows
+# threads reading data in the background to add to the cache.
+#
 
 # -----------------------------------------------------------------------------
 #
@@ -25,98 +37,210 @@ class Data_Cache:
     self.size = size
     self.used = 0
     self.time = 1
-    self.data = {}
-    self.groups = {}
+    from collections import OrderedDict
+    self.data = OrderedDict()	# Least recently used first.
+    self.groups = {}		# Maps group to OrderedDict of data.
+    self.group_bytes = {}	# Maps group to bytes used.
+    from weakref import WeakKeyDictionary
+    self.group_limits = WeakKeyDictionary()	# Maps group to maximum fraction of cache size.
+    self.default_group_limit = None	# Fraction for groups without their own limit.
+    self._release_blocked = False	# Last release could not free enough.
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    from threading import RLock
+    self._lock = RLock()
 
   # ---------------------------------------------------------------------------
   #
   def cache_data(self, key, value, size, description, groups = []):
 
-    self.remove_key(key)
-    d = Cached_Data(key, value, size, description,
-                    self.time_stamp(), groups)
-    self.data[key] = d
+    with self._lock:
+      self._remove_key(key)
+      d = Cached_Data(key, value, size, description,
+                      self.time_stamp(), groups)
+      self.data[key] = d
 
-    for g in groups:
-      gtable = self.groups
-      if not g in gtable:
-        gtable[g] = []
-      gtable[g].append(d)
+      gtable, gbytes = self.groups, self.group_bytes
+      for g in groups:
+        if not g in gtable:
+          from collections import OrderedDict
+          gtable[g] = OrderedDict()
+          gbytes[g] = 0
+        gtable[g][key] = d
+        gbytes[g] += size
 
-    self.used = self.used + size
-    self.reduce_use()
+      self.used = self.used + size
+      self._release_blocked = False
+      for g in groups:
+        self._reduce_group_use(g)
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
   def lookup_data(self, key):
 
-    data = self.data
-    if key in data:
-      d = data[key]
-      d.last_access = self.time_stamp()
-      v = d.value
-    else:
-      v = None
-    self.reduce_use()
+    with self._lock:
+      data = self.data
+      d = data.get(key)
+      if d is None:
+        self.misses += 1
+        v = None
+      else:
+        self.hits += 1
+        self._touch(d)
+        v = d.value
+      self.reduce_use()
     return v
 
   # ---------------------------------------------------------------------------
   #
   def remove_key(self, key):
 
-    data = self.data
-    if key in data:
-      self.remove_data(data[key])
-    self.reduce_use()
+    with self._lock:
+      self._remove_key(key)
+      self._release_blocked = False
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
-  def group_keys_and_data(self, group):
+  def _remove_key(self, key):
+
+    d = self.data.get(key)
+    if d is not None:
+      self.remove_data(d)
 
-    groups = self.groups
-    if not group in groups:
-      return []
+  # ---------------------------------------------------------------------------
+  #
+  def group_keys_and_data(self, group):
 
-    kd = [(d.key, d.value) for d in groups[group]]
+    with self._lock:
+      gdata = self.groups.get(group)
+      if gdata is None:
+        return []
+      kd = [(d.key, d.value) for d in gdata.values()]
     return kd
 
+  # ---------------------------------------------------------------------------
+  #
+  def group_size(self, group):
+
+    with self._lock:
+      size = self.group_bytes.get(group, 0)
+    return size
+
+  # ---------------------------------------------------------------------------
+  # Limit the bytes used by one group of data to a fraction of the cache
+  # size, or remove the limit if fraction is None.  Data in the group is
+  # also subject to the total cache size.  The group object is weakly
+  # referenced.
+  #
+  def set_group_limit(self, group, fraction):
+
+    with self._lock:
+      if fraction is None:
+        self.group_limits.pop(group, None)
+      else:
+        self.group_limits[group] = fraction
+        self._reduce_group_use(group)
+
+  # ---------------------------------------------------------------------------
+  # Limit the bytes used by each group of data without its own limit to a
+  # fraction of the cache size, or remove the limit if fraction is None.
+  #
+  def set_default_group_limit(self, fraction):
+
+    with self._lock:
+      self.default_group_limit = fraction
+      self._release_blocked = False
+      for g in tuple(self.groups.keys()):
+        self._reduce_group_use(g)
+
   # ---------------------------------------------------------------------------
   #
   def resize(self, size):
 
-    self.size = size
-    self.reduce_use()
+    with self._lock:
+      self.size = size
+      self._release_blocked = False
+      for g in tuple(self.groups.keys()):
+        self._reduce_group_use(g)
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
   def reduce_use(self):
 
-    if self.used <= self.size:
+    with self._lock:
+      if self.used > self.size and not self._release_blocked:
+        if not self._release_unused(self.data, self.used - self.size):
+          self._release_blocked = True
+
+  # ---------------------------------------------------------------------------
+  #
+  def _reduce_group_use(self, group):
+
+    fraction = self.group_limits.get(group, self.default_group_limit)
+    if fraction is None:
       return
 
-    data = self.data
-    dlist = list(data.values())
-    dlist.sort(key = lambda d: d.last_access)
+    limit = fraction * self.size
+    gsize = self.group_bytes.get(group, 0)
+    if gsize > limit:
+      self._release_unused(self.groups[group], gsize - limit)
+
+  # ---------------------------------------------------------------------------
+  # Release least recently used data not referenced outside the cache
+  # until the requested number of bytes is freed.  Returns whether that
+  # many bytes were freed.  Referenced data is treated as recently used.
+  #
+  def _release_unused(self, data, bytes):
+
     import sys
-    for d in dlist:
+    freed = 0
+    release, in_use = [], []
+    for d in data.values():
+      # Only references are Cached_Data object and getrefcount() argument.
       if sys.getrefcount(d.value) == 2:
-        self.remove_data(d)
-        if self.used <= self.size:
+        release.append(d)
+        freed += d.size
+        if freed >= bytes:
           break
+      else:
+        in_use.append(d)
+    for d in release:
+      self.remove_data(d)
+      self.evictions += 1
+    for d in in_use:
+      self._touch(d)
+    return freed >= bytes
 
   # ---------------------------------------------------------------------------
   #
   def remove_data(self, d):
 
-    del self.data[d.key]
-    self.used = self.used - d.size
-    d.value = None
+    with self._lock:
+      del self.data[d.key]
+      self.used = self.used - d.size
+      d.value = None
+
+      for g in d.groups:
+        gdata = self.groups[g]
+        del gdata[d.key]
+        self.group_bytes[g] -= d.size
+        if len(gdata) == 0:
+          del self.groups[g]
+          del self.group_bytes[g]
 
+  # ---------------------------------------------------------------------------
+  #
+  def _touch(self, d):
+
+    d.last_access = self.time_stamp()
+    key = d.key
+    self.data.move_to_end(key)
     for g in d.groups:
-      dlist = self.groups[g]
-      dlist.remove(d)
-      if len(dlist) == 0:
-        del self.groups[g]
+      self.groups[g].move_to_end(key)
 
   # ---------------------------------------------------------------------------
   #
@@ -126,6 +250,31 @@ class Data_Cache:
     self.time = t + 1
     return t
 
+  # ---------------------------------------------------------------------------
+  #
+  def statistics(self):
+
+    with self._lock:
+      stats = {'count': len(self.data),
+               'used': self.used,
+               'size': self.size,
+               'hits': self.hits,
+               'misses': self.misses,
+               'evictions': self.evictions}
+    return stats
+
+  # ---------------------------------------------------------------------------
+  #
+  def statistics_text(self):
+
+    s = self.statistics()
+    mb = float(2**20)
+    lookups = s['hits'] + s['misses']
+    hit_pct = (100.0 * s['hits'] / lookups) if lookups else 0
+    return ('%d objects using %.0f of %.0f Mbytes, %d hits, %d misses (%.0f%% hits), %d evictions'
+            % (s['count'], s['used']/mb, s['size']/mb,
+               s['hits'], s['misses'], hit_pct, s['evictions']))
+
 # -----------------------------------------------------------------------------
 #
 class Cached_Data:
@@ -132,6 +132,7 @@ class GridData:
     self.channel = channel		# Integer, channel number for multi-channel data
 
     self.data_cache = None
+    self.cache_groups = []		# Additional data cache groups, e.g. map series
 
     self.writable = False
     self.change_callbacks = []
@@ -458,7 +459,7 @@ class GridData:
     key = (self, tuple(origin), tuple(size), tuple(step))
     elements = m.size
     bytes = elements * m.itemsize
-    groups = [self]
+    groups = [self] + self.cache_groups
     descrip = self.data_description(origin, size, step)
     dcache.cache_data(key, m, bytes, descrip, groups)
 
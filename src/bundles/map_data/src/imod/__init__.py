@@ -13,7 +13,7 @@
 # IMOD mrc density map file reader.  IMOD uses mrc signed 8-bit mode as
 # unsigned.
 #
-def open(path):
+def open(path, memory_map = False):
 
   from .imod_grid import IMODGrid
-  return [IMODGrid(path)]
+  return [IMODGrid(path, memory_map = memory_map)]
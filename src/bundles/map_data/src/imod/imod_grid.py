@@ -18,8 +18,8 @@ from ..mrc.mrc_grid import MRCGrid
 #
 class IMODGrid(MRCGrid):
 
-  def __init__(self, path):
-    MRCGrid.__init__(self, path, file_type = 'imod')
+  def __init__(self, path, memory_map = False):
+    MRCGrid.__init__(self, path, file_type = 'imod', memory_map = memory_map)
   
   # ---------------------------------------------------------------------------
   #
@@ -31,6 +31,11 @@ class IMODGrid(MRCGrid):
     if self.value_type == numpy.uint8:
       # Invert 8-bit unsigned map.  Most commonly this is tomography data
       # with low map values corresponding to high density values.
-      numpy.subtract(255, d, d)
+      if isinstance(d, numpy.memmap):
+        # Inverting a copy-on-write memory map in place would copy every page
+        # of the subregion, so write the inverted values to a new array.
+        d = numpy.subtract(255, d, dtype = numpy.uint8)
+      else:
+        numpy.subtract(255, d, d)
 
     return d
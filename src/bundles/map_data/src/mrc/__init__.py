@@ -18,7 +18,7 @@ from .writemrc import write_mrc2000_grid_data as save
 
 # -----------------------------------------------------------------------------
 #
-def open(path):
+def open(path, memory_map = False):
 
   from .mrc_grid import MRCGrid
-  return [MRCGrid(path)]
+  return [MRCGrid(path, memory_map = memory_map)]
@@ -19,9 +19,10 @@
 #
 class MRC_Data:
 
-  def __init__(self, path, file_type):
+  def __init__(self, path, file_type, memory_map = False):
 
     self.path = path
+    self.memory_map = memory_map
 
     import os.path
     self.name = os.path.basename(path)
@@ -284,7 +285,7 @@ class MRC_Data:
     matrix = read_array(self.path, self.data_offset,
                         crs_origin, crs_size, crs_step,
                         self.matrix_size, self.element_type, self.swap_bytes,
-                        progress)
+                        progress, memory_map = self.memory_map)
     if not matrix is None:
       matrix = self.permute_matrix_to_xyz_axis_order(matrix)
     
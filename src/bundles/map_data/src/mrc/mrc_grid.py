@@ -18,10 +18,10 @@ from .. import GridData
 #
 class MRCGrid(GridData):
 
-  def __init__(self, path, file_type = 'mrc'):
+  def __init__(self, path, file_type = 'mrc', memory_map = False):
 
     from . import mrc_format
-    d = mrc_format.MRC_Data(path, file_type)
+    d = mrc_format.MRC_Data(path, file_type, memory_map = memory_map)
 
     self.mrc_data = d
 
@@ -19,7 +19,13 @@
 # The numpy.fromfile() routine can't read into an existing array.
 #
 def read_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
-               full_size, type, byte_swap, progress = None):
+               full_size, type, byte_swap, progress = None,
+               memory_map = False):
+
+    if memory_map and not byte_swap:
+        m = memory_mapped_array(path, byte_offset, ijk_origin, ijk_size,
+                                ijk_step, full_size, type)
+        return m
 
     if (tuple(ijk_origin) == (0,0,0) and
         tuple(ijk_size) == tuple(full_size) and
@@ -94,6 +100,35 @@ def read_full_array(path, byte_offset, size, type, byte_swap,
 
     return a
 
+# -----------------------------------------------------------------------------
+# Return a subregion of a binary file array as a view of a memory mapped file.
+# No data is read until array values are accessed, and pages of the file are
+# shared through the operating system page cache with other processes that
+# map the same file.  Subregions and steps are strided views, no copy is made.
+#
+# The mapping is copy-on-write so code that modifies the returned array in
+# place does not change the file.  Byte swapped data is not mapped since
+# C++ routines require native byte order, read_array() copies it instead.
+#
+def memory_mapped_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
+                        full_size, type):
+
+    shape = tuple(reversed(tuple(full_size)))
+    from numpy import memmap
+    try:
+        m = memmap(path, dtype = type, mode = 'c',
+                   offset = byte_offset, shape = shape)
+    except (ValueError, OSError) as e:
+        from chimerax.core.errors import UserError
+        raise UserError('Could not memory map file %s: %s' % (path, str(e)))
+
+    io, jo, ko = ijk_origin
+    isize, jsize, ksize = ijk_size
+    istep, jstep, kstep = ijk_step
+    v = m[ko:ko+ksize:kstep, jo:jo+jsize:jstep, io:io+isize:istep]
+
+    return v
+
 # -----------------------------------------------------------------------------
 # Read ascii float values on as many lines as needed to get count values.
 #
@@ -51,13 +51,19 @@ def median_grid(volume, bin_size = 3, iterations = 1,
 # -----------------------------------------------------------------------------
 # Volume border of result is set to zero.  Bin size must be odd.
 #
-def median_array(m, bin_size=3):
+# Integer maps with few distinct values (e.g. masks and segmentations) are
+# filtered by counting for each value how many neighbors are at or below
+# it using separable box sums.  Other maps are filtered in blocks of z planes
+# by partitioning the neighborhood values of each grid point, with blocks
+# computed in parallel threads and block size limiting the memory used.
+#
+def median_array(m, bin_size=3, threads = None, block_bytes = 2**26):
 
   if isinstance(bin_size, int):
     bin_size = (bin_size, bin_size, bin_size)
   si,sj,sk= bin_size
 
-  from numpy import zeros, empty, median
+  from numpy import zeros
   mm = zeros(m.shape, m.dtype)
 
   if m.shape[0] < sk or m.shape[1] < sj or m.shape[2] < si:
@@ -65,19 +71,90 @@ def median_array(m, bin_size=3):
 
   ksize, jsize, isize = m.shape
   hsi,hsj,hsk = [(n-1)//2 for n in bin_size]
-  pn = empty((jsize-2*hsj,isize-2*hsi,si*sj*sk), m.dtype)
+  window = (2*hsk+1, 2*hsj+1, 2*hsi+1)
+  mi = mm[hsk:ksize-hsk,hsj:jsize-hsj,hsi:isize-hsi]
 
-  for k in range(hsk,ksize-hsk):
-    c = 0
-    for ko in range(-hsk,hsk+1):
-      for jo in range(-hsj,hsj+1):
-        for io in range(-hsi,hsi+1):
-          pn[:,:,c] = m[k+ko,hsj+jo:jsize-hsj+jo,hsi+io:isize-hsi+io]
-          c += 1
-    mm[k,hsj:jsize-hsj,hsi:isize-hsi] = median(pn,axis=2)
+  levels = _quantized_levels(m, window)
+  if levels is None:
+    _median_by_partition(m, window, mi, threads, block_bytes)
+  else:
+    _median_by_level_counts(m, window, levels, mi)
 
   return mm
 
+# -----------------------------------------------------------------------------
+# Return distinct values of an integer array if there are few enough that
+# counting is faster than partitioning, otherwise return None.
+#
+def _quantized_levels(m, window):
+
+  if m.dtype.kind not in 'iub' or m.itemsize > 2:
+    return None
+  from numpy import unique
+  levels = unique(m)
+  wk, wj, wi = window
+  if 4*len(levels) >= wk*wj*wi:
+    return None
+  return levels
+
+# -----------------------------------------------------------------------------
+#
+def _median_by_partition(m, window, mi, threads, block_bytes):
+
+  wk, wj, wi = window
+  nw = wk*wj*wi
+  ko, jo, io = mi.shape
+  plane_bytes = jo * io * nw * m.itemsize
+  kstep = max(1, min(ko, block_bytes // plane_bytes))
+
+  from numpy.lib.stride_tricks import as_strided
+  def median_planes(k0, k1):
+    b = m[k0:k1+wk-1]
+    wshape = (k1-k0, jo, io, wk, wj, wi)
+    w = as_strided(b, wshape, b.strides + b.strides)
+    a = w.reshape((k1-k0, jo, io, nw))	# Copies neighborhood values.
+    a.partition(nw//2, axis = 3)
+    mi[k0:k1] = a[:,:,:,nw//2]
+
+  blocks = [(k, min(k+kstep, ko)) for k in range(0, ko, kstep)]
+  from chimerax.core.threadq import apply_to_list
+  apply_to_list(median_planes, blocks, threads)
+
+# -----------------------------------------------------------------------------
+# Median is the smallest value for which at least half the neighborhood
+# values are at or below it.
+#
+def _median_by_level_counts(m, window, levels, mi):
+
+  wk, wj, wi = window
+  half = (wk*wj*wi + 1) // 2
+  from numpy import zeros
+  done = zeros(mi.shape, bool)
+  for level in levels:
+    count = _box_sums(m <= level, window)
+    new = (count >= half)
+    new &= ~done
+    mi[new] = level
+    done |= new
+    if done.all():
+      break
+
+# -----------------------------------------------------------------------------
+# Sum array values over a sliding box, result is the size of the box centers
+# that lie entirely inside the array.
+#
+def _box_sums(a, window):
+
+  from numpy import cumsum, moveaxis, int32
+  s = a
+  for axis, w in enumerate(window):
+    n = s.shape[axis]
+    c = moveaxis(cumsum(s, axis = axis, dtype = int32), axis, 0)
+    r = c[w-1:].copy()
+    r[1:] -= c[:n-w]
+    s = moveaxis(r, 0, axis)
+  return s
+
 # -----------------------------------------------------------------------------
 # Test volume data set of size n containing a sphere of radius r (index units)
 # with Gaussian noise.
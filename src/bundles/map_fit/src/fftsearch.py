@@ -0,0 +1,149 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Exhaustive search of placements of a model in a map.  Rotations are sampled
+# on a uniform grid and for each rotation the overlap score for all
+# translations on the map grid is computed at once by FFT cross-correlation.
+# The best scoring placements are returned as starting positions for local
+# optimization by fit_search().
+#
+# Points should be in volume local coordinates.  The overlap of points placed
+# at grid point offsets computed by spreading point weights onto the 8
+# nearest grid points equals the sum of trilinearly interpolated map values.
+#
+def fft_placements(points, point_weights, volume, n,
+                   angle_step = 30, peaks_per_rotation = 3,
+                   request_stop_cb = None):
+
+    from numpy import float32, float64, ones, array, ceil, sqrt
+    if point_weights is None:
+        point_weights = ones((len(points),), float32)
+
+    center = points.mean(axis=0)
+    ijk_to_xyz_tf = volume.matrix_indices_to_xyz_transform(step = 1)
+    xyz_to_ijk_tf = ijk_to_xyz_tf.inverse()
+    data_array = volume.matrix(step = 1)
+
+    # Size of probe grid enclosing the points in any orientation.
+    ijk_to_xyz_axes = ijk_to_xyz_tf.zero_translation()
+    xyz_to_ijk_axes = xyz_to_ijk_tf.zero_translation()
+    r = sqrt(((points - center)**2).sum(axis = 1).max())
+    ijk_radius = r / min(ijk_to_xyz_axes.axes_lengths())
+    psize = int(ceil(2*ijk_radius)) + 2
+
+    # Zero pad target map so correlation does not wrap around.
+    from chimerax.map_filter.gaussian import efficient_fft_size
+    tshape = data_array.shape
+    fshape = tuple(efficient_fft_size(s + psize) for s in tshape)
+    from numpy import zeros
+    t = zeros(fshape, float32)
+    t[:tshape[0],:tshape[1],:tshape[2]] = data_array
+    from numpy.fft import rfftn, irfftn
+    tft = rfftn(t)
+    del t
+
+    rotations = uniform_rotations(angle_step)
+    nrot = len(rotations)
+    min_peak_separation = max(1, int(ijk_radius / 2))
+    candidates = []
+    from numpy import conjugate
+    from chimerax.geometry import translation
+    ctf = translation(-center)
+    for ri, rot in enumerate(rotations):
+        if request_stop_cb and request_stop_cb('Rotation %d of %d' % (ri+1, nrot)):
+            break
+        # Rotated points in grid index units relative to center.
+        q = (xyz_to_ijk_axes * rot).transform_points(points - center)
+        qmin = q.min(axis = 0).astype(int) - 1
+        q -= qmin
+        p = zeros(fshape, float32)
+        p[:psize+1,:psize+1,:psize+1] = splat_points(q, point_weights, (psize+1,)*3)
+        c = irfftn(tft * conjugate(rfftn(p)), s = fshape, axes = (0,1,2))
+        for score, shift in correlation_peaks(c, peaks_per_rotation,
+                                              min_peak_separation):
+            # Shift is the target grid index of probe grid index (0,0,0).
+            ijk = [s if s < fs - psize else s - fs
+                   for s, fs in zip(shift[::-1], fshape[::-1])]
+            ijk_center = array(ijk, float64) - qmin
+            xyz_center = ijk_to_xyz_tf * ijk_center
+            tf = translation(xyz_center) * rot * ctf
+            candidates.append((score, tf))
+
+    candidates.sort(key = lambda st: st[0], reverse = True)
+    return candidates[:n]
+
+# -----------------------------------------------------------------------------
+# Add point weights to the 8 nearest grid points in proportion to the
+# trilinear interpolation weights.  Points are ijk grid indices.
+#
+def splat_points(ijk, weights, shape):
+
+    from numpy import floor, zeros, bincount, float32, float64
+    i0 = floor(ijk).astype(int)
+    f = ijk - i0
+    ksize, jsize, isize = shape
+    a = zeros((ksize*jsize*isize,), float64)
+    n = len(a)
+    for di in (0,1):
+        wi = f[:,0] if di else 1-f[:,0]
+        for dj in (0,1):
+            wj = f[:,1] if dj else 1-f[:,1]
+            for dk in (0,1):
+                wk = f[:,2] if dk else 1-f[:,2]
+                offsets = (((i0[:,2]+dk) * jsize + (i0[:,1]+dj)) * isize
+                           + (i0[:,0]+di))
+                a += bincount(offsets, weights = weights*wi*wj*wk,
+                              minlength = n)
+    return a.reshape(shape).astype(float32)
+
+# -----------------------------------------------------------------------------
+# Return the highest values of a 3d array and their indices, keeping only
+# peaks separated by at least the given number of grid points.
+#
+def correlation_peaks(c, count, min_separation):
+
+    from numpy import argpartition, unravel_index
+    cf = c.ravel()
+    m = min(len(cf), 64*count)
+    top = argpartition(cf, -m)[-m:]
+    top = top[cf[top].argsort()[::-1]]
+    peaks = []
+    for ti in top:
+        kji = unravel_index(ti, c.shape)
+        if all(max(abs(kji[a] - p[1][a]) for a in (0,1,2)) >= min_separation
+               for p in peaks):
+            peaks.append((float(cf[ti]), kji))
+            if len(peaks) >= count:
+                break
+    return peaks
+
+# -----------------------------------------------------------------------------
+# Rotations sampled approximately uniformly with the given spacing in degrees.
+# Rotation axis z directions are spread uniformly over the sphere and for
+# each direction rotations about that direction are spaced by angle_step.
+#
+def uniform_rotations(angle_step):
+
+    from math import pi, radians
+    a = radians(angle_step)
+    ndir = max(1, int(round(4*pi / (a*a))))
+    nspin = max(1, int(round(360 / angle_step)))
+    from chimerax.geometry.sphere import sphere_points
+    from chimerax.geometry import orthonormal_frame, rotation
+    spins = [rotation((0,0,1), i*360.0/nspin) for i in range(nspin)]
+    rotations = []
+    for z in sphere_points(ndir):
+        f = orthonormal_frame(z)
+        rotations.extend([f * s for s in spins])
+    return rotations
@@ -17,7 +17,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
            metric = None, envelope = True, zeros = False, resolution = None,
            shift = True, rotate = True, symmetric = False,
            move_whole_molecules = True,
-           search = 0, placement = 'sr', radius = None,
+           search = 0, placement = 'sr', radius = None, seed = None,
+           search_method = 'random', angle_step = 30,
            cluster_angle = 6, cluster_shift = 3,
            asymmetric_unit = True, level_inside = 0.1, sequence = 0,
            max_steps = 2000, grid_step_min = 0.01, grid_step_max = 0.5,
@@ -85,6 +86,15 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
       Whether random placements should include shift and rotation
     radius : float
       Limits the random placements to within this distance of the starting position.
+    seed : integer
+      Seed for the random placements so that a search can be reproduced.
+      If None then a different seed is used each time.
+    search_method : 'random' or 'fft'
+      Use random initial placements, or score all translations for rotations
+      on a uniform grid with FFT cross-correlation and optimize the best
+      scoring placements.
+    angle_step : float
+      Spacing in degrees of rotations tried by the FFT search method.
     cluster_angle : float
       Rotational difference for a fit to form a new cluster.
     cluster_shift : float
@@ -127,7 +137,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             fits = fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                               mwm, search, placement, radius,
                               cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-                              max_steps, grid_step_min, grid_step_max, log)
+                              max_steps, grid_step_min, grid_step_max, log, seed = seed,
+                              search_method = search_method, angle_step = angle_step)
         elif symmetric:
             fits = [fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
                                              shift, rotate, mwm,
@@ -383,7 +394,8 @@ def fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
 def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                move_whole_molecules, search, placement, radius,
                cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-               max_steps, grid_step_min, grid_step_max, log = None):
+               max_steps, grid_step_min, grid_step_max, log = None, seed = None,
+               search_method = 'random', angle_step = 30):
     
     # TODO: Handle case where not moving whole molecules.
 
@@ -406,16 +418,26 @@ def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
 #    task = tasks.Task("Fit search", modal=True)
     def stop_cb(msg, task = None, log = log):
         return request_stop_cb(msg, task = task, log = log)
+    if search_method == 'fft':
+        from .fftsearch import fft_placements
+        scored = fft_placements(points, point_weights, volume, search,
+                                angle_step = angle_step, request_stop_cb = stop_cb)
+        placements = [tf for score, tf in scored]
+        search = len(placements)
+    else:
+        placements = None
 #    try:
     flist, outside = FS.fit_search(
             mlist, points, point_weights, volume, search, rotations, shifts,
             radius, cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb)
+            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb,
+            seed = seed, placements = placements)
 #    finally:
 #        task.finished()
 
     if log:
-        report_fit_search_results(flist, search, outside, level_inside, log)
+        report_fit_search_results(flist, search, outside, level_inside, log,
+                                  search_method)
     return flist
 
 # -----------------------------------------------------------------------------
@@ -433,10 +455,12 @@ def request_stop_cb(message, task = None, log = None):
 
 # -----------------------------------------------------------------------------
 #
-def report_fit_search_results(flist, search, outside, level_inside, log):
+def report_fit_search_results(flist, search, outside, level_inside, log,
+                              search_method = 'random'):
 
-    log.info('Found %d unique fits from %d random placements ' %
-             (len(flist), search) +
+    ptype = 'FFT search' if search_method == 'fft' else 'random'
+    log.info('Found %d unique fits from %d %s placements ' %
+             (len(flist), search, ptype) +
              'having fraction of points inside contour >= %.3f (%d of %d).\n'
              % (level_inside, search-outside,  search))
 
@@ -576,6 +600,9 @@ def register_fitmap_command(logger):
 # Search options
             ('placement', EnumOf(('sr', 's', 'r'))),
             ('radius', FloatArg),
+            ('seed', IntArg),
+            ('search_method', EnumOf(('random', 'fft'))),
+            ('angle_step', FloatArg),
             ('cluster_angle', FloatArg),
             ('cluster_shift', FloatArg),
             ('asymmetric_unit', BoolArg),
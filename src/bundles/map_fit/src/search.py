@@ -17,6 +17,15 @@
 # Points should be in volume local coordinates.
 # Models can contain atomic models and maps that are the source of the points.
 #
+# Placements are generated from a random number generator with the given seed
+# so results are reproducible, then optimized in batches on several threads.
+# The map array is shared read-only by the threads and the interpolation
+# code releases the Python global lock.  Fits are clustered in placement
+# order so the result does not depend on the number of threads.
+#
+# If a list of placement transforms is given, for instance from the FFT search
+# in fftsearch.py, those are optimized instead of random placements.
+#
 def fit_search(models, points, point_weights, volume, n,
                rotations = True, shifts = True, radius = None,
                angle_tolerance = 6, shift_tolerance = 3,
@@ -26,7 +35,8 @@ def fit_search(models, points, point_weights, volume, n,
                optimize_translation = True, optimize_rotation = True,
                max_steps = 2000,
                ijk_step_size_min = 0.01, ijk_step_size_max = 0.5,
-               request_stop_cb = None):
+               request_stop_cb = None, seed = None, threads = None,
+               placements = None):
 
     bounds = volume.surface_bounds()
     if bounds is None:
@@ -46,22 +56,25 @@ def fit_search(models, points, point_weights, volume, n,
     data_array = volume.matrix(step = 1)
     vtfinv = volume.position.inverse()
     mtv_list = [vtfinv * m.position for m in models]
+    symmetries = volume.data.symmetries
+
+    if placements is None:
+        # Generate all starting placements up front for reproducibility.
+        from random import Random
+        rng = Random(seed)
+        starts = []
+        for i in range(n):
+            shift = ((random_translation(bounds, rng) if radius is None
+                      else random_translation_step(center, radius, rng)) if shifts
+                      else translation(center))
+            rot = random_rotation(rng) if rotations else identity()
+            starts.append((i, shift * rot * ctf))
+    else:
+        starts = list(enumerate(placements))
+        n = len(starts)
 
-    flist = []
-    outside = 0
-    from math import pi
-    from chimerax.geometry import bins
-    b = bins.Binned_Transforms(angle_tolerance*pi/180, shift_tolerance, center)
-    fo = {}
     from .fitmap import locate_maximum
-    for i in range(n):
-        if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
-            break
-        shift = ((random_translation(bounds) if radius is None
-                  else random_translation_step(center, radius)) if shifts
-                  else translation(center))
-        rot = random_rotation() if rotations else identity()
-        tf = shift * rot * ctf
+    def optimize_placement(i, tf):
         optimize = True
         max_opt = 2
         while optimize and max_opt > 0:
@@ -76,22 +89,42 @@ def fit_search(models, points, point_weights, volume, n,
             max_opt -= 1
             if asymmetric_unit:
                 atf = unique_symmetry_position(ptf, center, asym_center,
-                                               volume.data.symmetries)
+                                               symmetries)
                 if not atf is ptf:
                     ptf = tf = atf
-                    optimize = not b.close_transforms(ptf)
-        close = b.close_transforms(ptf)
-        if len(close) == 0:
-            transforms = [ptf * mtv for mtv in mtv_list]
-            stats['hits'] = 1
-            f = Fit(models, transforms, volume, stats)
-            f.ptf = ptf
-            flist.append(f)
-            b.add_transform(ptf)
-            fo[id(ptf)] = f
-        else:
-            s = fo[id(close[0])].stats
-            s['hits'] += 1
+                    optimize = True
+        return i, ptf, stats
+
+    if threads is None:
+        from os import cpu_count
+        threads = max(1, (cpu_count() or 1) // 2)
+    batch_size = 4 * threads
+
+    flist = []
+    from math import pi
+    from chimerax.geometry import bins
+    b = bins.Binned_Transforms(angle_tolerance*pi/180, shift_tolerance, center)
+    fo = {}
+    from chimerax.core.threadq import apply_to_list
+    for bstart in range(0, n, batch_size):
+        if request_stop_cb and request_stop_cb('Fit %d of %d' % (bstart+1,n)):
+            break
+        batch = starts[bstart:bstart+batch_size]
+        results = apply_to_list(optimize_placement, batch, threads)
+        results.sort(key = lambda r: r[0])
+        for i, ptf, stats in results:
+            close = b.close_transforms(ptf)
+            if len(close) == 0:
+                transforms = [ptf * mtv for mtv in mtv_list]
+                stats['hits'] = 1
+                f = Fit(models, transforms, volume, stats)
+                f.ptf = ptf
+                flist.append(f)
+                b.add_transform(ptf)
+                fo[id(ptf)] = f
+            else:
+                s = fo[id(close[0])].stats
+                s['hits'] += 1
 
     # Filter out solutions with too many points outside volume contour.
     fflist = [f for f in flist if (in_contour(f.ptf, points, volume, f.stats)
@@ -344,43 +377,46 @@ def move_step(move_table, session):
 
 # -----------------------------------------------------------------------------
 #
-def random_translation_step(center, radius):
+def random_translation_step(center, radius, rng = None):
 
-    v = random_direction()
-    from random import random
-    r = radius * random()
+    if rng is None:
+        import random as rng
+    v = random_direction(rng)
+    r = radius * rng.random()
     from chimerax.geometry import translation
     tf = translation(center + r*v)
     return tf
 
 # -----------------------------------------------------------------------------
 #
-def random_translation(bounds):
+def random_translation(bounds, rng = None):
 
-    from random import random
-    shift = [x0+random()*(x1-x0) for x0,x1 in zip(bounds.xyz_min, bounds.xyz_max)]
+    if rng is None:
+        import random as rng
+    shift = [x0+rng.random()*(x1-x0) for x0,x1 in zip(bounds.xyz_min, bounds.xyz_max)]
     from chimerax.geometry import translation
     tf = translation(shift)
     return tf
 
 # -----------------------------------------------------------------------------
 #
-def random_rotation():
+def random_rotation(rng = None):
 
-    y, z = random_direction(), random_direction()
+    y, z = random_direction(rng), random_direction(rng)
     from chimerax.geometry import orthonormal_frame
     f = orthonormal_frame(z, y)
     return f
 
 # -----------------------------------------------------------------------------
 #
-def random_direction():
+def random_direction(rng = None):
 
+    if rng is None:
+        import random as rng
     z = (1,1,1)
     from chimerax.geometry import norm, normalize_vector
-    from random import random
     while norm(z) > 1:
-        z = (1-2*random(), 1-2*random(), 1-2*random())
+        z = (1-2*rng.random(), 1-2*rng.random(), 1-2*rng.random())
     return normalize_vector(z)
 
 # -----------------------------------------------------------------------------
@@ -22,7 +22,8 @@ class Play_Series:
                preceding_marker_frames = 0, following_marker_frames = 0,
                color_range = None,
                normalize_thresholds = False,
-               rendering_cache_size = 1):
+               rendering_cache_size = 1,
+               prefetch_times = 0, precompute_surfaces = False):
 
     self.series = series
     self.session = session
@@ -51,6 +52,12 @@ class Play_Series:
     self.rendered_times = []       # For limiting cached renderings
     self.rendered_times_table = {}
 
+    self.prefetch_times = prefetch_times	# Maximum times read ahead in a thread during play
+    self.precompute_surfaces = precompute_surfaces and not normalize_thresholds
+    self._prefetcher = None
+    self._last_change_walltime = None
+    self._frame_interval = None		# Average seconds between time changes
+
     self._model_close_handler = session.triggers.add_handler('remove models', self._models_closed)
 
   # ---------------------------------------------------------------------------
@@ -91,6 +98,10 @@ class Play_Series:
     if self.play_handler is None:
       self.play_handler = h = self.next_time_cb
       self.handler = self.session.triggers.add_handler('new frame', h)
+      if self.prefetch_times > 0 and self._prefetcher is None:
+        from .prefetch import Series_Prefetcher
+        self._prefetcher = Series_Prefetcher(self.session, self.prefetch_times,
+                                             self.precompute_surfaces)
   
   # ---------------------------------------------------------------------------
   #
@@ -100,6 +111,11 @@ class Play_Series:
     if h:
       self.session.triggers.remove_handler(self.handler)
       self.play_handler = None
+    pf = self._prefetcher
+    if pf:
+      pf.stop()
+      self._prefetcher = None
+    self._last_change_walltime = self._frame_interval = None
 
   # ---------------------------------------------------------------------------
   #
@@ -118,25 +134,53 @@ class Play_Series:
     if len(tslist) == 0:
       return
 
+    next = self.next_time(t, self.step)
+    if next is None:
+      if self.time_range[1] >= self.time_range[0]:
+        self.stop()       # Reached the end or the beginning
+      return
+    tn, self.step = next
+
+    self.change_time(tn)
+
+  # ---------------------------------------------------------------------------
+  # Return time and step direction following time t, or None if at the end.
+  #
+  def next_time(self, t, step):
+
     ts, te = self.time_range[:2]
     nt = te-ts+1
-    if nt == 0:
-      return	# Series has no maps
+    if nt <= 0:
+      return None	# Series has no maps
     if self.play_direction == 'oscillate':
-      if self.step > 0:
+      if step > 0:
         if t == te:
-          self.step = -1
+          step = -1
       elif t == ts:
-        self.step = 1
+        step = 1
 
-    tn = t + self.step
+    tn = t + step
     if self.loop:
       tn = ts + (tn-ts)%nt
     elif (tn-ts) % nt != (tn-ts):
-      self.stop()       # Reached the end or the beginning
-      return
+      return None
+    return tn, step
 
-    self.change_time(tn)
+  # ---------------------------------------------------------------------------
+  #
+  def upcoming_times(self, t, n):
+
+    times = []
+    step = self.step
+    while len(times) < n:
+      next = self.next_time(t, step)
+      if next is None:
+        break
+      t, step = next
+      if t in times:
+        break		# Loop is shorter than n
+      times.append(t)
+    return times
 
   # ---------------------------------------------------------------------------
   #
@@ -190,6 +234,25 @@ class Play_Series:
 
     if self.time_step_cb:
       self.time_step_cb(t)
+
+    if self._prefetcher and self.play_handler:
+      self._prefetch(t)
+
+  # ---------------------------------------------------------------------------
+  #
+  def _prefetch(self, t):
+
+    import time
+    now = time.time()
+    t0 = self._last_change_walltime
+    if t0 is not None:
+      dt = now - t0
+      fi = self._frame_interval
+      self._frame_interval = dt if fi is None else 0.8*fi + 0.2*dt
+    self._last_change_walltime = now
+
+    times = self.upcoming_times(t, self.prefetch_times)
+    self._prefetcher.request(self.series, t, times, self._frame_interval)
     
   # ---------------------------------------------------------------------------
   # Update based on active volume viewer data set if it is part of series,
@@ -217,6 +280,9 @@ class Play_Series:
 
     cache_rendering = (self.rendering_cache_size > 1)
     ts.unshow_time(t, cache_rendering)
+    v = ts.volume_model(t)
+    if v is not None:
+      v.clear_precomputed_contours()
     if not cache_rendering:
       self.uncache_rendering(ts, t)
 
@@ -0,0 +1,194 @@
+# vim: set expandtab shiftwidth=2 softtabstop=2:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Read maps of a series ahead of playback in a background thread.
+#
+# The player lists the times it will show next and the map data for those
+# times is read into the map data cache, so showing a time does not wait
+# for file reading.  Contour surfaces can also be computed in advance at
+# the thresholds of the currently shown map.  The number of times read ahead
+# is adjusted so that reading keeps up with playback, limited by the map data
+# cache size so prefetched data is not released before it is shown.
+#
+class Series_Prefetcher:
+
+  def __init__(self, session, max_times = 8, precompute_surfaces = False,
+               cache_fraction = 0.5):
+
+    self.session = session
+    self.max_times = max_times
+    self.precompute_surfaces = precompute_surfaces
+    self.cache_fraction = cache_fraction  # Fraction of data cache prefetched data can use
+    self.num_times = 1                    # Current number of times read ahead
+    from threading import Condition, Thread
+    self._lock = Condition()
+    self._wanted = []           # Read requests in playback order
+    self._done = set()          # Keys of requests read
+    self._contoured = set()     # Volumes given precomputed surfaces
+    self._stop = False
+    self.read_count = 0         # Number of times read and total read seconds
+    self.read_time = 0.0
+    self._thread = t = Thread(target = self._read_maps, daemon = True)
+    t.start()
+
+  # ---------------------------------------------------------------------------
+  #
+  def request(self, series, shown_time, times, frame_interval = None):
+    '''
+    Set times that will be shown next in playback order.  Display settings,
+    region and thresholds of the maps at shown_time are assumed for the
+    upcoming maps.  Frame_interval is seconds between shown times and is
+    used to decide how many times to read ahead.
+    '''
+    reqs = []
+    bytes_per_time = 0
+    for ts in series:
+      v1 = ts.volume_model(shown_time) if shown_time < ts.number_of_times() else None
+      if v1 is None:
+        continue
+      rlist = []
+      for t in times:
+        if t >= ts.number_of_times():
+          continue
+        v = ts.volume_model(t)
+        if v is not None and v is not v1:
+          rlist.append(_read_request(v1, v, self.precompute_surfaces))
+      reqs.append(rlist)
+      if rlist:
+        bytes_per_time += rlist[0].bytes
+
+    n = self._adapt_num_times(frame_interval, bytes_per_time)
+    wanted = []
+    for i in range(n):
+      wanted.extend(rlist[i] for rlist in reqs if i < len(rlist))
+
+    with self._lock:
+      self._wanted = wanted
+      keys = set(r.key for r in wanted)
+      self._done &= keys
+      self._lock.notify()
+
+  # ---------------------------------------------------------------------------
+  #
+  def _adapt_num_times(self, frame_interval, bytes_per_time):
+    n = self.num_times
+    rt = self.mean_read_time
+    if frame_interval and rt > 0:
+      # Read far enough ahead that reading finishes before a time is shown.
+      from math import ceil
+      n = int(ceil(rt / frame_interval)) + 1
+    n = max(1, min(n, self.max_times))
+    if bytes_per_time > 0:
+      from chimerax.map.volume import data_cache, default_settings
+      f = self.cache_fraction
+      mf = default_settings(self.session)['data_cache_map_fraction']
+      if mf is not None:
+        f = min(f, 0.5*mf)	# Leave room in the series cache limit for shown times.
+      budget = f * data_cache(self.session).size
+      n = min(n, int(budget // bytes_per_time))
+    self.num_times = n
+    return n
+
+  # ---------------------------------------------------------------------------
+  #
+  def stop(self):
+    '''Stop the reading thread and discard surfaces computed in advance.'''
+    with self._lock:
+      self._stop = True
+      self._wanted = []
+      volumes = tuple(self._contoured)
+      self._contoured.clear()
+      self._lock.notify()
+    for v in volumes:
+      v.clear_precomputed_contours()
+
+  # ---------------------------------------------------------------------------
+  #
+  @property
+  def mean_read_time(self):
+    '''Average seconds to read one map, and contour it if surfaces are precomputed.'''
+    with self._lock:
+      return self.read_time / self.read_count if self.read_count else 0.0
+
+  # ---------------------------------------------------------------------------
+  #
+  def _next_request(self):
+    for r in self._wanted:
+      if r.key not in self._done:
+        return r
+    return None
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_maps(self):
+    from time import perf_counter
+    while True:
+      with self._lock:
+        while not self._stop and self._next_request() is None:
+          self._lock.wait()
+        if self._stop:
+          return
+        r = self._next_request()
+        self._done.add(r.key)
+        if r.levels:
+          self._contoured.add(r.volume)
+      t0 = perf_counter()
+      try:
+        r.read()
+      except Exception:
+        # Errors are reported when the map is shown and read again.
+        continue
+      t1 = perf_counter()
+      with self._lock:
+        self.read_count += 1
+        self.read_time += t1 - t0
+        stopped = self._stop
+      if stopped and r.levels:
+        r.volume.clear_precomputed_contours()   # Stopped while reading.
+
+# -----------------------------------------------------------------------------
+#
+class _Read_Request:
+
+  def __init__(self, volume, origin, size, step, levels, cap_faces):
+    self.volume = volume
+    self.origin, self.size, self.step = origin, size, step
+    self.levels = levels        # Contour levels to precompute
+    self.cap_faces = cap_faces
+    self.key = (id(volume), origin, size, step, tuple(levels), cap_faces)
+    d = volume.data
+    msize = [(s+st-1)//st for s,st in zip(size, step)]
+    self.bytes = msize[0]*msize[1]*msize[2]*d.value_type.itemsize
+
+  def read(self):
+    v = self.volume
+    m = v.data.matrix(self.origin, self.size, self.step)	# Adds to data cache
+    if self.levels and min(m.shape) >= 2:
+      from chimerax.map._map import contour_surface
+      for level in self.levels:
+        va, ta, na = contour_surface(m, level, cap_faces = self.cap_faces,
+                                     calculate_normals = True)
+        v.add_precomputed_contour(m, level, self.cap_faces, va, ta, na)
+
+# -----------------------------------------------------------------------------
+# Region and thresholds for map v when shown after v1, the same as set by
+# MapSeries.copy_display_parameters().
+#
+def _read_request(v1, v, precompute_surfaces):
+  region = v.full_region() if v1.is_full_region() else v1.region
+  origin, size, step = v.step_aligned_region(region)
+  levels = []
+  if precompute_surfaces and v1.surface_shown:
+    levels = [s.level for s in v1.surfaces if s.display]
+  return _Read_Request(v, origin, size, step, levels, v1.rendering_options.cap_faces)
@@ -45,6 +45,10 @@ class MapSeries(Model):
     self.last_shown_time = tuple(t)[0] if len(t) > 0 else 0
     for m in maps:
       m.series = self
+      # Cache use of the series can be limited like that of one map.
+      d = m.data
+      if d.data_cache is not None and self not in d.cache_groups:
+        d.cache_groups.append(self)
 
   # ---------------------------------------------------------------------------
   #
@@ -71,6 +71,8 @@ def register_vseries_command(logger):
                                    ('following_marker_frames', IntArg),
                                    ('color_range', FloatArg),
                                    ('cache_frames', IntArg),
+                                   ('prefetch', IntArg),
+                                   ('precompute_surfaces', BoolArg),
                                    ('jump_to', IntArg),
                                    ('range', IntRangeArg),
                                    ('start_time', IntArg),],
@@ -90,8 +92,12 @@ def register_vseries_command(logger):
 def vseries_play(session, series, direction = 'forward', loop = False, max_frame_rate = None, pause_frames = 0,
             jump_to = None, range = None, start_time = None, normalize = False, markers = None,
             preceding_marker_frames = 0, following_marker_frames = 0,
-            color_range = None, cache_frames = 1):
-    '''Show a sequence of maps from a volume series.'''
+            color_range = None, cache_frames = 1, prefetch = 8, precompute_surfaces = False):
+    '''
+    Show a sequence of maps from a volume series.  Up to prefetch upcoming maps
+    are read in a background thread during playback, and their contour surfaces
+    are computed in advance if precompute_surfaces is true.
+    '''
     if len(series) == 0:
         from chimerax.core.errors import UserError
         raise UserError('No volume series specified')
@@ -107,7 +113,9 @@ def vseries_play(session, series, direction = 'forward', loop = False, max_frame
                          preceding_marker_frames = preceding_marker_frames,
                          following_marker_frames = following_marker_frames,
                          color_range = color_range,
-                         rendering_cache_size = cache_frames)
+                         rendering_cache_size = cache_frames,
+                         prefetch_times = prefetch,
+                         precompute_surfaces = precompute_surfaces)
     if not jump_to is None:
         p.change_time(jump_to)
     else:
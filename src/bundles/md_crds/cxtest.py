@@ -7,3 +7,22 @@ run(session, "close; open test-data/start.pdb; open test-data/test.dcd structure
 if session.models[0].num_coordsets != 2:
 	raise SystemExit("Expected chimera_test.xtc to produce 2 coordinate sets; actually produced %s"
 		% session.models[0].num_coordsets)
+
+# A trajectory frame that cannot be read stops playback with an error when prefetching.
+import os, tempfile
+data = open("test-data/test.dcd", "rb").read()
+bad_dcd = os.path.join(tempfile.mkdtemp(), "bad.dcd")
+with open(bad_dcd, "wb") as f:
+	f.write(data[:len(data) - len(data)//8])	# Truncate the last frame.
+run(session, "close; open test-data/start.pdb; open %s structureModel #1 stream true" % bad_dcd)
+from chimerax.core.logger import StringPlainTextLog
+with StringPlainTextLog(session.logger) as log:
+	run(session, "coordset #1 1,2 prefetch 4")
+	run(session, "wait 20")
+	errors = log.getvalue()
+if getattr(session, '_coord_set_players', None):
+	raise SystemExit("Playing a trajectory with an unreadable frame did not stop")
+if "could not read trajectory frame 2" not in errors:
+	raise SystemExit("Unreadable trajectory frame was not reported, log: %s" % errors)
+run(session, "close")
+os.remove(bad_dcd)
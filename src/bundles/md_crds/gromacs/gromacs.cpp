@@ -128,6 +128,182 @@ read_traj_file(PyObject *args, bool is_xtc)
 	return Py_BuildValue(PY_STUPID "iO", num_atoms, crd_list);
 }
 
+// The xdrfile library has no seek routine.  Its XDR streams read directly
+// from the C library file handle which is the first member of the
+// XDRFILE structure, so seeking that handle positions the XDR stream.
+static FILE *
+xdrfile_stdio(XDRFILE *xd)
+{
+	return *(FILE **)xd;
+}
+
+#ifdef _WIN32
+#define FTELL _ftelli64
+#define FSEEK _fseeki64
+typedef __int64 file_offset;
+#else
+#define FTELL ftello
+#define FSEEK fseeko
+typedef off_t file_offset;
+#endif
+
+// Skip an xtc frame without decompressing the coordinates.
+static int
+skip_xtc_frame(XDRFILE *xd)
+{
+	int magic;
+	if (xdrfile_read_int(&magic, 1, xd) != 1)
+		return exdrENDOFFILE;
+	if (magic != 1995)
+		return exdrMAGIC;
+	int natoms_step[2];
+	if (xdrfile_read_int(natoms_step, 2, xd) != 2)
+		return exdrINT;
+	float time_box[10];
+	if (xdrfile_read_float(time_box, 10, xd) != 10)
+		return exdrFLOAT;
+	int lsize;
+	if (xdrfile_read_int(&lsize, 1, xd) != 1)
+		return exdrINT;
+	file_offset skip;
+	if (lsize <= 9)
+		skip = 12 * (file_offset)lsize;	// uncompressed floats
+	else {
+		float precision;
+		int ints[7], byte_count;	// minint, maxint, smallidx
+		if (xdrfile_read_float(&precision, 1, xd) != 1)
+			return exdrFLOAT;
+		if (xdrfile_read_int(ints, 7, xd) != 7 || xdrfile_read_int(&byte_count, 1, xd) != 1)
+			return exdrINT;
+		skip = 4 * (((file_offset)byte_count + 3) / 4);
+	}
+	if (FSEEK(xdrfile_stdio(xd), skip, SEEK_CUR) != 0)
+		return exdr3DX;
+	return exdrOK;
+}
+
+static PyObject *
+read_traj_index(PyObject *args, bool is_xtc)
+{
+	char error_string[256];
+
+	char *file_name;
+	if (!PyArg_ParseTuple(args, PY_STUPID "s", &file_name))
+		ERROR_RETURN("read_traj_index: could not parse args");
+
+	int num_atoms, status;
+	const char *format = (is_xtc ? "xtc" : "trr");
+	if (is_xtc)
+		status = read_xtc_natoms(file_name, &num_atoms);
+	else
+		status = read_trr_natoms(file_name, &num_atoms);
+	if (status != exdrOK)
+		ERROR_RETURN3("read_%s_natoms failure; return code %d", format, status);
+
+	XDRFILE *xd = xdrfile_open(file_name, "r");
+	if (xd == NULL)
+		ERROR_RETURN("xdrfile_open failure");
+
+	// record file offset of each frame
+	std::vector<long long> offsets;
+	std::vector<float> crds;
+	if (!is_xtc)
+		crds.resize(3 * (size_t)num_atoms);
+	int step;
+	float time, lambda;
+	matrix box;
+	while (true) {
+		file_offset offset = FTELL(xdrfile_stdio(xd));
+		if (is_xtc)
+			status = skip_xtc_frame(xd);
+		else
+			status = read_trr(xd, num_atoms, &step, &time, &lambda, box,
+					  (rvec *)crds.data(), NULL, NULL);
+		if (status != exdrOK) {
+			// trr doesn't return proper end-of-file status
+			if (is_xtc && status != exdrENDOFFILE) {
+				xdrfile_close(xd);
+				ERROR_RETURN3("read_%s failure; return code %d", format, status);
+			}
+			break;
+		}
+		offsets.push_back(offset);
+	}
+	xdrfile_close(xd);
+
+	PyObject *offset_list = PyList_New(offsets.size());
+	if (offset_list == NULL)
+		ERROR_RETURN("Couldn't create Python list for frame offsets");
+	for (size_t i = 0 ; i < offsets.size() ; ++i)
+		PyList_SET_ITEM(offset_list, i, PyLong_FromLongLong(offsets[i]));
+	return Py_BuildValue(PY_STUPID "iN", num_atoms, offset_list);
+}
+
+static PyObject *
+read_traj_frame(PyObject *args, bool is_xtc)
+{
+	char error_string[256];
+
+	char *file_name;
+	long long offset;
+	int num_atoms;
+	if (!PyArg_ParseTuple(args, PY_STUPID "sLi", &file_name, &offset, &num_atoms))
+		ERROR_RETURN("read_traj_frame: could not parse args");
+
+	npy_intp dimensions[2];
+	dimensions[0] = num_atoms;
+	dimensions[1] = 3;
+	PyObject *array = PyArray_SimpleNew(2, dimensions, NPY_FLOAT);
+	if (array == NULL)
+		return NULL;
+	rvec *crds = (rvec *)PyArray_DATA((PyArrayObject *)array);
+
+	XDRFILE *xd = xdrfile_open(file_name, "r");
+	if (xd == NULL) {
+		Py_DECREF(array);
+		ERROR_RETURN("xdrfile_open failure");
+	}
+	int status, step;
+	float time, precision, lambda;
+	matrix box;
+	if (FSEEK(xdrfile_stdio(xd), (file_offset)offset, SEEK_SET) != 0)
+		status = exdrENDOFFILE;
+	else if (is_xtc)
+		status = read_xtc(xd, num_atoms, &step, &time, box, crds, &precision);
+	else
+		status = read_trr(xd, num_atoms, &step, &time, &lambda, box, crds, NULL, NULL);
+	xdrfile_close(xd);
+	if (status != exdrOK) {
+		Py_DECREF(array);
+		ERROR_RETURN3("read_%s failure; return code %d", (is_xtc ? "xtc" : "trr"), status);
+	}
+	return array;
+}
+
+static PyObject *
+readXtcIndex(PyObject *, PyObject *args)
+{
+	return read_traj_index(args, true);
+}
+
+static PyObject *
+readTrrIndex(PyObject *, PyObject *args)
+{
+	return read_traj_index(args, false);
+}
+
+static PyObject *
+readXtcFrame(PyObject *, PyObject *args)
+{
+	return read_traj_frame(args, true);
+}
+
+static PyObject *
+readTrrFrame(PyObject *, PyObject *args)
+{
+	return read_traj_frame(args, false);
+}
+
 static PyObject *
 readXtcFile(PyObject *, PyObject *args)
 {
@@ -145,6 +321,10 @@ static PyMethodDef Methods[] =
 {
 	{PY_STUPID "read_xtc_file", readXtcFile, METH_VARARGS, NULL},
 	{PY_STUPID "read_trr_file", readTrrFile, METH_VARARGS, NULL},
+	{PY_STUPID "read_xtc_index", readXtcIndex, METH_VARARGS, NULL},
+	{PY_STUPID "read_trr_index", readTrrIndex, METH_VARARGS, NULL},
+	{PY_STUPID "read_xtc_frame", readXtcFrame, METH_VARARGS, NULL},
+	{PY_STUPID "read_trr_frame", readTrrFrame, METH_VARARGS, NULL},
 	{nullptr, nullptr, 0, nullptr}
 };
 
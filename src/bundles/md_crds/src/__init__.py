@@ -33,14 +33,14 @@ class _MDCrdsBundleAPI(BundleAPI):
             else:
                 class MDInfo(OpenerInfo):
                     def open(self, session, data, file_name, *, structure_model=None,
-                            md_type=name, replace=True, **kw):
+                            md_type=name, replace=True, stream=False, **kw):
                         if structure_model is None:
                             from chimerax.core.errors import UserError
                             raise UserError("Must specify a structure model to read the"
                                 " coordinates into")
                         from .read_coords import read_coords
                         num_coords = read_coords(session, data, structure_model, md_type,
-                            replace=replace)
+                            replace=replace, stream=stream)
                         if replace:
                             return [], "Replaced existing frames of %s with  %d new frames" \
                                 % (structure_model, num_coords)
@@ -52,7 +52,8 @@ class _MDCrdsBundleAPI(BundleAPI):
                         from chimerax.core.commands import BoolArg
                         return {
                             'structure_model': StructureArg,
-                            'replace': BoolArg
+                            'replace': BoolArg,
+                            'stream': BoolArg,
                         }
         else:
             from chimerax.save_command import SaverInfo
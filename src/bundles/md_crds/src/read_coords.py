@@ -11,9 +11,20 @@
 # or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-def read_coords(session, file_name, model, format_name, replace=True):
+def read_coords(session, file_name, model, format_name, replace=True, stream=False):
     from numpy import array, float64
     from chimerax.core.errors import UserError
+    from chimerax.atomic.trajectory import structure_trajectory
+    traj = structure_trajectory(model)
+    if traj is not None:
+        if not replace:
+            raise UserError("Cannot add frames to %s since its frames are read"
+                " from a trajectory file as needed" % model)
+        traj.close()
+    if stream:
+        if not replace:
+            raise UserError("Frames read as needed must replace existing frames")
+        return _stream_coords(session, file_name, model, format_name)
     if format_name == "xtc":
         from ._gromacs import read_xtc_file
         session.logger.status("Reading Gromacs xtc coordinates", blank_after=0)
@@ -69,3 +80,49 @@ def _set_model_dcd_coordinates(model, dcd, replace = True):
         model.add_coordset(base+i, asarray(dcd[i], float64, order = 'C'))
     model.active_coordset_id = base
     return dcd.numframes
+
+def _stream_coords(session, file_name, model, format_name):
+    '''Set up reading frames from the file as they are shown.'''
+    from chimerax.core.errors import UserError
+    close = None
+    if format_name in ("xtc", "trr"):
+        from . import _gromacs
+        read_index = getattr(_gromacs, "read_%s_index" % format_name)
+        read_frame = getattr(_gromacs, "read_%s_frame" % format_name)
+        session.logger.status("Indexing Gromacs %s frames" % format_name, blank_after=0)
+        num_atoms, offsets = read_index(file_name)
+        session.logger.status("Finished indexing Gromacs %s frames" % format_name)
+        def frame_coords(i):
+            xyz = read_frame(file_name, offsets[i], num_atoms)
+            xyz *= 10.0
+            return xyz
+        num_frames = len(offsets)
+    elif format_name == "dcd":
+        from .dcd.MDToolsMarch97.md_DCD import DCD
+        dcd = DCD(file_name)
+        num_atoms, num_frames = dcd.numatoms, dcd.numframes
+        frame_coords = dcd.__getitem__
+        close = dcd.file.close
+    elif format_name == "amber":
+        from netCDF4 import Dataset
+        ds = Dataset(file_name, "r")
+        try:
+            crds = ds.variables['coordinates']
+        except KeyError:
+            ds.close()
+            raise UserError("File is not an Amber netCDF coordinates file (no coordinates found)")
+        num_frames, num_atoms = crds.shape[:2]
+        frame_coords = lambda i: crds[i]
+        close = ds.close
+    else:
+        raise ValueError("Unknown MD coordinate format: %s" % format_name)
+    if model.num_atoms != num_atoms or num_frames == 0:
+        if close:
+            close()
+        if num_frames == 0:
+            raise UserError("No coordinate frames found in %s" % file_name)
+        raise UserError("Specified structure has %d atoms"
+            " whereas the coordinates are for %d atoms" % (model.num_atoms, num_atoms))
+    from chimerax.atomic.trajectory import TrajectoryCoordsets
+    TrajectoryCoordsets(model, num_frames, frame_coords, close=close)
+    return num_frames
@@ -13,13 +13,11 @@
 def write_coords(session, file_name, format, models):
     from .dcd.MDToolsMarch97.md_DCD import DCDWrite
     dcd = DCDWrite(file_name, DCDAtoms(models[0].atoms))
+    from chimerax.atomic.trajectory import coordset_ids, coordset_coords
     for m in models:
         matoms = m.atoms
-        ocid = m.active_coordset_id
-        for cid in m.coordset_ids:
-            m.active_coordset_id = cid
-            dcd.append(matoms.coords)
-        m.active_coordset_id = ocid
+        for cid in coordset_ids(m):
+            dcd.append(coordset_coords(m, cid, matoms))
     dcd.file.close()
 
 class DCDAtoms:
@@ -121,7 +121,9 @@ mlp_sum(PyObject *, PyObject *args, PyObject *keywds)
 			xyz.size(0), fi.size(0));
 
 
+  Py_BEGIN_ALLOW_THREADS
   lipophilicity_sum(xyz, fi, origin, spacing, max_dist, nexp, method, pot);
+  Py_END_ALLOW_THREADS
   
   return python_none();
 }
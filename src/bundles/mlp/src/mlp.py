@@ -367,11 +367,11 @@ def _griddimcalc(listcoord, spacing, gridmargin):
     ngrid = int(round((coordmax - coordmin) / spacing))
     return coordmin, coordmax, ngrid
 
-def calculatefimap(atoms, method, spacing, max_dist, nexp):
+def calculatefimap(atoms, method, spacing, max_dist, nexp, threads = None):
     """Calculation loop"""
 
-    #grid settings in angstrom
-    gridmargin = Defaults().gridmargin
+    #grid settings in angstrom.  Potential is zero beyond max_dist from atoms.
+    gridmargin = min(Defaults().gridmargin, max_dist + spacing)
     xyz = atoms.scene_coords
     xmingrid, xmaxgrid, nxgrid = _griddimcalc(xyz[:,0], spacing, gridmargin)
     ymingrid, ymaxgrid, nygrid = _griddimcalc(xyz[:,1], spacing, gridmargin)
@@ -386,14 +386,42 @@ def calculatefimap(atoms, method, spacing, max_dist, nexp):
 
     from numpy import zeros, float32
     pot = zeros((nzgrid+1, nygrid+1, nxgrid+1), float32)
-    # Make sure _mlp can runtime link shared library libarrays.
-    from chimerax import arrays ; arrays.load_libarrays()
-    from ._mlp import mlp_sum
-    mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot)
+    try:
+        # Make sure _mlp can runtime link shared library libarrays.
+        from chimerax import arrays ; arrays.load_libarrays()
+        from ._mlp import mlp_sum as sum_func
+    except ImportError:
+        sum_func = mlp_sum
+    xyz = xyz.astype(float32)
+    _slab_sums(sum_func, xyz, fi, origin, spacing, max_dist, method, nexp, pot, threads)
                  
     return pot, bounds
 
+def _slab_sums(sum_func, xyz, fi, origin, spacing, max_dist, method, nexp, pot, threads = None):
+    """Compute potential in z slabs of the grid on separate threads
+    using only atoms within max_dist of each slab."""
+    nz = pot.shape[0]
+    if threads is None:
+        from os import cpu_count
+        threads = max(1, (cpu_count() or 1) // 2)
+    slab_planes = max(1, -(-nz // (4*threads)))
+    x0,y0,z0 = origin
+    z = xyz[:,2]
+    args = []
+    for k0 in range(0, nz, slab_planes):
+        k1 = min(nz, k0 + slab_planes)
+        zmin, zmax = z0 + k0*spacing - max_dist, z0 + (k1-1)*spacing + max_dist
+        near = ((z >= zmin) & (z <= zmax)).nonzero()[0]
+        if len(near) > 0:
+            args.append((xyz[near], fi[near], (x0, y0, z0 + k0*spacing),
+                         spacing, max_dist, method, nexp, pot[k0:k1]))
+    from chimerax.core.threadq import apply_to_list
+    apply_to_list(sum_func, args, threads)
+
 def mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot):
+    """Python version of C++ mlp_sum() in _mlp.  Atoms are binned in cubic
+    cells of size max_dist so each block of grid points in one cell only
+    computes distances to atoms in the 27 surrounding cells."""
     if method == 'dubost':
         computemethod = _dubost
     elif method == 'fauchere':
@@ -405,45 +433,69 @@ def mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot):
     elif method == 'type5':
         computemethod = _type5
     else:
-        raise ValueError('Unknown lipophilicity method %s\n' % computemethod)
+        raise ValueError('Unknown lipophilicity method %s\n' % method)
+
+    from numpy import array, floor, float32, int64, unique, argsort, split, concatenate, sqrt, where
+    cell = max(max_dist, spacing)
+    o = array(origin, float32)
+    acell = floor((xyz - o) / cell).astype(int64)
+    cells, inverse = unique(acell, axis = 0, return_inverse = True)
+    inverse = inverse.ravel()
+    order = argsort(inverse, kind = 'stable')
+    counts = (inverse[order][1:] != inverse[order][:-1]).nonzero()[0] + 1
+    groups = dict(zip([tuple(c) for c in cells], split(order, counts)))
 
-    from numpy import zeros, float32, empty, subtract, sqrt
-    grid_pt = empty((3,), float32)
-    dxyz = empty((len(xyz),3), float32)
-    dist = empty((len(xyz),), float32)
+    # Grid index ranges lying in each cell along each axis.
     nz,ny,nx = pot.shape
-    x0,y0,z0 = origin
-    for k in range(nz):
-        grid_pt[2] = z0 + k * spacing
-        for j in range(ny):
-            grid_pt[1] = y0 + j * spacing
-            for i in range(nx):
-                #Evaluation of the distance between th grid point and each atoms
-                grid_pt[0] = x0 + i * spacing
-                subtract(xyz, grid_pt, dxyz)
-                dxyz *= dxyz
-                dist = dxyz[:,0]
-                dist += dxyz[:,1]
-                dist += dxyz[:,2]
-                sqrt(dist, dist)
-                pot[k,j,i] = computemethod(fi, dist, nexp)
+    ranges = [_cell_ranges(n, spacing, cell) for n in (nx, ny, nz)]
+    offsets = [(dk,dj,di) for dk in (-1,0,1) for dj in (-1,0,1) for di in (-1,0,1)]
+    for ck, (k0, k1) in ranges[2]:
+        for cj, (j0, j1) in ranges[1]:
+            for ci, (i0, i1) in ranges[0]:
+                near = [groups[c] for c in ((ci+di, cj+dj, ck+dk) for dk,dj,di in offsets)
+                        if c in groups]
+                if not near:
+                    continue
+                ai = concatenate(near)
+                gk, gj, gi = [g.ravel() for g in _index_grid(k0, k1, j0, j1, i0, i1)]
+                gxyz = o + spacing * array((gi, gj, gk), float32).T
+                d = gxyz[:,None,:] - xyz[ai][None,:,:]
+                d = sqrt((d*d).sum(axis = 2))
+                f = where(d <= max_dist, fi[ai][None,:], 0)
+                pot[k0:k1,j0:j1,i0:i1] += computemethod(f, d, nexp).reshape((k1-k0,j1-j0,i1-i0))
+
+def _cell_ranges(n, spacing, cell):
+    """Return list of (cell index, (first grid index, end grid index))."""
+    from numpy import arange, floor
+    c = floor(arange(n) * spacing / cell).astype(int)
+    ranges = []
+    start = 0
+    for i in range(1, n+1):
+        if i == n or c[i] != c[start]:
+            ranges.append((int(c[start]), (start, i)))
+            start = i
+    return ranges
+
+def _index_grid(k0, k1, j0, j1, i0, i1):
+    from numpy import mgrid
+    return mgrid[k0:k1, j0:j1, i0:i1]
 
 def _dubost(fi, d, n):
-    return (100 * fi / (1 + d)).sum()
+    return (100 * fi / (1 + d)).sum(axis = -1)
 
 def _fauchere(fi, d, n):
     from numpy import exp
-    return (100 * fi * exp(-d)).sum()
+    return (100 * fi * exp(-d)).sum(axis = -1)
 
 def _brasseur(fi, d, n):
     #3.1 division is there to remove any units in the equation
     #3.1A is the average diameter of a water molecule (2.82 -> 3.2)
     from numpy import exp
-    return (100 * fi * exp(-d/3.1)).sum()
+    return (100 * fi * exp(-d/3.1)).sum(axis = -1)
 
 def _buckingham(fi, d, n):
-    return (100 * fi / (d**n)).sum()
+    return (100 * fi / (d**n)).sum(axis = -1)
 
 def _type5(fi, d, n):
     from numpy import exp, sqrt
-    return (100 * fi * exp(-sqrt(d))).sum()
+    return (100 * fi * exp(-sqrt(d))).sum(axis = -1)
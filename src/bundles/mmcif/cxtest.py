@@ -0,0 +1,68 @@
+# Prefetch mmCIF files from a local web server into a temporary fetch cache.
+import os, tempfile, threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from chimerax.core import fetch
+from chimerax.core.fetchcache import fetch_cache
+from chimerax.mmcif import mmcif, prefetch_mmcif
+
+serve_dir = tempfile.mkdtemp()
+cache_dir = tempfile.mkdtemp()
+for pdb_id in ('1abc', '2abc'):
+	with open(os.path.join(serve_dir, pdb_id + '.cif'), 'w') as f:
+		f.write('data_%s\n#\n' % pdb_id.upper())
+
+requests = []
+class Handler(SimpleHTTPRequestHandler):
+	def __init__(self, *args, **kw):
+		super().__init__(*args, directory=serve_dir, **kw)
+	def do_GET(self):
+		requests.append(self.path)
+		super().do_GET()
+	def log_message(self, *args):
+		pass
+
+server = HTTPServer(('127.0.0.1', 0), Handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+mmcif._mmcif_sources['cxtest'] = 'http://127.0.0.1:%d/%%s.cif' % server.server_port
+saved_cache_dirs = fetch._cache_dirs[:]
+fetch._cache_dirs[:] = [cache_dir]
+try:
+	filenames = prefetch_mmcif(session, ['1abc', '2abc', '1abc', '9bad'], fetch_source='cxtest')
+	if filenames[0] is None or filenames[0] != filenames[2] or filenames[1] is None:
+		raise SystemExit("Prefetching local mmCIF files gave %s" % filenames)
+	if filenames[3] is not None:
+		raise SystemExit("Prefetching a missing mmCIF file gave %s" % filenames[3])
+	if requests.count('/1abc.cif') != 1:
+		raise SystemExit("Concurrent fetches of 1abc made %d requests instead of 1"
+			% requests.count('/1abc.cif'))
+	pdb_dir = os.path.join(cache_dir, 'PDB')
+	parts = [f for f in os.listdir(pdb_dir) if f.endswith('.part')]
+	if parts:
+		raise SystemExit("Partial downloads left in the fetch cache: %s" % parts)
+	cache = fetch_cache(cache_dir)
+	entry = cache.entry('PDB', '1abc.cif')
+	if entry is None or entry['size'] != os.path.getsize(filenames[0]):
+		raise SystemExit("Fetch cache index entry for 1abc is %s" % entry)
+
+	# A cache hit does not fetch again, and its use time is written later.
+	used = entry['used']
+	prefetch_mmcif(session, ['1abc'], fetch_source='cxtest')
+	if requests.count('/1abc.cif') != 1:
+		raise SystemExit("Cached 1abc was fetched again")
+	cache.write_use_times()
+	if cache.entry('PDB', '1abc.cif')['used'] < used:
+		raise SystemExit("Fetch cache use time of 1abc was not updated")
+
+	# A truncated cache file is fetched again.
+	with open(filenames[1], 'w') as f:
+		f.write('data_')
+	prefetch_mmcif(session, ['2abc'], fetch_source='cxtest')
+	if requests.count('/2abc.cif') != 2:
+		raise SystemExit("Truncated 2abc was not fetched again")
+finally:
+	fetch._cache_dirs[:] = saved_cache_dirs
+	del mmcif._mmcif_sources['cxtest']
+	server.shutdown()
+	import shutil
+	shutil.rmtree(serve_dir, ignore_errors=True)
+	shutil.rmtree(cache_dir, ignore_errors=True)
@@ -17,7 +17,7 @@ import chimerax.pdb_lib  # noqa
 
 from .mmcif import (  # noqa
     get_cif_tables, get_mmcif_tables, get_mmcif_tables_from_metadata,
-    open_mmcif, fetch_mmcif, citations,
+    open_mmcif, fetch_mmcif, prefetch_mmcif, citations,
     TableMissingFieldsError, CIFTable,
     find_template_residue, load_mmCIF_templates,
     add_citation, add_software,
@@ -356,6 +356,25 @@ def fetch_mmcif_pdbj(session, pdb_id, **kw):
     return fetch_mmcif(session, pdb_id, fetch_source="pdbj", **kw)
 
 
+def prefetch_mmcif(session, pdb_ids, fetch_source="rcsb", ignore_cache=False, max_workers=4):
+    """Download mmCIF files for many PDB identifiers into the fetch cache
+    using a pool of threads, without opening them.
+
+    Returns a list of filenames, None for identifiers that could not be fetched."""
+    base_url = _mmcif_sources.get(fetch_source, None)
+    if base_url is None:
+        raise UserError('unrecognized mmCIF/PDB source "%s"' % fetch_source)
+    cache = 'PDB' if not fetch_source.endswith('updated') else fetch_source
+    fetches = []
+    for pdb_id in pdb_ids:
+        if len(pdb_id) != 4:
+            raise UserError('PDB identifiers are 4 characters long, got "%s"' % pdb_id)
+        pdb_id = pdb_id.lower()
+        fetches.append((base_url % pdb_id, 'mmCIF %s' % pdb_id, "%s.cif" % pdb_id, cache))
+    from chimerax.core.fetch import prefetch_files
+    return prefetch_files(session, fetches, max_workers=max_workers, ignore_cache=ignore_cache)
+
+
 def _get_template(session, name):
     """Get Chemical Component Dictionary (CCD) entry"""
     from chimerax.core.fetch import fetch_file
@@ -34,17 +34,8 @@ def interpolate(coordset0, coordset1, segment_interpolator, residue_interpolator
         segment_interpolator.reverse_motion(c1s)
 
         for i, f in enumerate(rate):
-                coordset = coordset0.copy()
-                # Interpolate residue conformations
-                t0 = time()
-                residue_interpolator.interpolate(coordset0, c1s, f, coordset)
-                t1 = time()
-                global rst
-                rst += t1-t0
-
-                # Interplate segment motions
-                segment_interpolator.interpolate(f, coordset)
-
+                coordset = interpolate_frame(coordset0, c1s, f, segment_interpolator,
+                                             residue_interpolator)
                 coordsets.append(coordset)
                 if log and (i+1)%100 == 0:
                         log.status("Trajectory frame %d generated" % (i+1))
@@ -54,6 +45,62 @@ def interpolate(coordset0, coordset1, segment_interpolator, residue_interpolator
 
         return coordsets
 
+def interpolate_frame(coordset0, c1s, f, segment_interpolator, residue_interpolator):
+        '''
+        Return coordinates for fraction f of the way from coordset0 to the
+        final coordinates.  c1s are the final coordinates with the rigid
+        segment motions reversed.
+        '''
+        coordset = coordset0.copy()
+        # Interpolate residue conformations
+        t0 = time()
+        residue_interpolator.interpolate(coordset0, c1s, f, coordset)
+        t1 = time()
+        global rst
+        rst += t1-t0
+
+        # Interplate segment motions
+        segment_interpolator.interpolate(f, coordset)
+
+        return coordset
+
+class MorphFrames:
+        '''
+        Morph trajectory frames computed when requested instead of stored.
+        Only the starting and final coordinates and interpolators of each
+        stage are kept, so memory use does not depend on the number of frames.
+        Frame 0 is the initial conformation and each stage adds its
+        interpolated frames followed by its final conformation, the same
+        frames interpolate() computes.
+        '''
+        def __init__(self, residue_interpolator):
+                self.residue_interpolator = residue_interpolator
+                self.stages = []
+
+        def add_stage(self, coordset0, coordset1, segment_interpolator, rate_method, frames):
+                c1s = coordset1.copy()
+                segment_interpolator.reverse_motion(c1s)
+                rate = RateMap[rate_method](frames)
+                self.stages.append((coordset0, c1s, coordset1, segment_interpolator, rate))
+
+        @property
+        def num_frames(self):
+                return 1 + sum(len(rate) + 1 for c0, c1s, c1, si, rate in self.stages)
+
+        def frame_coords(self, frame):
+                '''Return coordinates indexed by atom coordinate index for a 0-based frame.'''
+                if frame == 0 and self.stages:
+                        return self.stages[0][0]
+                i = frame - 1
+                for coordset0, c1s, coordset1, segment_interpolator, rate in self.stages:
+                        if i < len(rate):
+                                return interpolate_frame(coordset0, c1s, rate[i], segment_interpolator,
+                                                         self.residue_interpolator)
+                        if i == len(rate):
+                                return coordset1
+                        i -= len(rate) + 1
+                raise IndexError('No morph frame %d, have %d frames' % (frame, self.num_frames))
+
 def rateLinear(frames):
         "Generate fractions from 0 to 1 linearly (excluding start/end)"
         return [ float(s) / frames for s in range(1, frames) ]
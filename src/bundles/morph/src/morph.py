@@ -14,7 +14,8 @@
 #
 def morph(session, structures, frames = 20, wrap = False, rate = 'linear', method = 'corkscrew',
           cartesian = False, same = False, core_fraction = 0.5, min_hinge_spacing = 6,
-          hide_models = True, play = True, slider = True, color_segments = False, color_core = None):
+          hide_models = True, play = True, slider = True, color_segments = False, color_core = None,
+          lazy = False):
     '''
     Morph between atomic models using Yale Morph Server algorithm.
 
@@ -60,6 +61,10 @@ def morph(session, structures, frames = 20, wrap = False, rate = 'linear', metho
     color_core : Color or None
         Color the core residues the specified color.  This is to understand what residues
         the algorithm calculates to be the core.
+    lazy : bool
+        Whether to compute each frame when it is shown instead of computing and storing
+        all frames.  Recently shown frames are cached.  This avoids a long wait and large
+        memory use when morphing large structures with many frames.  Default false.
     '''
 
     if len(structures) < 2:
@@ -73,14 +78,17 @@ def morph(session, structures, frames = 20, wrap = False, rate = 'linear', metho
     traj = compute_morph(structures, session.logger, method=method, rate=rate, frames=frames,
                          cartesian=cartesian, match_same=same, core_fraction = core_fraction,
                          min_hinge_spacing = min_hinge_spacing,
-                         color_segments = color_segments, color_core = color_core)
+                         color_segments = color_segments, color_core = color_core,
+                         lazy = lazy)
     session.models.add([traj])
     if not color_segments and color_core is None:
         if traj.num_chains == 1:
             # Assign new color for single chain morphs for visual clarity
             traj.set_initial_color()
 
-    session.logger.info('Computed %d frame morph #%s' % (traj.num_coordsets, traj.id_string))
+    from chimerax.atomic.trajectory import coordset_ids
+    csids = coordset_ids(traj)
+    session.logger.info('Computed %d frame morph #%s' % (len(csids), traj.id_string))
 
     if hide_models:
         for m in structures:
@@ -91,7 +99,6 @@ def morph(session, structures, frames = 20, wrap = False, rate = 'linear', metho
         coordset_slider(session, [traj])
 
     if play:
-        csids = traj.coordset_ids
         cmd = 'coordset #%s %d,%d' % (traj.id_string, min(csids), max(csids))
         from chimerax.core.commands import run
         run(session, cmd)
@@ -132,7 +139,8 @@ def register_morph_command(logger):
                    ('play', BoolArg),
                    ('slider', BoolArg),
                    ('color_segments', BoolArg),
-                   ('color_core', ColorArg)],
+                   ('color_core', ColorArg),
+                   ('lazy', BoolArg)],
         synopsis = 'morph atomic structures'
     )
     register('morph', desc, morph, logger=logger)
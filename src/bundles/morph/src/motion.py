@@ -11,12 +11,12 @@
 
 def compute_morph(mols, log, method = 'corkscrew', rate = 'linear', frames = 20,
                   cartesian = False, match_same = False, core_fraction = 0.5, min_hinge_spacing = 6,
-                  color_segments = False, color_core = None):
+                  color_segments = False, color_core = None, lazy = False):
         from time import time
         t0 = time()
         motion = MolecularMotion(mols[0], method = method, rate = rate, frames = frames,
                                  match_same = match_same, core_fraction = core_fraction,
-                                 min_hinge_spacing = min_hinge_spacing, log = log)
+                                 min_hinge_spacing = min_hinge_spacing, log = log, lazy = lazy)
         traj = motion.trajectory()
         from .interpolate import ResidueInterpolator
         res_interp = ResidueInterpolator(traj.residues, cartesian, log)
@@ -36,16 +36,21 @@ def compute_morph(mols, log, method = 'corkscrew', rate = 'linear', frames = 20,
                                 if getattr(r, '_in_morph_core', False):
                                         r.ribbon_color = rgba
                                         r.atoms.colors = rgba
-        traj.active_coordset_id = 1	# Start at initial trajectory frame.
+        if lazy:
+                motion.lazy_trajectory()	# Shows initial trajectory frame.
+        else:
+                traj.active_coordset_id = 1	# Start at initial trajectory frame.
         t1 = time()
-        log.status('Computed morph %d frames in %.3g seconds' % (traj.num_coordsets, t1-t0))
+        from chimerax.atomic.trajectory import coordset_ids
+        log.status('Computed morph %d frames in %.3g seconds' % (len(coordset_ids(traj)), t1-t0))
         return traj
 
 ht = it = 0
 class MolecularMotion:
 
         def __init__(self, m, method = "corkscrew", rate = "linear", frames = 20,
-                     match_same = False, core_fraction = 0.5, min_hinge_spacing = 6, log = None):
+                     match_same = False, core_fraction = 0.5, min_hinge_spacing = 6, log = None,
+                     lazy = False):
                 """
                 Compute a trajectory that starting from molecule m conformation.
                 Subsequent calls to interpolate must supply molecules
@@ -72,6 +77,10 @@ class MolecularMotion:
                 	min_hinge_spacing  Minimum length of consecutive residue segment
                 			   to move rigidly.
                         log             Logger for providing status messages
+                        lazy            Whether to compute frames when they are
+                                        shown instead of storing coordinate sets.
+                                        Call lazy_trajectory() after the last
+                                        interpolate() to set up the frames.
                 """
 
                 # Make a copy of the molecule to hold the computed trajectory
@@ -87,6 +96,8 @@ class MolecularMotion:
                 self.core_fraction = core_fraction
                 self.min_hinge_spacing = min_hinge_spacing
                 self.log = log
+                self.lazy = lazy
+                self._morph_frames = None	# Frames computed on demand if lazy
 
         def interpolate(self, m, res_interp, color_segments = False):
                 """Interpolate to new conformation 'm'."""
@@ -149,13 +160,22 @@ class MolecularMotion:
                 from .interpolate import SegmentInterpolator
                 seg_interp = SegmentInterpolator(res_groups, self.method, coords0, coords1)
 
-                from .interpolate import interpolate
-                coordsets = interpolate(coords0, coords1, seg_interp, res_interp,
-                                        self.rate, self.frames, sm.session.logger)
-                base_id = max(sm.coordset_ids) + 1
-                for i, cs in enumerate(coordsets):
-                        sm.add_coordset(base_id + i, cs)
-                sm.active_coordset_id = base_id + i
+                if self.lazy:
+                        if self._morph_frames is None:
+                                from .interpolate import MorphFrames
+                                self._morph_frames = MorphFrames(res_interp)
+                        self._morph_frames.add_stage(coords0, coords1, seg_interp,
+                                                     self.rate, self.frames)
+                        # Next stage starts from the final conformation.
+                        matoms.coords = coords1[maindices]
+                else:
+                        from .interpolate import interpolate
+                        coordsets = interpolate(coords0, coords1, seg_interp, res_interp,
+                                                self.rate, self.frames, sm.session.logger)
+                        base_id = max(sm.coordset_ids) + 1
+                        for i, cs in enumerate(coordsets):
+                                sm.add_coordset(base_id + i, cs)
+                        sm.active_coordset_id = base_id + i
                 t1 = time()
                 global it
                 it += t1-t0
@@ -164,3 +184,17 @@ class MolecularMotion:
 
         def trajectory(self):
                 return self.mol
+
+        def lazy_trajectory(self, cache_size = 2**26):
+                '''
+                Replace the trajectory coordinate sets with frames computed
+                when shown, keeping up to cache_size bytes of recent frames.
+                '''
+                sm = self.mol
+                frames = self._morph_frames
+                coord_indices = sm.atoms.coord_indices
+                def frame_coords(i):
+                        return frames.frame_coords(i)[coord_indices]
+                from chimerax.atomic.trajectory import TrajectoryCoordsets
+                TrajectoryCoordsets(sm, frames.num_frames, frame_coords,
+                                    cache_size = cache_size, float32 = False)
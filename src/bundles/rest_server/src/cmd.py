@@ -21,7 +21,7 @@ def _get_server():
         _server = None
     return _server
 
-def start_server(session, port=None, ssl=None, json=False):
+def start_server(session, port=None, ssl=None, json=False, queue_size=100):
     """If 'json' is True, then the return value from a command will be a JSON object with the following
        name/value pairs:
 
@@ -41,6 +41,10 @@ def start_server(session, port=None, ssl=None, json=False):
        (value) A JSON object, with names corresponding to log levels as given in chimerax.core.logger.Log.
             LEVEL_DESCRIPTS, and values that are lists of messages logged at that level during command
             execution.
+
+       Commands are executed one at a time in the order received.  'queue_size' is the maximum
+       number of commands waiting to execute; further requests are refused with HTTP status 503
+       until commands finish.
     """
 
     global _server
@@ -51,11 +55,12 @@ def start_server(session, port=None, ssl=None, json=False):
         from .server import RESTServer
         _server = RESTServer(session)
         # Run code will report port number
-        _server.start(port, ssl, json)
-from chimerax.core.commands import CmdDesc, IntArg, BoolArg
+        _server.start(port, ssl, json, queue_size)
+from chimerax.core.commands import CmdDesc, IntArg, BoolArg, PositiveIntArg
 start_desc = CmdDesc(keyword=[("port", IntArg),
                               ("ssl", BoolArg),
                               ("json", BoolArg),
+                              ("queue_size", PositiveIntArg),
                              ],
                      synopsis="Start REST server")
 
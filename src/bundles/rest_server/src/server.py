@@ -16,13 +16,30 @@ from chimerax.core.tasks import Task
 from chimerax.core.logger import PlainTextLog
 
 class RESTServer(Task):
-    """Listen for HTTP/REST requests, execute them and return output."""
+    """Listen for HTTP/REST requests, execute them and return output.
+
+    Each client connection is handled in its own thread.  Commands are put
+    on a bounded queue and executed one at a time in the main thread, so
+    slow commands do not prevent other clients from submitting commands,
+    polling for results or reading log output.
+    """
+
+    # Number of finished commands whose results are kept for polling.
+    MAX_FINISHED_JOBS = 256
+    JOB_POLL_INTERVAL = 1.0     # Seconds between checks that a job can still run
 
     def __init__(self, *args, **kw):
         import threading
         self.httpd = None
         self.run_count = 0
         self.run_lock = threading.Lock()
+        self.jobs = {}
+        self._finished_jobs = []
+        self._job_lock = threading.Lock()
+        self._job_queue = None
+        self._queue_size = None
+        self._next_job_id = 1
+        self._running_job = None
         super().__init__(*args, **kw)
 
     SESSION_SAVE = False
@@ -41,8 +58,8 @@ class RESTServer(Task):
     def server_address(self):
         return self.httpd.server_address
 
-    def run(self, port, use_ssl, json):
-        from http.server import HTTPServer
+    def run(self, port, use_ssl, json, queue_size=100):
+        from http.server import ThreadingHTTPServer
         import sys
         if port is None:
             # Defaults to any available port
@@ -50,7 +67,8 @@ class RESTServer(Task):
         if use_ssl is None:
             # Defaults to cleartext
             use_ssl = False
-        self.httpd = HTTPServer(("localhost", port), RESTHandler)
+        self.httpd = ThreadingHTTPServer(("localhost", port), RESTHandler)
+        self.httpd.daemon_threads = True
         self.httpd.chimerax_restserver = self
         self.json = json
         if not use_ssl:
@@ -69,6 +87,12 @@ class RESTServer(Task):
             #                                     certfile=cert)
             self.httpd.socket = context.wrap_socket(self.httpd.socket,
                                                     server_side=True)
+        # Queue size is limited in submit() so that stopping never blocks.
+        from queue import Queue
+        self._job_queue = Queue()
+        self._queue_size = queue_size
+        import threading
+        threading.Thread(target=self._execute_jobs, daemon=True).start()
         self.run_increment()    # To match decrement in terminate()
         host, port = self.httpd.server_address
         msg = ("REST server started on host %s port %d" % (host, port))
@@ -93,39 +117,263 @@ class RESTServer(Task):
                 if self.httpd is not None:
                     self.httpd.shutdown()
                     self.httpd = None
+                    self._cancel_queued_jobs()
+                    self._job_queue.put(None)   # Stop executing jobs
                 super().terminate()
 
     def terminate(self):
         self.run_decrement()
 
+    def submit(self, commands, json=None):
+        """Queue commands for execution and return the CommandJob.
+        Raises queue.Full if too many commands are waiting."""
+        with self._job_lock:
+            if self._job_queue.qsize() >= self._queue_size:
+                from queue import Full
+                raise Full()
+            job = CommandJob(str(self._next_job_id), commands,
+                             self.json if json is None else json)
+            self._job_queue.put(job)
+            self._next_job_id += 1
+            self.jobs[job.id] = job
+        return job
+
+    def job(self, job_id):
+        with self._job_lock:
+            return self.jobs.get(job_id)
+
+    def queue_position(self, job):
+        """Number of commands that will execute before the job, or None
+        if the job is running or finished."""
+        with self._job_queue.mutex:
+            waiting = list(self._job_queue.queue)
+        return waiting.index(job) if job in waiting else None
+
+    def status(self):
+        running = self._running_job
+        return {
+            'queued': self._job_queue.qsize(),
+            'queue size': self._queue_size,
+            'running': None if running is None else running.id,
+        }
+
+    def _cancel_queued_jobs(self):
+        # Release requests waiting for jobs that will never run.
+        from queue import Empty
+        while True:
+            try:
+                job = self._job_queue.get_nowait()
+            except Empty:
+                break
+            if job is not None:
+                job.cancel("REST server stopped")
+        job = self._running_job
+        if job is not None:
+            job.cancel("REST server stopped")
+
+    def _execute_jobs(self):
+        # Hand jobs to the main thread one at a time, waiting for each to finish.
+        # A job not yet started when the server stops, for instance because
+        # the session is exiting, is cancelled so its waiters are released.
+        q = self._job_queue
+        while True:
+            job = q.get()
+            if job is None:
+                break
+            self._running_job = job
+            self.session.ui.thread_safe(job.execute, self.session)
+            while not job.wait(self.JOB_POLL_INTERVAL):
+                if self.httpd is None:
+                    job.cancel("REST server stopped")
+            self._running_job = None
+            with self._job_lock:
+                self._finished_jobs.append(job)
+                while len(self._finished_jobs) > self.MAX_FINISHED_JOBS:
+                    old = self._finished_jobs.pop(0)
+                    del self.jobs[old.id]
+
+
+class CommandJob:
+    """Commands from one request, their log messages and their result."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    CANCELLED = "cancelled"     # Server stopped before the job ran
+
+    def __init__(self, job_id, commands, json):
+        import threading
+        self.id = job_id
+        self.commands = commands
+        self.json = json
+        self.state = self.QUEUED
+        self.messages = []      # (level description, message) as logged
+        self.result = None      # Response text
+        self.error = None       # (error class name, message)
+        self._changed = threading.Condition()
+
+    def execute(self, session):
+        """Run the commands.  Must be called in the main thread."""
+        with self._changed:
+            if self.state == self.CANCELLED:
+                return
+            self.state = self.RUNNING
+            self._changed.notify_all()
+        try:
+            self.result = self._run_commands(session)
+        except Exception as e:
+            self.error = (e.__class__.__name__, str(e))
+            self.result = "%s: %s\n" % self.error
+            raise
+        finally:
+            with self._changed:
+                self.state = self.FINISHED
+                self._changed.notify_all()
+
+    def _run_commands(self, session):
+        from chimerax.core.errors import NotABug
+        logger = session.logger
+        json = self.json
+        # rest_log.log_summary gets called at the end
+        # of the "with" statement
+        log_class = ByLevelPlainTextLog if json else JobPlainTextLog
+        with log_class(logger, self) as rest_log:
+            from chimerax.core.commands import run
+            error_info = None
+            ret_val = []
+            commands = self.commands
+            if not commands:
+                logger.error("\"command\" parameter missing")
+            else:
+                try:
+                    for cmd in commands:
+                        if isinstance(cmd, bytes):
+                            cmd = cmd.decode('utf-8')
+                        ret_val = run(session, cmd, log=False, return_json=json, return_list=True)
+                except NotABug as e:
+                    if json:
+                        ret_val = []
+                        error_info = e
+                    logger.info(str(e))
+                except Exception as e:
+                    if json:
+                        ret_val = []
+                        error_info = e
+                    else:
+                        raise
+            if error_info is not None:
+                self.error = (error_info.__class__.__name__, str(error_info))
+            # if json, compose Python and JSON return values into a JSON string,
+            # along with log messages broken down by logging level
+            if json:
+                from chimerax.core.commands import JSONResult
+                from json import JSONEncoder
+                json_vals = []
+                python_vals = []
+                for val in ret_val:
+                    if isinstance(val, JSONResult):
+                        json_vals.append(val.json_value)
+                        python_vals.append(val.python_value)
+                    else:
+                        json_vals.append(None)
+                        python_vals.append(val)
+                response = {}
+                response['json values'] = json_vals
+                response['python values'] = python_vals
+                response['log messages'] = rest_log.getvalue()
+                if error_info is None:
+                    response['error'] = None
+                else:
+                    response['error'] = {
+                        'type': error_info.__class__.__name__,
+                        'message': str(error_info)
+                    }
+                return JSONEncoder(default=lambda x: None).encode(response)
+            else:
+                return rest_log.getvalue()
+
+    def add_message(self, level_descript, msg):
+        with self._changed:
+            self.messages.append((level_descript, msg))
+            self._changed.notify_all()
+
+    def cancel(self, reason):
+        """Cancel the job if it has not started.  Return whether it was cancelled."""
+        with self._changed:
+            if self.state != self.QUEUED:
+                return False
+            self.state = self.CANCELLED
+            self.error = ("Cancelled", reason)
+            self._changed.notify_all()
+        return True
+
+    @property
+    def cancelled(self):
+        return self.state == self.CANCELLED
+
+    @property
+    def finished(self):
+        return self.state in (self.FINISHED, self.CANCELLED)
+
+    def wait(self, timeout=None):
+        """Wait until the job finishes.  Return whether it finished."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.finished, timeout)
+
+    def wait_for_messages(self, count, timeout=None):
+        """Wait until more than 'count' messages are logged or the job
+        finishes.  Return the new messages."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.messages) > count or self.finished,
+                                   timeout)
+            return self.messages[count:]
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'status': self.state,
+            'messages': len(self.messages),
+            'error': (None if self.error is None
+                      else {'type': self.error[0], 'message': self.error[1]}),
+        }
+
 
 class RESTHandler(BaseHTTPRequestHandler):
     """Process one REST request."""
 
+    # HTTP/1.1 keeps connections open for multiple requests
+    protocol_version = "HTTP/1.1"
+
     ContentTypes = [
         (".html", "text/html"),
         (".png", "image/png"),
         (".ico", "image/png"),
     ]
 
+    # Responses larger than this are sent in chunks as they are written
+    CHUNK_SIZE = 2**16
+
     def do_GET(self):
-        if not self.server.chimerax_restserver.run_increment():
+        server = self.server.chimerax_restserver
+        if not server.run_increment():
             return
         try:
             from urllib.parse import urlparse, parse_qs
             r = urlparse(self.path)
-            if r.path == "/run":
-                # Execute a command
-                args = parse_qs(r.query)
-                if self.command == "POST":
-                    for k, vl in self._parse_post().items():
-                        try:
-                            al = args[k]
-                        except KeyError:
-                            args[k] = vl
-                        else:
-                            al.extend(vl)
-                self._run(args)
+            args = parse_qs(r.query)
+            if self.command == "POST":
+                for k, vl in self._parse_post().items():
+                    if isinstance(k, bytes):
+                        k = k.decode('utf-8')
+                    try:
+                        al = args[k]
+                    except KeyError:
+                        args[k] = vl
+                    else:
+                        al.extend(vl)
+            handler = self.Endpoints.get(r.path)
+            if handler is not None:
+                handler(self, server, args)
             else:
                 # Serve up some static files for testing
                 import os.path
@@ -139,12 +387,11 @@ class RESTHandler(BaseHTTPRequestHandler):
                             break
                     else:
                         ctype = "text/plain"
-                    self._header(200, ctype, len(data))
-                    self.wfile.write(data)
+                    self._send(200, ctype, data)
                 except IOError:
                     self.send_error(404)
         finally:
-            self.server.chimerax_restserver.run_decrement()
+            server.run_decrement()
 
     do_POST = do_GET
 
@@ -174,84 +421,161 @@ class RESTHandler(BaseHTTPRequestHandler):
         self.send_header("Content-Type", content_type)
         if length is not None:
             self.send_header("Content-Length", str(length))
+        else:
+            self.send_header("Transfer-Encoding", "chunked")
         self.end_headers()
 
-    def _run(self, args):
-        from queue import Queue
-        from chimerax.core.errors import NotABug
-        from chimerax.core.logger import StringPlainTextLog
-        session = self.server.chimerax_restserver.session
-        q = Queue()
-        def f(args=args, session=session, q=q, json=self.server.chimerax_restserver.json):
-            logger = session.logger
-            # rest_log.log_summary gets called at the end
-            # of the "with" statement
-            log_class = ByLevelPlainTextLog if json else StringPlainTextLog
-            with log_class(logger) as rest_log:
-                from chimerax.core.commands import run
-                error_info = None
-                try:
-                    commands = args["command"]
-                except KeyError:
-                    logger.error("\"command\" parameter missing")
-                    ret_val = []
-                else:
-                    try:
-                        for cmd in commands:
-                            if isinstance(cmd, bytes):
-                                cmd = cmd.decode('utf-8')
-                            ret_val = run(session, cmd, log=False, return_json=json, return_list=True)
-                    except NotABug as e:
-                        if json:
-                            ret_val = []
-                            error_info = e
-                        logger.info(str(e))
-                    except Exception as e:
-                        if json:
-                            ret_val = []
-                            error_info = e
-                        else:
-                            raise
-                # if json, compose Python and JSON return values into a JSON string,
-                # along with log messages broken down by logging level
-                if json:
-                    from chimerax.core.commands import JSONResult
-                    from json import JSONEncoder
-                    json_vals = []
-                    python_vals = []
-                    for val in ret_val:
-                        if isinstance(val, JSONResult):
-                            json_vals.append(val.json_value)
-                            python_vals.append(val.python_value)
-                        else:
-                            json_vals.append(None)
-                            python_vals.append(val)
-                    response = {}
-                    response['json values'] = json_vals
-                    response['python values'] = python_vals
-                    response['log messages'] = rest_log.getvalue()
-                    if error_info is None:
-                        response['error'] = None
-                    else:
-                        response['error'] = {
-                            'type': error_info.__class__.__name__,
-                            'message': str(error_info)
-                        }
-                    q.put(JSONEncoder(default=lambda x: None).encode(response))
-                else:
-                    q.put(rest_log.getvalue())
-        session.ui.thread_safe(f)
-        data = bytes(q.get(), "utf-8")
-        self._header(200, "text/plain", len(data))
-        self.wfile.write(data)
+    def _send(self, response, content_type, data):
+        if isinstance(data, str):
+            data = bytes(data, "utf-8")
+        if len(data) <= self.CHUNK_SIZE:
+            self._header(response, content_type, len(data))
+            self.wfile.write(data)
+        else:
+            cs = self.CHUNK_SIZE
+            self._header(response, content_type)
+            for i in range(0, len(data), cs):
+                self._write_chunk(data[i:i+cs])
+            self._write_chunk(b"")
+
+    def _send_json(self, response, value):
+        from json import dumps
+        self._send(response, "application/json", dumps(value))
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _submit(self, server, args):
+        from queue import Full
+        json = args.get("json")
+        if json is not None:
+            json = json[-1] in ("true", "1", b"true", b"1")
+        try:
+            return server.submit(args.get("command", []), json)
+        except Full:
+            self._send_json(503, {'error': {'type': 'QueueFull',
+                'message': 'Too many commands waiting, try again later'}})
+            return None
+
+    def _job(self, server, args):
+        job_id = args.get("id", [None])[-1]
+        if isinstance(job_id, bytes):
+            job_id = job_id.decode('utf-8')
+        job = None if job_id is None else server.job(job_id)
+        if job is None:
+            self._send_json(404, {'error': {'type': 'KeyError',
+                'message': 'No command with id %s' % job_id}})
+        return job
+
+    def _job_result(self, job):
+        if job.cancelled:
+            self._send_json(503, {'error': {'type': job.error[0],
+                'message': job.error[1]}})
+            return
+        self._send(200, "application/json" if job.json else "text/plain", job.result or "")
+
+    def _run(self, server, args):
+        """Execute commands and return the log output or JSON result.
+        With stream=true log messages are sent as they are logged."""
+        job = self._submit(server, args)
+        if job is None:
+            return
+        if args.get("stream", [None])[-1] in ("true", "1", b"true", b"1"):
+            self._stream_log(job, result=True)
+        else:
+            job.wait()
+            self._job_result(job)
+
+    def _submit_request(self, server, args):
+        """Queue commands and return their id without waiting."""
+        job = self._submit(server, args)
+        if job is not None:
+            status = job.summary()
+            status['position'] = server.queue_position(job)
+            self._send_json(202, status)
+
+    def _status_request(self, server, args):
+        job = self._job(server, args)
+        if job is not None:
+            status = job.summary()
+            status['position'] = server.queue_position(job)
+            self._send_json(200, status)
+
+    def _result_request(self, server, args):
+        """Return the result of finished commands, optionally waiting
+        up to 'wait' seconds.  Status is returned if not yet finished."""
+        job = self._job(server, args)
+        if job is None:
+            return
+        wait = args.get("wait", [0])[-1]
+        try:
+            wait = float(wait)
+        except ValueError:
+            wait = 0
+        if job.wait(wait if wait > 0 else 0):
+            self._job_result(job)
+        else:
+            status = job.summary()
+            status['position'] = server.queue_position(job)
+            self._send_json(202, status)
+
+    def _log_request(self, server, args):
+        job = self._job(server, args)
+        if job is not None:
+            self._stream_log(job)
+
+    def _stream_log(self, job, result=False):
+        # Send log messages in chunks as they are logged,
+        # followed by the result if requested.
+        self._header(200, "text/plain")
+        count = 0
+        while True:
+            msgs = job.wait_for_messages(count, timeout=30)
+            if msgs:
+                count += len(msgs)
+                self._write_chunk(bytes(''.join(m for level, m in msgs), "utf-8"))
+            elif job.finished:
+                break
+        if job.cancelled:
+            self._write_chunk(bytes("%s: %s\n" % job.error, "utf-8"))
+        elif result and job.json:
+            self._write_chunk(bytes(job.result or "", "utf-8"))
+        self._write_chunk(b"")
+
+    def _health_request(self, server, args):
+        status = server.status()
+        status['status'] = 'ok'
+        self._send_json(200, status)
+
+    Endpoints = {
+        "/run": _run,
+        "/submit": _submit_request,
+        "/status": _status_request,
+        "/result": _result_request,
+        "/log": _log_request,
+        "/health": _health_request,
+    }
 
 from chimerax.core.logger import StringPlainTextLog
-class ByLevelPlainTextLog(StringPlainTextLog):
-    def __init__(self, logger):
+class JobPlainTextLog(StringPlainTextLog):
+    def __init__(self, logger, job=None):
         super().__init__(logger)
+        self._job = job
+
+    def log(self, level, msg):
+        if self._job is not None:
+            self._job.add_message(self.LEVEL_DESCRIPTS[level], msg)
+        return super().log(level, msg)
+
+class ByLevelPlainTextLog(JobPlainTextLog):
+    def __init__(self, logger, job=None):
+        super().__init__(logger, job)
         self._msgs = { descript:[] for descript in self.LEVEL_DESCRIPTS }
 
     def log(self, level, msg):
+        if self._job is not None:
+            self._job.add_message(self.LEVEL_DESCRIPTS[level], msg)
         self._msgs[self.LEVEL_DESCRIPTS[level]].append(msg)
         return True
 
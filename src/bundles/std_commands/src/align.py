@@ -97,12 +97,14 @@ def align(session, atoms, to_atoms = None, move = None, each = None,
 
     xyz_to = pto_atoms.scene_coords
     if each == 'coordset':
-        cs = cset_mol.active_coordset_id
-        for id in cset_mol.coordset_ids:
-            cset_mol.active_coordset_id = id
+        from chimerax.atomic.trajectory import coordset_ids, active_coordset_id, \
+            set_active_coordset_id
+        cs = active_coordset_id(cset_mol)
+        for id in coordset_ids(cset_mol):
+            set_active_coordset_id(cset_mol, id)
             align_atoms(patoms, pto_atoms, xyz_to, cutoff_distance,
                         atoms, to_atoms, move, log, report_matrix)
-        cset_mol.active_coordset_id = cs
+        set_active_coordset_id(cset_mol, cs)
         return
 
     return align_atoms(patoms, pto_atoms, xyz_to, cutoff_distance,
@@ -17,13 +17,15 @@
 # Syntax: coordset <structure-id>
 #                  <start>[,<end>][,<step>]     # frame range
 #                  [holdSteady <atomSpec>]
+#                  [rate <fps>] [prefetch <nframes>] [reportTiming true|false]
 #
 # Unspecified start or end defaults to current frame, last frame.
 # Unspecified step is 1 or -1 depending on if end > start.
 # Can use -1 for last frame.  Frame numbers start at 1.
 #
 def coordset(session, structures, index_range, hold_steady = None,
-             pause_frames = 1, loop = 1, bounce = False, compute_ss = False):
+             pause_frames = 1, loop = 1, bounce = False, compute_ss = False,
+             precompute_ss = False, rate = None, prefetch = 16, report_timing = False):
   '''Change which coordinate set is shown for a structure.
   Can play through a range of coordinate sets.
 
@@ -51,6 +53,21 @@ def coordset(session, structures, index_range, hold_steady = None,
     Whether to reverse direction instead of jumping to beginning when looping.  Default false.
   compute_ss : bool
     Whether to recompute secondary structure using dssp for every new frame.  Default false.
+    Secondary structure of each coordinate set is computed once and reused when
+    the coordinate set is shown again.
+  precompute_ss : bool
+    Whether to compute secondary structure for all coordinate sets in the range before
+    playback starts, so playback does not wait for dssp.  Used only with compute_ss.
+    Default false.
+  rate : float or None
+    Target playback rate in coordinate sets per second.  Coordinate sets are skipped
+    when playback falls behind.  If None one coordinate set is shown every pause_frames
+    graphics frames.
+  prefetch : integer
+    Number of upcoming trajectory frames read ahead in a background thread.
+    Only used for trajectories read on demand.  Zero disables read ahead.  Default 16.
+  report_timing : bool
+    Whether to log the achieved playback rate and frame read times when playback ends.
   '''
 
   if len(structures) == 0:
@@ -62,7 +79,9 @@ def coordset(session, structures, index_range, hold_steady = None,
   for m in structures:
     s,e,step = absolute_index_range(index_range, m)
     hold = hold_steady.intersect(m.atoms) if hold_steady else None
-    csp = CoordinateSetPlayer(m, s, e, step, hold, pause_frames, loop, bounce, compute_ss)
+    csp = CoordinateSetPlayer(m, s, e, step, hold, pause_frames, loop, bounce, compute_ss,
+                              precompute_ss = precompute_ss, rate = rate, prefetch = prefetch,
+                              report_timing = report_timing)
     csp.start()
 
 # -----------------------------------------------------------------------------
@@ -115,6 +134,7 @@ def coordset_slider(session, structures, hold_steady = None,
 def register_command(logger):
     from chimerax.core.commands import CmdDesc, register, ListOf
     from chimerax.core.commands import IntArg, BoolArg, Or, EmptyArg
+    from chimerax.core.commands import PositiveFloatArg, NonNegativeIntArg
     from chimerax.atomic import AtomsArg, StructuresArg
     desc = CmdDesc(
         required = [('structures', StructuresArg),
@@ -123,7 +143,11 @@ def register_command(logger):
                    ('pause_frames', IntArg),
                    ('loop', IntArg),
                    ('bounce', BoolArg),
-                   ('compute_ss', BoolArg)],
+                   ('compute_ss', BoolArg),
+                   ('precompute_ss', BoolArg),
+                   ('rate', PositiveFloatArg),
+                   ('prefetch', NonNegativeIntArg),
+                   ('report_timing', BoolArg)],
         synopsis = 'show coordinate sets')
     register('coordset', desc, coordset, logger=logger)
 
@@ -171,12 +195,13 @@ class IndexRangeArg(Annotation):
 def absolute_index_range(index_range, mol):
 
   # Find available coordsets
-  ids = mol.coordset_ids
+  from chimerax.atomic.trajectory import coordset_ids, active_coordset_id
+  ids = coordset_ids(mol)
   imin, imax = min(ids), max(ids)
 
   s,e,st = index_range
   if s is None:
-    si = mol.active_coordset_id
+    si = active_coordset_id(mol)
   elif s < 0:
     si = s + imax + 1
   else:
@@ -201,12 +226,18 @@ def absolute_index_range(index_range, mol):
   return (si,ei,sti)
 
 # -----------------------------------------------------------------------------
+# Plays coordinate sets, one per graphics frame or at a target rate.  For
+# trajectories read on demand, upcoming frames are read in a background
+# thread so reading a frame does not delay drawing.  If the next frame has
+# not been read yet the current frame stays shown, and if playback at the
+# target rate falls behind, frames are skipped.
 #
 class CoordinateSetPlayer:
 
   def __init__(self, structure, istart, iend, istep,
                steady_atoms = None, pause_frames = 1, loop = 1, bounce = False,
-               compute_ss = False):
+               compute_ss = False, precompute_ss = False, rate = None, prefetch = 16,
+               report_timing = False):
 
     self.structure = structure
     # structure deletes its 'session' attr when the structure is deleted,
@@ -222,10 +253,24 @@ class CoordinateSetPlayer:
     self.bounce = bounce
     self._reverse = False   # Whether playing in opposite direction after bounce
     self.compute_ss = compute_ss
+    self.precompute_ss = precompute_ss
+    self._ss_cache = secondary_structure_cache(structure) if compute_ss else None
+    self._ss_pending = []   # Coordinate sets to compute secondary structure before playing
+    self.rate = rate	    # Coordinate sets per second, or None for one per graphics frame.
+    self.prefetch = prefetch
+    self.report_timing = report_timing
+    self._prefetcher = None
     self._pause_count = 0
     self._steady_coords = None
     self._steady_transforms = {}
     self._handler = None
+    self._start_time = None
+    self._frame_count = 0     # Coordinate sets shown or skipped
+    self._shown = 0
+    self._skipped = 0
+    self._waits = 0	      # Graphics frames with next coordinate set not yet read
+    self._load_time = 0.0     # Seconds reading frames not prefetched
+    self._loads = 0
 
   def start(self):
 
@@ -236,6 +281,23 @@ class CoordinateSetPlayer:
     if not hasattr(session, '_coord_set_players'):
       session._coord_set_players = set()
     session._coord_set_players.add(self)
+    from chimerax.atomic.trajectory import structure_trajectory, TrajectoryPrefetcher
+    traj = structure_trajectory(self.structure)
+    if traj is not None and self.prefetch > 0:
+      self._prefetcher = TrajectoryPrefetcher(traj, self.prefetch)
+    if self._ss_cache and self.precompute_ss:
+      from chimerax.atomic.trajectory import coordset_ids
+      csids = set(coordset_ids(self.structure))
+      pending, seen = [], set()
+      # Compute no more than the cache holds so none are discarded before shown.
+      for i, reverse, loop in self._upcoming(min(len(csids), self._ss_cache.max_frames)):
+        if i in csids and i not in seen and not self._ss_cache.is_cached(i):
+          pending.append(i)
+          seen.add(i)
+      pending.reverse()	# Compute in playback order, popping from the end.
+      self._ss_pending = pending
+    from time import perf_counter
+    self._start_time = perf_counter()
 
   def stop(self):
 
@@ -246,6 +308,11 @@ class CoordinateSetPlayer:
     t.remove_handler(self._handler)
     self._handler = None
     self.inext = None
+    if self.report_timing:
+      self._report_timing()
+    if self._prefetcher:
+      self._prefetcher.stop()
+      self._prefetcher = None
 
   def frame_cb(self, tname, tdata):
 
@@ -253,47 +320,156 @@ class CoordinateSetPlayer:
     if m.deleted:
       self.stop()
       return
-    pc = self._pause_count
-    self._pause_count = (pc + 1) % self.pause_frames
-    if pc > 0:
+    if self._ss_pending:
+      self._precompute_ss()
       return
-    i = self.inext
-    self.change_coordset(i)
+    if self.rate is None:
+      pc = self._pause_count
+      self._pause_count = (pc + 1) % self.pause_frames
+      if pc > 0:
+        return
+      due = 1
+    else:
+      from time import perf_counter
+      due = int((perf_counter() - self._start_time) * self.rate) + 1 - self._frame_count
+      if due <= 0:
+        return
+
+    # Show the latest due coordinate set that is available, skipping earlier ones.
+    pf = self._prefetcher
+    upcoming = self._upcoming(max(due, self.prefetch))
+    if pf:
+      pf.request([i for i, reverse, loop in upcoming])
+    from chimerax.atomic.trajectory import structure_trajectory
+    traj = structure_trajectory(m)
+    show = coords = None
+    for k in range(min(due, len(upcoming))-1, -1, -1):
+      i = upcoming[k][0]
+      if traj is None or traj.is_cached(i) or not traj.has_frame(i):
+        show = k
+      elif pf:
+        coords = pf.frame_coords(i)
+        if coords is None and pf.read_failed(i):
+          # Read the frame here so a read error is reported.
+          try:
+            coords = traj.read_frame(i)
+          except Exception as e:
+            self.stop()
+            self.session.logger.error('Stopped playing %s, could not read trajectory frame %d: %s'
+                                      % (m.name, i, str(e)))
+            return
+        if coords is not None:
+          show = k
+      if show is not None:
+        break
+    if show is None:
+      if pf:
+        self._waits += 1
+        return
+      show = min(due, len(upcoming)) - 1	# Read frame now.
+
+    i, reverse, loop = upcoming[show]
+    self.change_coordset(i, coords)
+    self._frame_count += show + 1
+    self._shown += 1
+    self._skipped += show
+    next = self._step(i, reverse, loop)
+    if next is None:
+      self.stop()
+    else:
+      self.inext, self._reverse, self.loop = next
+
+  def _precompute_ss(self, max_time = 0.1):
+    '''Compute secondary structure of pending coordinate sets for a limited time.'''
+    from time import perf_counter
+    t0 = perf_counter()
+    pending = self._ss_pending
+    cache = self._ss_cache
+    while pending and perf_counter() - t0 < max_time:
+      cache.compute(pending.pop())
+    cache.apply()
+    n = len(cache.coordset_ids())
+    self.session.logger.status('Computed secondary structure for %d of %d coordinate sets of %s'
+                               % (n, n + len(pending), self.structure.name))
+    if not pending:
+      cache.release_copy()
+      self._start_time = perf_counter()
+
+  def _step(self, i, reverse, loop):
+    '''Return coordinate set, direction and loop count after i, or None if done.'''
     s,e,st = self.istart, self.iend, self.istep
-    i += (-st if self._reverse else st)
+    i += (-st if reverse else st)
     if (s <= e and s <= i and i <= e) or (s > e and e <= i and i <= s):
-      self.inext = i
-    else:
-      # Reached the end of the range.  Loop or stop.
-      if self.bounce:
-        self._reverse = not self._reverse
-      r = self._reverse
-      self.inext = e if r else s
-      if not r:
-        self.loop -= 1
-      if self.loop <= 0:
-        self.stop()
-
-  def change_coordset(self, cs):
+      return i, reverse, loop
+    # Reached the end of the range.  Loop or stop.
+    if self.bounce:
+      reverse = not reverse
+    i = e if reverse else s
+    if not reverse:
+      loop -= 1
+    if loop <= 0:
+      return None
+    return i, reverse, loop
+
+  def _upcoming(self, n):
+    '''Next n coordinate sets to show with direction and loop count.'''
+    state = (self.inext, self._reverse, self.loop)
+    states = [state]
+    while len(states) < n:
+      state = self._step(*state)
+      if state is None:
+        break
+      states.append(state)
+    return states
+
+  def change_coordset(self, cs, coords = None):
     m = self.structure
-    last_cs = m.active_coordset_id
+    from chimerax.atomic.trajectory import active_coordset_id, set_active_coordset_id, \
+      structure_trajectory
+    last_cs = active_coordset_id(m)
+    traj = structure_trajectory(m)
+    from time import perf_counter
+    t0 = perf_counter()
     try:
-      m.active_coordset_id = cs
+      if coords is None:
+        set_active_coordset_id(m, cs)
+      else:
+        traj.set_frame(cs, coords)
       compute_ss = self.compute_ss
     except Exception:
       # No such coordset.
       compute_ss = False
+    if traj is not None and coords is None:
+      self._load_time += perf_counter() - t0
+      self._loads += 1
     if compute_ss:
-      from . import dssp
-      dssp.compute_ss(m.session, m)
+      self._ss_cache.apply()
     else:
       if self.steady_atoms:
         self.hold_steady(last_cs)
 
+  def _report_timing(self):
+    from time import perf_counter
+    t = perf_counter() - self._start_time
+    fps = self._shown / t if t > 0 else 0
+    msg = ('Played %d coordinate sets of %s in %.3g seconds, %.3g per second'
+           % (self._shown, self.structure.name, t, fps))
+    if self._skipped:
+      msg += ', skipped %d' % self._skipped
+    pf = self._prefetcher
+    if pf and pf.read_count:
+      msg += (', read ahead %d frames averaging %.3g msec, waited for %d graphics frames'
+              % (pf.read_count, 1000*pf.mean_read_time, self._waits))
+    if self._loads:
+      msg += (', %d frame changes without read ahead averaging %.3g msec'
+              % (self._loads, 1000*self._load_time/self._loads))
+    self.session.logger.info(msg)
+
   def hold_steady(self, last_cs):
 
     m = self.structure
-    tf = self.steady_transform(last_cs).inverse() * self.steady_transform(m.active_coordset_id)
+    from chimerax.atomic.trajectory import active_coordset_id
+    tf = self.steady_transform(last_cs).inverse() * self.steady_transform(active_coordset_id(m))
     m.position = m.position * tf
 
   def steady_transform(self, cset):
@@ -310,14 +486,139 @@ class CoordinateSetPlayer:
     tfc[cset] = tf
     return tf
 
+# -----------------------------------------------------------------------------
+# Secondary structure computed by dssp for each coordinate set of a structure.
+#
+# Residue secondary structure types and ids are kept as arrays for each
+# coordinate set so that showing a coordinate set again sets them without
+# running dssp.  Dssp uses the current atom coordinates of the structure so
+# coordinate sets not shown are switched to while computing and switched back
+# without change notification.  Trajectory frames not shown are computed on a
+# copy of the structure that is not in the session, so the shown coordinates
+# are not changed.  At most max_frames coordinate sets are cached, discarding
+# the least recently used.  Cached values are discarded if residues are added
+# or deleted, and the values for a coordinate set are discarded when its atom
+# coordinates are changed.
+#
+class SecondaryStructureCache:
+
+  def __init__(self, structure, max_frames = 5000):
+    self.structure = structure
+    self.max_frames = max_frames
+    from collections import OrderedDict
+    self._ss = OrderedDict()  # Map coordinate set id to (ss_types, ss_ids) arrays.
+    self._num_residues = structure.num_residues
+    self._copy = None         # Structure copy for computing trajectory frames.
+    from chimerax import atomic
+    self._handler = atomic.get_triggers(structure.session).add_handler('changes',
+                                                                       self._changes_cb)
+
+  def coordset_ids(self):
+    return tuple(self._ss.keys())
+
+  def is_cached(self, cs_id):
+    self._check_residues()
+    return cs_id in self._ss
+
+  def apply(self):
+    '''Set residue secondary structure for the shown coordinate set, computing it if needed.'''
+    s = self.structure
+    from chimerax.atomic.trajectory import active_coordset_id
+    cs_id = active_coordset_id(s)
+    if not self.is_cached(cs_id):
+      self._compute_shown(cs_id)
+    else:
+      self._ss.move_to_end(cs_id)
+      ss_types, ss_ids = self._ss[cs_id]
+      r = s.residues
+      from numpy import int32
+      r.ss_types = ss_types.astype(int32)   # Stored as 8-bit values.
+      r.ss_ids = ss_ids
+
+  def compute(self, cs_id):
+    '''Compute secondary structure for a coordinate set that need not be shown.'''
+    s = self.structure
+    if self.is_cached(cs_id):
+      return
+    from chimerax.atomic.trajectory import structure_trajectory, active_coordset_id
+    t = structure_trajectory(s)
+    shown_id = active_coordset_id(s)
+    if cs_id == shown_id:
+      self._compute_shown(cs_id)
+    elif t is not None:
+      c = self._structure_copy()
+      c.atoms.coords = t.frame_coords(cs_id)
+      self._compute(c, cs_id)
+    else:
+      s.active_coordset_change_notify = False
+      try:
+        s.active_coordset_id = cs_id
+        self._compute_shown(cs_id)
+      finally:
+        s.active_coordset_id = shown_id
+        s.active_coordset_change_notify = True
+
+  def release_copy(self):
+    '''Delete the structure copy used to compute trajectory frames.'''
+    if self._copy is not None:
+      self._copy.delete()
+      self._copy = None
+
+  def _structure_copy(self):
+    s, c = self.structure, self._copy
+    if c is not None and (c.num_atoms != s.num_atoms or c.num_residues != s.num_residues):
+      self.release_copy()
+    if self._copy is None:
+      self._copy = s.copy()
+    return self._copy
+
+  def _compute_shown(self, cs_id):
+    self._compute(self.structure, cs_id)
+
+  def _compute(self, structure, cs_id):
+    from chimerax.dssp import compute_ss
+    compute_ss(structure._c_pointer.value, -0.5, 3, 3, False)
+    r = structure.residues
+    from numpy import int8
+    ss = self._ss
+    ss[cs_id] = (r.ss_types.astype(int8), r.ss_ids)
+    ss.move_to_end(cs_id)
+    while len(ss) > self.max_frames:
+      ss.popitem(last = False)
+
+  def _check_residues(self):
+    n = self.structure.num_residues
+    if n != self._num_residues:
+      self._ss.clear()
+      self._num_residues = n
+
+  def _changes_cb(self, trigger_name, changes):
+    s = self.structure
+    if s.deleted:
+      self._ss.clear()
+      self.release_copy()
+      if getattr(s, '_ss_cache', None) is self:
+        s._ss_cache = None
+      from chimerax.core.triggerset import DEREGISTER
+      return DEREGISTER
+    from chimerax.atomic.trajectory import structure_trajectory
+    if (self._ss and 'coord changed' in changes.atom_reasons()
+        and structure_trajectory(s) is None
+        and s in changes.modified_atoms().unique_structures):
+      # Trajectory frames are read from file so only coordinate sets can be edited.
+      self._ss.pop(s.active_coordset_id, None)
+
+# -----------------------------------------------------------------------------
+#
+def secondary_structure_cache(structure):
+  '''Return the SecondaryStructureCache of a structure, creating it if needed.'''
+  c = getattr(structure, '_ss_cache', None)
+  if c is None:
+    structure._ss_cache = c = SecondaryStructureCache(structure)
+  return c
+
 # -----------------------------------------------------------------------------
 #
 def coordset_coords(atoms, cset, structure):
-  cs = structure.active_coordset_id
-  if cset == cs:
-    xyz = atoms.coords
-  else:
-    structure.active_coordset_id = cset
-    xyz = atoms.coords
-    structure.active_coordset_id = cs
-  return xyz
+  from chimerax.atomic.trajectory import coordset_coords
+  return coordset_coords(structure, cset, atoms)
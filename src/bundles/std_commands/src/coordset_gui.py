@@ -16,9 +16,11 @@ class CoordinateSetSlider(Slider):
                  steady_atoms = None, compute_ss = False):
 
         self.structure = structure
+        self._shown_frame_id = None
 
-        title = 'Coordinate sets %s (%d)' % (structure.name, structure.num_coordsets)
-        csids = structure.coordset_ids
+        from chimerax.atomic.trajectory import coordset_ids, active_coordset_id
+        csids = coordset_ids(structure)
+        title = 'Coordinate sets %s (%d)' % (structure.name, len(csids))
         id_start, id_end = min(csids), max(csids)
         self.coordset_ids = set(csids)
         Slider.__init__(self, session, 'Model Series', 'Model', title, value_range = (id_start, id_end),
@@ -29,7 +31,7 @@ class CoordinateSetSlider(Slider):
         self._player = CoordinateSetPlayer(structure, id_start, id_end, istep = 1,
                                            pause_frames = pause_frames, loop = 1,
                                            compute_ss = compute_ss, steady_atoms = steady_atoms)
-        self.update_value(structure.active_coordset_id)
+        self.update_value(active_coordset_id(structure))
 
         from chimerax import atomic
         t = atomic.get_triggers(session)
@@ -51,7 +53,14 @@ class CoordinateSetSlider(Slider):
     def coordset_change_cb(self, name, changes):
         # If coordset changed by command, update slider
         s = self.structure
-        if ('active_coordset changed' in changes.structure_reasons() and
+        from chimerax.atomic.trajectory import structure_trajectory
+        t = structure_trajectory(s)
+        if t is not None:
+            # Trajectory frames change atom coordinates, not the active coordset.
+            if t.frame_id != self._shown_frame_id:
+                self._shown_frame_id = t.frame_id
+                self.set_slider(t.frame_id)
+        elif ('active_coordset changed' in changes.structure_reasons() and
             s in changes.modified_structures()):
             self.set_slider(s.active_coordset_id)
             
@@ -102,10 +111,12 @@ class PlayCoordinatesMouseMode(MouseMode):
         if fraction is None and step is None:
             return
         from chimerax.atomic import Structure
+        from chimerax.atomic.trajectory import coordset_ids, active_coordset_id, \
+            set_active_coordset_id
         mlist = [m for m in self.session.models.list(type = Structure)
-                 if m.num_coordsets > 1 and m.visible]
+                 if len(coordset_ids(m)) > 1 and m.visible]
         for m in mlist:
-            ids = m.coordset_ids
+            ids = coordset_ids(m)
             nc = len(ids)
             if fraction is not None:
                 step = fraction * nc
@@ -115,7 +126,7 @@ class PlayCoordinatesMouseMode(MouseMode):
             if s != si:
                 m._play_coordinates_accum_step = s-si  # Remember fractional step.
             if si != 0:
-                id = m.active_coordset_id
+                id = active_coordset_id(m)
                 p = _sequence_position(id, ids)
                 np = p + si
                 if self._wrap:
@@ -125,7 +136,7 @@ class PlayCoordinatesMouseMode(MouseMode):
                 elif np < 0:
                     np = 0
                 nid = ids[np]
-                m.active_coordset_id = nid
+                set_active_coordset_id(m, nid)
 
     def vr_motion(self, event):
         # Virtual reality hand controller motion.
@@ -0,0 +1,41 @@
+# Incremental update of a solvent excluded surface after a few atoms move
+# matches recalculating the whole surface.
+from chimerax.core.commands import run
+run(session, "open 3fx2 ; surface #1")
+from chimerax.atomic import MolecularSurface
+surf = [m for m in session.models.list() if isinstance(m, MolecularSurface)][0]
+full_recalcs = []
+recompute = surf._recompute_shape
+def count_recompute():
+	full_recalcs.append(True)
+	recompute()
+surf._recompute_shape = count_recompute
+
+a = surf.atoms[600:610]
+a.coords = a.coords + (0.7, -0.4, 0.3)
+run(session, "wait 1")
+if full_recalcs:
+	raise SystemExit("Moving 10 atoms recalculated the whole surface")
+
+from chimerax.surface import surface_area
+inc_va, inc_ta = surf.vertices, surf.triangles
+surf.calculate_surface_geometry()
+va, ta = surf.vertices, surf.triangles
+inc_area, full_area = surface_area(inc_va, inc_ta), surface_area(va, ta)
+if abs(inc_area - full_area) > 1e-3 * full_area:
+	raise SystemExit("Incrementally updated surface area %.2f differs from full calculation %.2f"
+		% (inc_area, full_area))
+from chimerax import geometry
+i1, i2, near = geometry.find_closest_points(inc_va, va, 1e-3 * surf.grid_spacing)
+if len(i1) != len(inc_va):
+	raise SystemExit("%d of %d incrementally updated surface vertices are not in a full calculation"
+		% (len(inc_va) - len(i1), len(inc_va)))
+
+# Atoms moved at the extremes of the structure give a large box and recalculate everything.
+xyz = surf.atoms.coords
+from numpy import concatenate
+far = surf.atoms[concatenate((xyz.argmin(axis=0), xyz.argmax(axis=0)))]
+far.coords = far.coords + (0.3, 0, 0)
+run(session, "wait 1")
+if not full_recalcs:
+	raise SystemExit("Moving distant atoms did not recalculate the whole surface")
@@ -11,17 +11,25 @@
 # or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas = False):
+def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas = False,
+                         grid_origin = None):
     '''
     Calculate a solvent excluded molecular surface using a distance grid
     contouring method.  Vertex, normal and triangle arrays are returned.
     If sas is true then the solvent accessible surface is returned instead.
+    If grid_origin is given the calculation grid points are placed at
+    that origin plus integer multiples of the grid spacing.
     '''
 
     # Compute bounding box for atoms
     xyz_min, xyz_max = xyz.min(axis = 0), xyz.max(axis = 0)
-    pad = 2*probe_radius + radii.max() + grid_spacing
+    pad = ses_surface_padding(radii, probe_radius, grid_spacing)
     origin = [x-pad for x in xyz_min]
+    if grid_origin is not None:
+        from math import floor
+        origin = [go + floor((o-go)/grid_spacing)*grid_spacing
+                  for o, go in zip(origin, grid_origin)]
+        pad = max(xo-o for xo, o in zip(xyz_min, origin))
 
     # Create 3d grid for computing distance map
     from math import ceil
@@ -99,3 +107,73 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     va,na,ta = reduce_geometry(ses_va, ses_na, ses_ta, keepv, keept)
                                
     return va, na, ta
+
+# -----------------------------------------------------------------------------
+#
+def ses_surface_padding(radii, probe_radius, grid_spacing):
+    '''Distance from atom centers to the edge of the surface calculation grid.'''
+    return 2*probe_radius + radii.max() + grid_spacing
+
+# -----------------------------------------------------------------------------
+#
+def ses_surface_region(xyz, radii, changed_xyz, probe_radius = 1.4, grid_spacing = 0.5,
+                       grid_origin = (0,0,0)):
+    '''
+    Calculate the part of a solvent excluded surface that can be affected by
+    atoms at positions changed_xyz, for example the old and new positions of
+    moved atoms.  Only atoms near the changed positions are used.  The
+    calculation grid is aligned with grid_origin so the surface matches a
+    surface for all atoms calculated with ses_surface_geometry() using the
+    same grid origin.  Returns vertex, normal and triangle arrays for the
+    grid cells in the affected box, and the box corners (xyz_min, xyz_max).
+    Triangles of the full surface inside the box should be replaced by
+    these triangles.
+    '''
+    box_min, box_max = ses_surface_region_box(radii, changed_xyz, probe_radius,
+                                              grid_spacing, grid_origin)
+    s = grid_spacing
+    reach = _ses_reach(radii, probe_radius, s)
+    from numpy import all
+    near = all((xyz >= box_min - reach) & (xyz <= box_max + reach), axis = 1)
+    from numpy import zeros, int32, float32
+    if not near.any():
+        return zeros((0,3),float32), zeros((0,3),float32), zeros((0,3),int32), (box_min, box_max)
+    va, na, ta = ses_surface_geometry(xyz[near], radii[near], probe_radius, s,
+                                      grid_origin = grid_origin)
+    tmask = triangles_in_box(va, ta, box_min, box_max)
+    from numpy import unique
+    ti = tmask.nonzero()[0]
+    vi = unique(ta[ti])
+    from .split import reduce_geometry
+    va, na, ta = reduce_geometry(va, na, ta, vi, ti)
+    return va, na, ta, (box_min, box_max)
+
+# -----------------------------------------------------------------------------
+#
+def ses_surface_region_box(radii, changed_xyz, probe_radius = 1.4, grid_spacing = 0.5,
+                           grid_origin = (0,0,0)):
+    '''
+    Grid aligned box (xyz_min, xyz_max) containing the part of a solvent
+    excluded surface that atoms at positions changed_xyz can affect.
+    '''
+    s = grid_spacing
+    reach = _ses_reach(radii, probe_radius, s)
+    from numpy import floor, ceil, array, float64
+    go = array(grid_origin, float64)
+    cmin = floor((changed_xyz.min(axis = 0) - reach - go) / s)
+    cmax = ceil((changed_xyz.max(axis = 0) + reach - go) / s)
+    return go + cmin*s, go + cmax*s
+
+def _ses_reach(radii, probe_radius, grid_spacing):
+    # The surface at a grid point depends on atoms within the reach distance:
+    # the SAS grid near an atom, SAS vertices within the probe radius plus
+    # two grid points of the SES grid points, plus one grid cell.
+    return 2*probe_radius + radii.max() + 6*grid_spacing
+
+# -----------------------------------------------------------------------------
+#
+def triangles_in_box(va, ta, box_min, box_max):
+    '''Mask of triangles with center inside box.'''
+    c = (va[ta[:,0]] + va[ta[:,1]] + va[ta[:,2]]) / 3
+    from numpy import all
+    return all((c >= box_min) & (c < box_max), axis = 1)
@@ -19,6 +19,8 @@ class _SurfaceSettings(Settings):
         'clipping_cap_offset': 0.01,
         'clipping_cap_subdivision': 1.0,
         'clipping_cap_on_mesh': False,
+        'surface_cache': False,
+        'surface_cache_size': 1024,	# Megabytes
     }
 
 # 'settings' module attribute will be set by the initialization of the bundle API
@@ -155,8 +155,16 @@ def surface(session, atoms = None, enclose = None, include = None,
         if osurfs:
             session.models.close(osurfs)
 
+    # Use previously calculated surfaces saved on disk.
+    from .settings import settings
+    if settings.surface_cache:
+        from .surfcache import surface_cache
+        cache = surface_cache(session)
+    else:
+        cache = None
+
     # Compute surfaces using multiple threads
-    args = [(s,) for s in surfs]
+    args = [(s, cache) for s in surfs]
     args.sort(key = lambda s: s[0].atom_count, reverse = True)      # Largest first for load balancing
     from chimerax.core import threadq
     threadq.apply_to_list(_calculate_surface, args, nthread)
@@ -190,9 +198,9 @@ def surface(session, atoms = None, enclose = None, include = None,
 
 # -------------------------------------------------------------------------------------
 #
-def _calculate_surface(surf):
+def _calculate_surface(surf, cache = None):
     try:
-        surf.calculate_surface_geometry()
+        surf.calculate_surface_geometry(cache = cache)
     except MemoryError as e:
         from chimerax.core.errors import UserError
         raise UserError(str(e))
@@ -428,6 +436,43 @@ def surface_cap(session, enable = None, offset = None, subdivision = None, mesh
                   settings.clipping_cap_on_mesh))
         session.logger.status(msg, log = True)
         
+# -------------------------------------------------------------------------------------
+#
+def surface_cache_settings(session, enable = None, size = None, clear = False):
+    '''
+    Control saving calculated molecular surfaces on disk so the same
+    surface calculated later, for instance after opening the same structure
+    again, is read from disk instead of being recalculated.
+
+    Parameters
+    ----------
+    enable : bool
+      Whether the surface command uses the cache.  Default False.
+    size : float
+      Maximum size of the cache in megabytes.  Least recently used surfaces
+      are deleted when the cache exceeds this size.  Default 1024.
+    clear : bool
+      Delete all cached surfaces.
+    '''
+    from .settings import settings
+    if enable is not None:
+        settings.surface_cache = enable
+    if size is not None:
+        settings.surface_cache_size = size
+
+    from .surfcache import surface_cache
+    cache = surface_cache(session)
+    if clear:
+        cache.clear()
+    elif size is not None:
+        cache.limit_size()
+
+    if enable is None and size is None:
+        onoff = 'on' if settings.surface_cache else 'off'
+        msg = ('Surface cache %s, %.3g of %.4g Mbytes used, directory %s'
+               % (onoff, cache.size() / 2**20, settings.surface_cache_size, cache.directory))
+        session.logger.status(msg, log = True)
+
 # -------------------------------------------------------------------------------------
 #
 def register_command(logger):
@@ -493,6 +538,13 @@ def register_command(logger):
         synopsis = 'Enable or disable clipping surface caps')
     register('surface cap', cap_desc, surface_cap, logger=logger)
 
+    cache_desc = CmdDesc(
+        optional = [('enable', BoolArg),],
+        keyword = [('size', FloatArg),
+                   ('clear', NoArg)],
+        synopsis = 'Enable or disable disk cache of calculated surfaces')
+    register('surface cache', cache_desc, surface_cache_settings, logger=logger)
+
     # Register surface operation subcommands.
     from . import sop
     sop.register_surface_subcommands(logger)
@@ -0,0 +1,161 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Disk cache of calculated surface geometry.
+#
+# Geometry is stored as named numpy arrays in uncompressed .npz files named
+# by a hash of the atom coordinates and calculation parameters that determine
+# the surface, so unchanged structures opened again do not need their
+# surfaces recalculated.  When the total size of the cached files exceeds the
+# limit the least recently used files are deleted.
+#
+CACHE_FORMAT_VERSION = 1
+
+class SurfaceCache:
+    '''
+    Directory of cached surface geometry.
+
+    Parameters
+    ----------
+    directory : string
+      Path to directory holding cache files.  It is created if needed.
+    max_bytes : int
+      Maximum total size of cache files.
+    '''
+    suffix = '.npz'
+
+    def __init__(self, directory, max_bytes = 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        from threading import Lock
+        self._lock = Lock()	# Surfaces are calculated in multiple threads.
+
+    def _path(self, key):
+        from os.path import join
+        return join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        '''Return a dictionary of numpy arrays for the key or None if not cached.'''
+        path = self._path(key)
+        from numpy import load
+        try:
+            with load(path, allow_pickle = False) as f:
+                g = {name:f[name] for name in f.files}
+        except (OSError, ValueError, KeyError):
+            # Missing, or partly written by another ChimeraX.
+            return None
+        import os
+        try:
+            os.utime(path)	# Mark as recently used.
+        except OSError:
+            pass
+        return g
+
+    def put(self, key, arrays):
+        '''Save a dictionary of numpy arrays.  Arrays with value None are not saved.'''
+        arrays = {name:a for name,a in arrays.items() if a is not None}
+        import os
+        from numpy import savez
+        tmp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            # Write to a temporary file so readers never see a partial file.
+            from tempfile import NamedTemporaryFile
+            with NamedTemporaryFile(dir = self.directory, suffix = '.tmp', delete = False) as f:
+                tmp_path = f.name
+                savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.limit_size()
+        return True
+
+    def limit_size(self, max_bytes = None):
+        '''Delete least recently used files until the cache is not larger than max_bytes.'''
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        files = self.cache_files()
+        total = sum(size for path, size, mtime in files)
+        if total <= max_bytes:
+            return
+        files.sort(key = lambda f: f[2])
+        import os
+        with self._lock:
+            for path, size, mtime in files:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+    def cache_files(self):
+        '''List of (path, size, modification time) for cache files.'''
+        import os
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for e in entries:
+            if e.name.endswith(self.suffix):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                files.append((e.path, st.st_size, st.st_mtime))
+        return files
+
+    def size(self):
+        '''Total bytes of cached files.'''
+        return sum(size for path, size, mtime in self.cache_files())
+
+    def clear(self):
+        self.limit_size(0)
+
+# -----------------------------------------------------------------------------
+#
+def surface_cache_key(arrays, parameters):
+    '''
+    Hash string for a list of numpy arrays, such as atom coordinates and radii,
+    and a tuple of parameter values.
+    '''
+    from hashlib import sha256
+    h = sha256()
+    h.update(repr((CACHE_FORMAT_VERSION, parameters)).encode('utf-8'))
+    from numpy import ascontiguousarray
+    for a in arrays:
+        a = ascontiguousarray(a)
+        h.update(repr((a.dtype.str, a.shape)).encode('utf-8'))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+# -----------------------------------------------------------------------------
+#
+_cache = None
+def surface_cache(session):
+    '''Return the SurfaceCache in the user cache directory sized by the surface settings.'''
+    from .settings import settings
+    max_bytes = int(settings.surface_cache_size * 2**20)
+    global _cache
+    if _cache is None:
+        from os.path import join
+        directory = join(session.app_dirs.user_cache_dir, 'surfaces')
+        _cache = SurfaceCache(directory, max_bytes)
+    else:
+        _cache.max_bytes = max_bytes
+    return _cache
@@ -70,6 +70,7 @@ all atoms.
 """
 
 import re
+from collections import OrderedDict
 from .cli import Annotation
 from contextlib import contextmanager
 
@@ -104,10 +105,23 @@ class AtomSpecArg(Annotation):
         if not text or _terminator.match(text[0]) is not None:
             from .cli import AnnotationError
             raise AnnotationError("empty atom specifier")
+        # Scripts and tools parse the same specifiers many times,
+        # so keep recently parsed results.
+        cache = _session_parse_cache(session, text)
+        if cache is not None:
+            result = cache.get(text)
+            if result is not None:
+                cache.move_to_end(text)
+                return result
         if text[0] == '"':
-            return cls._parse_quoted(text, session)
+            result = cls._parse_quoted(text, session)
         else:
-            return cls._parse_unquoted(text, session)
+            result = cls._parse_unquoted(text, session)
+        if cache is not None:
+            cache[text] = result
+            if len(cache) > _PARSE_CACHE_SIZE:
+                cache.popitem(last=False)
+        return result
 
     @classmethod
     def _parse_quoted(cls, text, session):
@@ -127,9 +141,8 @@ class AtomSpecArg(Annotation):
         # Convert quote contents to string
         from .cli import unescape_with_index_map
         token, index_map = unescape_with_index_map(text[start + 1:end - 1])
-        # Create parser and parse converted token
-        from ._atomspec import _atomspecParser
-        parser = _atomspecParser(parseinfo=True)
+        # Parse converted token
+        parser = _atomspec_parser()
         semantics = _AtomSpecSemantics(session)
         from grako.exceptions import FailedParse, FailedSemantics
         try:
@@ -159,8 +172,7 @@ class AtomSpecArg(Annotation):
         # Try to parse the entire line.
         # If we get nothing, then raise AnnotationError.
         # Otherwise, consume what we can use and call it a success.
-        from ._atomspec import _atomspecParser
-        parser = _atomspecParser(parseinfo=True)
+        parser = _atomspec_parser()
         semantics = _AtomSpecSemantics(session)
         from grako.exceptions import FailedParse, FailedSemantics
         try:
@@ -208,6 +220,43 @@ class AtomSpecArg(Annotation):
 # Parsing functions and classes
 #
 
+_parser = None
+
+
+def _atomspec_parser():
+    # Generated parser is expensive to create, so make it once.
+    global _parser
+    if _parser is None:
+        from ._atomspec import _atomspecParser
+        _parser = _atomspecParser(parseinfo=True)
+    return _parser
+
+
+# Least recently used caches of parse results for each session, keyed by
+# specifier text.  Parsing validates selector names, so the caches are
+# cleared whenever selectors are registered or deregistered.  Attribute
+# test values are converted when parsed, for instance color names using the
+# session's user colors, so specifiers with attribute tests are not cached.
+from weakref import WeakKeyDictionary
+_parse_caches = WeakKeyDictionary()
+_PARSE_CACHE_SIZE = 256
+_attribute_test = re.compile(r"::|@@|##")
+
+
+def _session_parse_cache(session, text):
+    if session is None or _attribute_test.search(text):
+        return None
+    cache = _parse_caches.get(session)
+    if cache is None:
+        _parse_caches[session] = cache = OrderedDict()
+    return cache
+
+
+def clear_parse_cache():
+    """Discard cached atom specifier parse results."""
+    _parse_caches.clear()
+
+
 
 class _AtomSpecSemantics:
     """Semantics class to convert basic ASTs into AtomSpec instances."""
@@ -748,7 +797,7 @@ class _Part:
                         elif not ic and start_ic:
                             return False
                         else:
-                            return ic <= start_ic
+                            return ic >= start_ic
             else:
                 # :N-M
                 def matcher(seq, ic):
@@ -756,26 +805,53 @@ class _Part:
                         return False
                     elif seq > start_seq and seq < end_seq:
                         return True
-                    elif seq == start_seq:
-                        if not ic and not start_ic:
-                            return True
-                        elif ic and not start_ic:
-                            return True
-                        elif not ic and start_ic:
-                            return False
-                        else:
-                            return start_ic <= ic
-                    else:   # seq == end_seq
-                        if not ic and not end_ic:
-                            return True
-                        elif ic and not end_ic:
+                    if seq == start_seq:
+                        # Blank insert code < any non-blank
+                        if start_ic and (not ic or ic < start_ic):
                             return False
-                        elif not ic and end_ic:
-                            return True
-                        else:
+                    if seq == end_seq:
+                        if not end_ic:
+                            return not ic
+                        elif ic:
                             return ic <= end_ic
+                    return True
         return matcher
 
+    def string_mask(self, names, case_sensitive=False):
+        # Mask of matching names.  Used with tables of unique names
+        # so the matcher is only called once per distinct name.
+        matcher = self.string_matcher(case_sensitive)
+        import numpy
+        return numpy.array([matcher(name) for name in names], dtype=numpy.bool_)
+
+    def res_id_mask(self, seqs, ics):
+        # Vectorized res_id_matcher() for arrays of residue
+        # sequence numbers and insert codes.
+        # Blank insert codes sort before any non-blank code.
+        try:
+            start_seq, start_ic = self._parse_as_res_id(self.start, True)
+            if self.end is not None:
+                end_seq, end_ic = self._parse_as_res_id(self.end, False)
+        except (ValueError, IndexError):
+            return None
+        import numpy
+        if self.end is None:
+            mask = (seqs == start_seq)
+            i = mask.nonzero()[0]
+            mask[i] = (ics[i] == start_ic)
+            return mask
+        mask = numpy.ones(len(seqs), dtype=numpy.bool_)
+        if start_seq is not None:
+            mask &= (seqs >= start_seq)
+            if start_ic:
+                i = (seqs == start_seq).nonzero()[0]
+                mask[i] = (ics[i] >= start_ic)
+        if end_seq is not None:
+            mask &= (seqs <= end_seq)
+            i = ((seqs == end_seq) & mask).nonzero()[0]
+            mask[i] = (ics[i] <= end_ic) if end_ic else (ics[i] == "")
+        return mask
+
     def _parse_as_res_id(self, n, at_start):
         if at_start:
             if n.lower() == "start":
@@ -1162,6 +1238,7 @@ def register_selector(name, value, logger, *,
             logger.warning("registering illegal selector name \"%s\"" % name)
             return
     _selectors[name] = _Selector(name, value, user, desc, atomic)
+    clear_parse_cache()
     from ..toolshed import get_toolshed
     ts = get_toolshed()
     if ts:
@@ -1189,6 +1266,7 @@ def deregister_selector(name, logger=None):
         if logger:
             logger.warning("deregistering unregistered selector \"%s\"" % name)
     else:
+        clear_parse_cache()
         from ..toolshed import get_toolshed
         ts = get_toolshed()
         if ts:
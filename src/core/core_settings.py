@@ -29,6 +29,7 @@ class _CoreSettings(Settings):
     # chimerax.ui.core_settings_ui.py
     EXPLICIT_SAVE = {
         'background_color': configfile.Value(Color('#000'), commands.ColorArg, Color.hex_with_alpha),
+        'fetch_cache_size': 0,  # Mbytes of indexed fetched files kept, 0 means no limit
         'http_proxy': ("", 80),
         'https_proxy': ("", 443),
         'resize_window_on_session_restore': False,
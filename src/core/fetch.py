@@ -47,10 +47,24 @@ def fetch_file(session, url, name, save_name, save_dir, *,
     :param check_certificates: confirm https certificate (True)
     :returns: the filename
     :raises UserError: if unsuccessful
+
+    Files saved in the cache are recorded in its index
+    (see :py:mod:`chimerax.core.fetchcache`).
     """
+    return _fetch_file(url, name, save_name, save_dir, logger=session.logger,
+                       uncompress=uncompress, transmit_compressed=transmit_compressed,
+                       ignore_cache=ignore_cache, check_certificates=check_certificates,
+                       timeout=timeout)
+
+
+def _fetch_file(url, name, save_name, save_dir, *, logger=None,
+                uncompress=False, transmit_compressed=True,
+                ignore_cache=False, check_certificates=True,
+                timeout=60):
     from os import path, makedirs
     from urllib.request import URLError, urlparse
     from .errors import UserError
+    from .fetchcache import fetch_cache
     import time
     in_timeout_cache = False
     if _timeout_cache:
@@ -66,29 +80,109 @@ def fetch_file(session, url, name, save_name, save_dir, *,
     cache_dirs = cache_directories()
     if not ignore_cache and save_dir is not None:
         for d in cache_dirs:
-            filename = path.join(d, save_dir, save_name)
-            if path.exists(filename):
+            filename = fetch_cache(d).cached_file(save_dir, save_name)
+            if filename is not None:
                 return filename
     if in_timeout_cache:
         raise UserError(f'{hostname} failed to respond')
 
+    retrieve_kw = dict(uncompress=uncompress, transmit_compressed=transmit_compressed,
+                       logger=logger, check_certificates=check_certificates, name=name,
+                       timeout=timeout)
     if save_dir is None:
         import tempfile
         f = tempfile.NamedTemporaryFile(suffix=save_name)
         filename = f.name
         f.close()
-    else:
-        dirname = path.join(cache_dirs[0], save_dir)
-        filename = path.join(dirname, save_name)
-        makedirs(dirname, exist_ok=True)
+        try:
+            retrieve_url(url, filename, **retrieve_kw)
+        except (URLError, EOFError) as err:
+            raise UserError('Fetching url %s failed:\n%s' % (url, str(err)))
+        return filename
+
+    dirname = path.join(cache_dirs[0], save_dir)
+    filename = path.join(dirname, save_name)
+    makedirs(dirname, exist_ok=True)
+    cache = fetch_cache(cache_dirs[0])
+    # Only one process or thread fetches a given file at a time.
+    with cache.file_lock(save_dir, save_name):
+        if not ignore_cache:
+            # Another process may have fetched it while we waited for the lock.
+            cached = cache.cached_file(save_dir, save_name)
+            if cached is not None:
+                return cached
+        # Download to a temporary name so a partial file is never used.
+        import os
+        import threading
+        part_filename = '%s.%d-%d.part' % (filename, os.getpid(), threading.get_ident())
+        headers = {}
+        try:
+            retrieve_url(url, part_filename, response_headers=headers, **retrieve_kw)
+            os.replace(part_filename, filename)
+        except (URLError, EOFError) as err:
+            raise UserError('Fetching url %s failed:\n%s' % (url, str(err)))
+        finally:
+            # Remove a partial download after an error or interruption.
+            if path.exists(part_filename):
+                try:
+                    os.remove(part_filename)
+                except OSError:
+                    pass
+        cache.add(save_dir, save_name, url=url, etag=headers.get('ETag'))
+    max_bytes = _fetch_cache_max_bytes()
+    if max_bytes:
+        cache.limit_size(max_bytes)
+    return filename
+
 
+def _fetch_cache_max_bytes():
     try:
-        retrieve_url(url, filename, uncompress=uncompress, transmit_compressed=transmit_compressed,
-                     logger=session.logger,
-                     check_certificates=check_certificates, name=name, timeout=timeout)
-    except (URLError, EOFError) as err:
-        raise UserError('Fetching url %s failed:\n%s' % (url, str(err)))
-    return filename
+        from .core_settings import settings
+    except ImportError:
+        # Settings not initialized, for instance fetching during ChimeraX build.
+        return None
+    return int(settings.fetch_cache_size * 2**20)
+
+
+# -----------------------------------------------------------------------------
+#
+def prefetch_files(session, fetches, *, max_workers=4, ignore_cache=False,
+                   check_certificates=True, timeout=60):
+    """fetch many files into the cache concurrently
+
+    :param session: a ChimeraX :py:class:`~chimerax.core.session.Session`
+    :param fetches: sequence of (url, name, save_name, save_dir) tuples with
+        arguments as for :py:func:`fetch_file`
+    :param max_workers: maximum number of simultaneous downloads (4)
+    :param ignore_cache: fetch files even if already cached (False)
+    :returns: list of filenames, with None for files that could not be fetched
+
+    Downloads run in a pool of threads without progress messages.
+    Failures are reported as a single warning once all fetches finish.
+    """
+    def fetch(args):
+        url, name, save_name, save_dir = args
+        return _fetch_file(url, name, save_name, save_dir, ignore_cache=ignore_cache,
+                           check_certificates=check_certificates, timeout=timeout)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(fetch, args) for args in fetches]
+        session.logger.status('Fetching %d files' % len(futures), secondary=True)
+        filenames = []
+        failed = []
+        for args, future in zip(fetches, futures):
+            try:
+                filenames.append(future.result())
+            except Exception as err:
+                filenames.append(None)
+                failed.append('%s: %s' % (args[1], err))
+    if failed:
+        session.logger.warning('Failed to fetch %d of %d files:\n%s'
+                               % (len(failed), len(fetches), '\n'.join(failed)))
+    session.logger.status('Fetched %d files' % (len(fetches) - len(failed)),
+                          secondary=True, blank_after=5)
+    return filenames
 
 
 # -----------------------------------------------------------------------------
@@ -110,7 +204,8 @@ def cache_directories():
 # -----------------------------------------------------------------------------
 #
 def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compressed=True,
-                 update=False, check_certificates=True, name=None, timeout=60):
+                 update=False, check_certificates=True, name=None, timeout=60,
+                 response_headers=None):
     """Return requested URL in filename
 
     :param url: the URL to retrive
@@ -120,6 +215,7 @@ def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compr
     :param uncompress: if true, then uncompress the content
     :param update: if true, then existing file is okay if newer than web version
     :param check_certificates: if true
+    :param response_headers: if a dictionary, it is updated with the HTTP response headers
     :returns: None if an existing file, otherwise the content type
     :raises urllib.request.URLError or EOFError: if unsuccessful
 
@@ -185,6 +281,8 @@ def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compr
                     compressed = compressed or ct.casefold() in (
                         'application/gzip', 'application/x-gzip')
                     ct = 'application/octet-stream'
+            if response_headers is not None:
+                response_headers.update(response.headers.items())
             if logger:
                 logger.info('Fetching%s %s from %s' % (
                     " compressed" if compressed else "", name,
@@ -247,7 +345,8 @@ def read_and_report_progress(file_in, file_out, name, content_length, logger, ch
             msg = 'Fetching %s, %.3g of %.3g Mbytes received' % (name, tb / 1048576, content_length / 1048576)
         else:
             msg = 'Fetching %s, %.3g Mbytes received' % (name, tb / 1048576)
-        logger.status(msg)
+        if logger:
+            logger.status(msg)
 
     if content_length is not None and tb != content_length:
         # In ChimeraX bug #2747 zero bytes were read and no error reported.
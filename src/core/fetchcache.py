@@ -0,0 +1,387 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+fetchcache: Index of fetched files
+==================================
+
+Files fetched from the web are saved in subdirectories of a cache
+directory (see :py:func:`chimerax.core.fetch.cache_directories`).
+A :py:class:`FetchCache` keeps a JSON index of these files recording
+their size, modification time, SHA-256 checksum, source URL and HTTP
+ETag, and when each was last used.  The index is used to detect
+truncated or modified files and to delete the least recently used files
+when the cache exceeds a size limit.
+
+Several ChimeraX processes may share a cache directory, so the index is
+only changed while holding a file lock, and each file is downloaded while
+holding a lock for that file so only one process fetches it.  The index is
+replaced atomically, so cache hits read it without the lock, and it is
+parsed again only when the index file changes.  Last use times of cache
+hits are kept in memory and written to the index at most once every
+:py:attr:`FetchCache.use_time_interval` seconds, when the index is next
+changed, or when ChimeraX exits.
+"""
+
+INDEX_VERSION = 1
+
+
+class FileLock:
+    """Exclusive lock on a file shared by threads and processes.
+
+    Used as a context manager, waiting until the lock is acquired.
+    The lock file is created if needed and is not removed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._thread_lock = _thread_lock(path)
+
+    def __enter__(self):
+        # Per-process file locks do not exclude other threads on all platforms.
+        self._thread_lock.acquire()
+        try:
+            import os
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            f = open(self.path, 'a+b')
+            try:
+                _lock_file(f)
+            except BaseException:
+                f.close()
+                raise
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._file = f
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            _unlock_file(self._file)
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+
+from threading import Lock
+_thread_locks = {}
+_thread_locks_lock = Lock()
+
+
+def _thread_lock(path):
+    with _thread_locks_lock:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            _thread_locks[path] = lock = Lock()
+    return lock
+
+
+def _lock_file(f):
+    import sys
+    if sys.platform == 'win32':
+        import msvcrt
+        while True:
+            f.seek(0)
+            try:
+                # Retries for 10 seconds before raising an error.
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    import sys
+    if sys.platform == 'win32':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FetchCache:
+    """Index of the files fetched into a cache directory.
+
+    :param directory: the cache directory, containing one subdirectory per database
+
+    Index entries are keyed by "save_dir/save_name" as given to
+    :py:func:`chimerax.core.fetch.fetch_file`.  Files in the cache
+    directory that are not in the index, for instance ones fetched by
+    older ChimeraX versions, are used as is and never deleted.
+    """
+
+    index_name = 'fetch_index.json'
+    use_time_interval = 60	# Seconds between writing last use times of cache hits
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._index_copy = (None, {})	# (index file stat, entries) for reading without lock
+        import time
+        from threading import Lock
+        self._use_times = {}		# Last use times not yet written, keyed like the index
+        self._use_times_lock = Lock()
+        self._use_times_written = time.time()
+
+    def _path(self, save_dir, save_name):
+        from os.path import join
+        return join(self.directory, save_dir, save_name)
+
+    def _key(self, save_dir, save_name):
+        return '%s/%s' % (save_dir, save_name)
+
+    def _index_lock(self):
+        from os.path import join
+        return FileLock(join(self.directory, '.locks', 'index.lock'))
+
+    def file_lock(self, save_dir, save_name):
+        """Lock to hold while fetching a file into the cache"""
+        from os.path import join
+        name = ('%s_%s.lock' % (save_dir, save_name)).replace('/', '_').replace('\\', '_')
+        return FileLock(join(self.directory, '.locks', name))
+
+    def _read_index(self):
+        import json
+        from os.path import join
+        try:
+            with open(join(self.directory, self.index_name), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            # Missing, or unreadable in which case the index is rebuilt as files are fetched.
+            return {}
+        if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+            return {}
+        return index.get('files', {})
+
+    def _current_index(self):
+        # Index entries for reading only, parsed again if the index file changed.
+        import os
+        try:
+            st = os.stat(os.path.join(self.directory, self.index_name))
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stamp = None
+        copy_stamp, entries = self._index_copy
+        if stamp is None or stamp != copy_stamp:
+            entries = self._read_index() if stamp is not None else {}
+            self._index_copy = (stamp, entries)
+        return entries
+
+    def _write_index(self, entries):
+        import json
+        import os
+        from tempfile import NamedTemporaryFile
+        with self._use_times_lock:
+            use_times, self._use_times = self._use_times, {}
+        for key, used in use_times.items():
+            e = entries.get(key)
+            if e is not None and used > e['used']:
+                e['used'] = used
+        import time
+        self._use_times_written = time.time()
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file so a crash never leaves a partial index.
+        with NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False,
+                                encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': entries}, f)
+        os.replace(f.name, os.path.join(self.directory, self.index_name))
+
+    def cached_file(self, save_dir, save_name, verify_checksum=False):
+        """Return the path of a cached file, or None if it is not cached.
+
+        An indexed file whose size differs from the index, or whose checksum
+        differs when its modification time changed or 'verify_checksum' is true,
+        is assumed to be corrupt.  It is deleted and None is returned.
+        """
+        import os
+        path = self._path(save_dir, save_name)
+        if not os.path.exists(path):
+            return None
+        key = self._key(save_dir, save_name)
+        entry = self._current_index().get(key)
+        if entry is None:
+            return path
+        if not _file_matches(path, entry, verify_checksum):
+            with self._index_lock():
+                # Another process may have fetched the file again.
+                entries = self._read_index()
+                entry = entries.get(key)
+                if entry is not None and not _file_matches(path, entry, verify_checksum):
+                    _remove_file(path)
+                    del entries[key]
+                    self._write_index(entries)
+                    return None
+            return path if os.path.exists(path) else None
+        self._note_use(key)
+        return path
+
+    def _note_use(self, key):
+        import time
+        t = time.time()
+        with self._use_times_lock:
+            self._use_times[key] = t
+        if t - self._use_times_written > self.use_time_interval:
+            self.write_use_times()
+
+    def write_use_times(self):
+        """Write last use times of cache hits to the index"""
+        with self._use_times_lock:
+            if not self._use_times:
+                return
+        with self._index_lock():
+            self._write_index(self._read_index())
+
+    def add(self, save_dir, save_name, url=None, etag=None):
+        """Record a file just saved in the cache"""
+        import os
+        import time
+        path = self._path(save_dir, save_name)
+        st = os.stat(path)
+        entry = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'sha256': file_checksum(path),
+            'url': url,
+            'etag': etag,
+            'used': time.time(),
+        }
+        with self._index_lock():
+            entries = self._read_index()
+            entries[self._key(save_dir, save_name)] = entry
+            self._write_index(entries)
+
+    def remove(self, save_dir, save_name):
+        """Delete a file from the cache"""
+        with self._index_lock():
+            entries = self._read_index()
+            if entries.pop(self._key(save_dir, save_name), None) is not None:
+                self._write_index(entries)
+            _remove_file(self._path(save_dir, save_name))
+
+    def entry(self, save_dir, save_name):
+        """Index information for a file as a dictionary, or None if not indexed"""
+        with self._index_lock():
+            return self._read_index().get(self._key(save_dir, save_name))
+
+    def size(self):
+        """Total bytes of indexed files"""
+        return sum(e['size'] for e in self._current_index().values())
+
+    def limit_size(self, max_bytes):
+        """Delete least recently used indexed files until their total size is at most max_bytes.
+        Returns the number of files deleted.
+        """
+        removed = 0
+        if self.size() <= max_bytes:
+            return removed
+        with self._index_lock():
+            entries = self._read_index()
+            # Include use times of cache hits not yet written.
+            with self._use_times_lock:
+                for key, used in self._use_times.items():
+                    if key in entries:
+                        entries[key]['used'] = max(used, entries[key]['used'])
+            total = sum(e['size'] for e in entries.values())
+            if total <= max_bytes:
+                return removed
+            for key, e in sorted(entries.items(), key=lambda ke: ke[1]['used']):
+                if total <= max_bytes:
+                    break
+                save_dir, save_name = key.split('/', 1)
+                _remove_file(self._path(save_dir, save_name))
+                del entries[key]
+                total -= e['size']
+                removed += 1
+            self._write_index(entries)
+        return removed
+
+    def verify(self):
+        """Check the checksums of all indexed files, deleting missing or corrupt ones.
+        Returns the list of deleted (save_dir, save_name) pairs.
+        """
+        bad = []
+        with self._index_lock():
+            entries = self._read_index()
+            for key, e in list(entries.items()):
+                save_dir, save_name = key.split('/', 1)
+                path = self._path(save_dir, save_name)
+                if not _file_matches(path, e, verify_checksum=True):
+                    _remove_file(path)
+                    del entries[key]
+                    bad.append((save_dir, save_name))
+            if bad:
+                self._write_index(entries)
+        return bad
+
+
+def _file_matches(path, entry, verify_checksum):
+    import os
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != entry['size']:
+        return False
+    if verify_checksum or st.st_mtime != entry['mtime']:
+        try:
+            return file_checksum(path) == entry['sha256']
+        except OSError:
+            return False
+    return True
+
+
+def _remove_file(path):
+    import os
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def file_checksum(path, chunk_size=1048576):
+    """Return SHA-256 hex digest of a file's contents"""
+    from hashlib import sha256
+    h = sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+_caches = {}
+
+
+def fetch_cache(directory):
+    """Return the :py:class:`FetchCache` for a cache directory"""
+    cache = _caches.get(directory)
+    if cache is None:
+        _caches[directory] = cache = FetchCache(directory)
+        import atexit
+        atexit.register(_write_use_times, cache)
+    return cache
+
+
+def _write_use_times(cache):
+    try:
+        cache.write_use_times()
+    except OSError:
+        pass
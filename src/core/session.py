@@ -573,32 +573,38 @@ class Session:
         '''
         self._snapshot_methods.update(methods)
 
-    def save(self, stream, version, include_maps=False):
-        """Serialize session to binary stream."""
+    def save(self, stream, version, include_maps=False, compress='lz4',
+             map_references='path'):
+        """Serialize session to binary stream.
+
+        Version 4 files are indexed with each object compressed separately
+        using the 'compress' method (see :py:mod:`chimerax.core.sessionfile`).
+        Version 3 files are a single stream, usually compressed by the caller.
+        With map_references 'hash' map files are also recorded by content
+        checksum so they can be found after they are moved.
+        """
         from . import serialize
         flags = State.SESSION
         if include_maps:
             flags |= State.INCLUDE_MAPS
+        if map_references == 'hash':
+            flags |= State.MAP_HASHES
+        if version == 1:
+            raise UserError("Version 1 formatted session files are no longer supported")
+        elif version == 2:
+            raise UserError("Version 2 formatted session files are no longer supported")
+        elif version not in (3, 4):
+            raise UserError("Only version 3 and 4 formatted session files are supported")
+        if version == 4:
+            self._save_indexed(stream, flags, compress)
+            return
         mgr = _SaveManager(self, flags)
         self.triggers.activate_trigger("begin save session", self)
         try:
-            if version == 1:
-                raise UserError("Version 1 formatted session files are no longer supported")
-            elif version == 2:
-                raise UserError("Version 2 formatted session files are no longer supported")
-            else:
-                if version != 3:
-                    raise UserError("Only version 3 formatted session files are supported")
-                stream.write(b'# ChimeraX Session version 3\n')
-                stream = serialize.msgpack_serialize_stream(stream)
-                fserialize = serialize.msgpack_serialize
-            metadata = standard_metadata(self.metadata)
-            # TODO: put thumbnail in metadata
-            # stash attribute info into metadata...
-            attr_info = {}
-            for tag, container in self._state_containers.items():
-                attr_info[tag] = getattr(self, tag, None) == container
-            metadata['attr_info'] = attr_info
+            stream.write(b'# ChimeraX Session version 3\n')
+            stream = serialize.msgpack_serialize_stream(stream)
+            fserialize = serialize.msgpack_serialize
+            metadata = self._save_metadata()
             fserialize(stream, metadata)
             # guarantee that bundles are serialized first, so on restoration,
             # all of the related code will be loaded before the rest of the
@@ -614,6 +620,36 @@ class Session:
             mgr.cleanup()
             self.triggers.activate_trigger("end save session", self)
 
+    def _save_metadata(self):
+        metadata = standard_metadata(self.metadata)
+        # TODO: put thumbnail in metadata
+        # stash attribute info into metadata...
+        attr_info = {}
+        for tag, container in self._state_containers.items():
+            attr_info[tag] = getattr(self, tag, None) == container
+        metadata['attr_info'] = attr_info
+        return metadata
+
+    def _save_indexed(self, stream, flags, compress):
+        from .sessionfile import SessionWriter
+        mgr = _SaveManager(self, flags)
+        self.triggers.activate_trigger("begin save session", self)
+        writer = None
+        try:
+            metadata = self._save_metadata()
+            mgr.discovery(self._state_containers)
+            writer = SessionWriter(stream, compress)
+            for name, data in mgr.walk():
+                writer.add(name, data)
+            writer.finish(metadata, mgr.bundle_infos())
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        finally:
+            mgr.cleanup()
+            self.triggers.activate_trigger("end save session", self)
+
     def restore(self, stream, path=None, resize_window=None, restore_camera=True,
                 clear_log = True, metadata_only=False):
         """Deserialize session from binary stream."""
@@ -642,11 +678,21 @@ class Session:
                 raise UserError("session file format version 2 detected.  DO NOT USE.  Recreate session from scratch, and then save.")
             elif version == 3:
                 stream = serialize.msgpack_deserialize_stream(stream)
+            elif version == 4:
+                from .sessionfile import SessionReader
+                try:
+                    reader = SessionReader(stream)
+                except RuntimeError as e:
+                    raise UserError(str(e))
             else:
                 raise UserError(
                     "need newer version of ChimeraX to restore session")
             fdeserialize = serialize.msgpack_deserialize
-        metadata = fdeserialize(stream)
+        if version == 4:
+            # Only the index at the end of the file is read until objects are restored.
+            metadata = reader.metadata
+        else:
+            metadata = fdeserialize(stream)
         if metadata is None:
             raise UserError("corrupt session file (missing metadata)")
         metadata['session_version'] = version
@@ -655,7 +701,14 @@ class Session:
             return
 
         mgr = _RestoreManager()
-        bundle_infos = fdeserialize(stream)
+        if version == 4:
+            bundle_infos = reader.bundle_infos
+            records = reader.records()
+            num_records = len(reader.entries)
+        else:
+            bundle_infos = fdeserialize(stream)
+            records = _stream_records(stream, fdeserialize)
+            num_records = None
         try:
             mgr.check_bundles(self, bundle_infos)
         except RestoreError as e:
@@ -674,11 +727,9 @@ class Session:
             self.session_file_path = path
             self.metadata.update(metadata)
             attr_info = self.metadata.pop('attr_info', {})
-            while True:
-                name = fdeserialize(stream)
-                if name is None:
-                    break
-                data = fdeserialize(stream)
+            for count, (name, data) in enumerate(records):
+                if num_records and count % 100 == 0:
+                    self.logger.status('Restoring session object %d of %d' % (count + 1, num_records))
                 data = mgr.resolve_references(data)
                 if isinstance(name, str):
                     if attr_info.get(name, False):
@@ -714,11 +765,21 @@ class Session:
                             % traceback.format_exc())
             self.reset()
         finally:
+            records.close()
             self.triggers.activate_trigger("end restore session", self)
             self.restore_options.clear()
             mgr.cleanup()
 
 
+def _stream_records(stream, fdeserialize):
+    # (name, data) pairs of version 3 session stream
+    while True:
+        name = fdeserialize(stream)
+        if name is None:
+            return
+        yield name, fdeserialize(stream)
+
+
 class InScriptFlag:
 
     def __init__(self):
@@ -824,13 +885,17 @@ def standard_metadata(previous_metadata={}):
     return metadata
 
 
-def save(session, path, version=3, compress='lz4', include_maps=False):
+def save(session, path, version=3, compress='lz4', include_maps=False,
+         map_references='path'):
     """
     Command line version of saving a session.
 
     Option compress can be lz4 (default), gzip, or None.
     Tests saving 3j3z show lz4 is as fast as uncompressed and 4x smaller file size,
     and gzip is 2.5 times slower with 7x smaller file size.
+
+    Version 4 files compress each object separately, in parallel, and
+    have an index so they can be partly read.
     """
     my_open = None
     if hasattr(path, 'write'):
@@ -842,7 +907,7 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
         if not path.endswith(SESSION_SUFFIX):
             path += SESSION_SUFFIX
 
-        if compress is None or compress == 'none':
+        if compress is None or compress == 'none' or version == 4:
             from .safesave import SaveBinaryFile
             open_func = SaveBinaryFile
         elif compress == 'gzip':
@@ -866,7 +931,8 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
 
     session.session_file_path = path
     try:
-        session.save(output, version=version, include_maps=include_maps)
+        session.save(output, version=version, include_maps=include_maps,
+                     compress=compress, map_references=map_references)
     except Exception:
         if open_func is not None:
             output.close("exceptional")
@@ -893,8 +959,12 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
         remember_file(session, path, 'ses', 'all models', file_saved=True)
 
 
-def sdump(session, session_file, output=None):
-    """dump contents of session for debugging"""
+def sdump(session, session_file, output=None, index_only=False):
+    """dump contents of session for debugging
+
+    If index_only is true, only the metadata, bundle information and,
+    for version 4 files, the list of objects are shown.
+    """
     from . import serialize
     if not session_file.endswith(SESSION_SUFFIX):
         session_file += SESSION_SUFFIX
@@ -930,22 +1000,31 @@ def sdump(session, session_file, output=None):
             version = int(tokens[4])
             if version == 2:
                 raise UserError("Use UCSF ChimeraX 0.8 for Session file format version 2.")
+            elif version == 4:
+                from .sessionfile import SessionReader
+                reader = SessionReader(stream)
             else:
                 stream = serialize.msgpack_deserialize_stream(stream)
             fdeserialize = serialize.msgpack_deserialize
         print("==== session version:", file=output)
         pprint(version, stream=output)
         print("==== session metadata:", file=output)
-        metadata = fdeserialize(stream)
+        metadata = reader.metadata if version == 4 else fdeserialize(stream)
         pprint(metadata, stream=output)
         print("==== bundle info:", file=output)
-        bundle_infos = fdeserialize(stream)
+        bundle_infos = reader.bundle_infos if version == 4 else fdeserialize(stream)
         pprint(bundle_infos, stream=output)
-        while True:
-            name = fdeserialize(stream)
-            if name is None:
-                break
-            data = fdeserialize(stream)
+        if version == 4:
+            print("==== index (compression %s): name/uid, offset, stored size, size:"
+                  % reader.compression, file=output)
+            for e in reader.entries:
+                print(e.name, e.offset, e.stored_size, e.size, file=output)
+            records = reader.records()
+        else:
+            records = _stream_records(stream, fdeserialize)
+        if index_only:
+            return
+        for name, data in records:
             data = dereference_state(data, lambda x: x, _UniqueName)
             print('==== name/uid:', name, file=output)
             pprint(data, stream=output)
@@ -1056,11 +1135,12 @@ def register_misc_commands(session):
     from .commands import devel as devel_cmd
     devel_cmd.register_command(session.logger)
 
-    from .commands import CmdDesc, OpenFileNameArg, SaveFileNameArg, register
+    from .commands import CmdDesc, OpenFileNameArg, SaveFileNameArg, BoolArg, register
     register(
         'debug sdump',
         CmdDesc(required=[('session_file', OpenFileNameArg)],
                 optional=[('output', SaveFileNameArg)],
+                keyword=[('index_only', BoolArg)],
                 synopsis="create human-readable session"),
         sdump,
         logger=session.logger
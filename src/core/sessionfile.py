@@ -0,0 +1,244 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+sessionfile: Indexed session file container
+===========================================
+
+Version 4 session files store the state of each session object in a
+separately compressed chunk followed by an index, so the session metadata
+and the list of objects can be read without reading the rest of the file,
+any object's state can be read on its own, and chunks can be compressed
+and decompressed on several threads.
+
+The file layout is::
+
+    # ChimeraX Session version 4\\n
+    chunk 1 ... chunk N
+    index
+    footer
+
+Each chunk is the msgpack serialization (see :py:mod:`chimerax.core.serialize`)
+of one object's state, compressed with the method named in the index.
+The index is an uncompressed msgpack dictionary with keys 'compression',
+'metadata', 'bundle_infos' and 'objects', the last being a list of
+[name, offset, stored size, size] for each chunk in restore order, where
+name is the state manager tag or unique object name.  The footer is the
+index offset as a little-endian 64-bit unsigned integer followed by the
+8 bytes :py:data:`INDEX_MAGIC`.  Offsets are from the start of the file.
+"""
+
+SESSION_VERSION = 4
+HEADER = b'# ChimeraX Session version 4\n'
+INDEX_MAGIC = b'CXSINDEX'
+_FOOTER_SIZE = 16
+
+#: chunk compression methods
+COMPRESSION_METHODS = ('lz4', 'gzip', 'none')
+
+
+class SessionEntry:
+    """Index entry for one object in a version 4 session file"""
+
+    __slots__ = ('name', 'offset', 'stored_size', 'size')
+
+    def __init__(self, name, offset, stored_size, size):
+        self.name = name
+        self.offset = offset
+        self.stored_size = stored_size  # compressed bytes
+        self.size = size                # serialized bytes
+
+
+class SessionWriter:
+    """Write a version 4 session file.
+
+    :param stream: binary output stream, positioned at the start of the file
+    :param compress: chunk compression, one of :py:data:`COMPRESSION_METHODS`
+    :param max_workers: number of compression threads, default number of cores
+
+    Objects are serialized by :py:meth:`add` in the calling thread and
+    compressed on other threads.  Chunks are written in the order added.
+    """
+
+    def __init__(self, stream, compress='lz4', max_workers=None):
+        if compress is None:
+            compress = 'none'
+        if compress not in COMPRESSION_METHODS:
+            raise ValueError('Unknown session compression "%s"' % compress)
+        from . import serialize
+        self._stream = stream
+        self._packer = serialize.msgpack_serialize_stream(None)[1]
+        self.compress = compress
+        self._compress = _compressor(compress)
+        if max_workers is None:
+            import os
+            max_workers = os.cpu_count() or 1
+        self._max_pending = 2 * max_workers
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = []      # (name, size, future) waiting to be written
+        self._entries = []
+        stream.write(HEADER)
+        self._offset = len(HEADER)
+
+    def add(self, name, data):
+        """Add state data for a named object"""
+        raw = self._packer.pack(data)
+        self._pending.append((name, len(raw), self._executor.submit(self._compress, raw)))
+        while len(self._pending) > self._max_pending:
+            self._write_next()
+
+    def _write_next(self):
+        name, size, future = self._pending.pop(0)
+        chunk = future.result()
+        self._stream.write(chunk)
+        self._entries.append([name, self._offset, len(chunk), size])
+        self._offset += len(chunk)
+
+    def finish(self, metadata, bundle_infos):
+        """Write remaining chunks, the index and the footer"""
+        try:
+            while self._pending:
+                self._write_next()
+        finally:
+            self._executor.shutdown(wait=False)
+        index = {
+            'compression': self.compress,
+            'metadata': metadata,
+            'bundle_infos': bundle_infos,
+            'objects': self._entries,
+        }
+        import struct
+        self._stream.write(self._packer.pack(index))
+        self._stream.write(struct.pack('<Q', self._offset) + INDEX_MAGIC)
+
+    def abort(self):
+        """Stop compression threads after an error"""
+        for name, size, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
+
+
+class SessionReader:
+    """Read a version 4 session file.
+
+    :param stream: seekable binary input stream for the whole file
+
+    Only the index is read when the reader is created, giving the
+    'metadata', 'bundle_infos' and object 'entries' attributes.
+    """
+
+    def __init__(self, stream):
+        import struct
+        self._stream = stream
+        try:
+            stream.seek(-_FOOTER_SIZE, 2)
+        except (OSError, ValueError):
+            raise RuntimeError('Session file is truncated or not seekable')
+        footer = stream.read(_FOOTER_SIZE)
+        if len(footer) != _FOOTER_SIZE or footer[8:] != INDEX_MAGIC:
+            raise RuntimeError('Session file is truncated (no index found)')
+        index_offset = struct.unpack('<Q', footer[:8])[0]
+        index_end = stream.tell() - _FOOTER_SIZE
+        if index_offset < len(HEADER) or index_offset > index_end:
+            raise RuntimeError('Session file index location is invalid')
+        stream.seek(index_offset)
+        index = _unpack(stream.read(index_end - index_offset))
+        if not isinstance(index, dict) or 'objects' not in index:
+            raise RuntimeError('Session file index is corrupt')
+        self.compression = index.get('compression', 'none')
+        self._decompress = _decompressor(self.compression)
+        self.metadata = index.get('metadata')
+        self.bundle_infos = index.get('bundle_infos')
+        self.entries = [SessionEntry(*e) for e in index['objects']]
+
+    def _read_chunk(self, entry):
+        self._stream.seek(entry.offset)
+        chunk = self._stream.read(entry.stored_size)
+        if len(chunk) != entry.stored_size:
+            raise RuntimeError('Session file is truncated reading %s' % (entry.name,))
+        return chunk
+
+    def _chunk_data(self, raw, entry):
+        if len(raw) != entry.size:
+            raise RuntimeError('Session file data is corrupt for %s' % (entry.name,))
+        return _unpack(raw)
+
+    def data(self, entry):
+        """Return the state data of one object"""
+        return self._chunk_data(self._decompress(self._read_chunk(entry)), entry)
+
+    def find(self, name):
+        """Return the index entry with the given name, or None"""
+        for e in self.entries:
+            if e.name == name:
+                return e
+        return None
+
+    def records(self, entries=None, max_workers=None):
+        """Generate (name, data) pairs in order.
+
+        Chunks ahead of the one returned are decompressed on other threads
+        while the caller restores the current object.
+        """
+        if entries is None:
+            entries = self.entries
+        if max_workers is None:
+            import os
+            max_workers = os.cpu_count() or 1
+        from concurrent.futures import ThreadPoolExecutor
+        from collections import deque
+        ahead = 2 * max_workers
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                next_entry = 0
+                while pending or next_entry < len(entries):
+                    while next_entry < len(entries) and len(pending) < ahead:
+                        e = entries[next_entry]
+                        pending.append((e, executor.submit(self._decompress, self._read_chunk(e))))
+                        next_entry += 1
+                    e, future = pending.popleft()
+                    yield e.name, self._chunk_data(future.result(), e)
+            finally:
+                for e, future in pending:
+                    future.cancel()
+
+
+def _unpack(raw):
+    from . import serialize
+    from io import BytesIO
+    return serialize.msgpack_deserialize(serialize.msgpack_deserialize_stream(BytesIO(raw)))
+
+
+def _compressor(method):
+    if method == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress
+    if method == 'gzip':
+        import zlib
+        return zlib.compress
+    return bytes
+
+
+def _decompressor(method):
+    if method == 'lz4':
+        import lz4.frame
+        return lz4.frame.decompress
+    if method == 'gzip':
+        import zlib
+        return zlib.decompress
+    if method == 'none':
+        return bytes
+    raise RuntimeError('Unknown session file compression "%s"' % method)
@@ -36,7 +36,9 @@ class State:
     SESSION = 0x2
     #: state flag
     INCLUDE_MAPS = 0x4
-    ALL = SCENE | SESSION | INCLUDE_MAPS
+    #: state flag, reference map files and arrays by content checksum
+    MAP_HASHES = 0x8
+    ALL = SCENE | SESSION | INCLUDE_MAPS | MAP_HASHES
 
     def take_snapshot(self, session, flags):
         """Return snapshot of current state of instance.